@@ -0,0 +1,382 @@
+"""
+Rendered Session Audio
+Entrainment tracks rendered once to content-addressed WAV files, then served
+as HTTP byte ranges straight from memory-mapped files
+
+A track's id is a hash of its normalized render parameters, so the same
+parameters always map to the same file and seeking, resuming or fetching
+segments in parallel costs a file read instead of a new synthesis.
+
+The cache directory is bounded: after each render, tracks unused for
+AUDIO_CACHE_MAX_AGE are deleted, then the least recently used ones until
+the directory fits in AUDIO_CACHE_MAX_BYTES. A deleted track is rendered
+again on its next POST /api/music.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import tempfile
+import time
+import wave
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from database.brainwave_bands import BRAINWAVE_STATES
+from database.metrics import metrics
+
+# Where rendered WAV files are kept (shared by all workers on a host)
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "rendered_audio")
+
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", "44100"))
+
+# Longest track (seconds) a client can ask for (~10 MB of WAV per minute)
+AUDIO_MAX_DURATION = float(os.getenv("AUDIO_MAX_DURATION", "600"))
+
+# Disk budget for rendered tracks; least recently used files are deleted past it
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# Tracks unused for this many seconds are deleted (0 keeps them until the budget is hit)
+AUDIO_CACHE_MAX_AGE = float(os.getenv("AUDIO_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+# Seconds between "last used" updates of a track's file while it is being served
+AUDIO_TOUCH_INTERVAL = 60
+
+# Memory-mapped files kept open per worker (least recently used are dropped)
+AUDIO_MMAP_CACHE_SIZE = int(os.getenv("AUDIO_MMAP_CACHE_SIZE", "64"))
+
+# Bytes per body chunk when streaming a range
+AUDIO_STREAM_CHUNK = int(os.getenv("AUDIO_STREAM_CHUNK", str(256 * 1024)))
+
+# Seconds of audio synthesized per block while rendering
+RENDER_BLOCK_SECONDS = 10
+
+# Bump when synthesis changes, so old files are not served for new ids
+RENDER_VERSION = 1
+
+CHANNELS = 2
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
+# Frontend training targets -> the brainwave band they entrain
+TARGET_STATE_BANDS = {
+    "focus": "beta",
+    "energize": "beta",
+    "calm": "alpha",
+    "relax": "theta",
+    "sleep": "delta",
+}
+
+MUSIC_ID_PATTERN = re.compile(r"^[0-9a-f]{24}$")
+
+
+def _clamp(value: Any, low: float, high: float, default: float) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(value, low), high) if math.isfinite(value) else default
+
+
+def render_spec(target_state: Optional[str], parameters: Dict[str, Any], duration: float) -> Dict[str, Any]:
+    """
+    Normalize render parameters (raises ValueError for an unknown target)
+
+    Accepts the seeder's generated_content names (binaural_beat_frequency,
+    carrier_frequency, modulation_depth, pink_noise_level, volume) and the
+    frontend's binaural_freq. Without an explicit beat, the middle of the
+    target band in BRAINWAVE_STATES is used.
+    """
+    band = TARGET_STATE_BANDS.get(target_state, target_state)
+    beat = parameters.get("binaural_beat_frequency", parameters.get("binaural_freq"))
+    if beat is None:
+        if band not in BRAINWAVE_STATES:
+            raise ValueError(f"Unknown target_state '{target_state}'")
+        low, high = BRAINWAVE_STATES[band]["range"]
+        beat = (low + high) / 2
+
+    beat = round(_clamp(beat, 0.5, 100, 10.0), 3)
+    return {
+        "band": band if band in BRAINWAVE_STATES else None,
+        "binaural_beat_frequency": beat,
+        "carrier_frequency": round(_clamp(parameters.get("carrier_frequency"), 20, 2000, 250.0), 3),
+        "modulation_depth": round(_clamp(parameters.get("modulation_depth"), 0, 1, 0.0), 3),
+        "pink_noise_level": round(_clamp(parameters.get("pink_noise_level"), 0, 1, 0.0), 3),
+        "volume": round(_clamp(parameters.get("volume"), 0, 1, 0.5), 3),
+        "duration": round(_clamp(duration, 1, AUDIO_MAX_DURATION, 300.0), 3),
+        "sample_rate": AUDIO_SAMPLE_RATE,
+    }
+
+
+def music_id(spec: Dict[str, Any]) -> str:
+    """Content address of a normalized spec"""
+    canonical = json.dumps({**spec, "render_version": RENDER_VERSION}, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:24]
+
+
+def audio_path(track_id: str) -> str:
+    return os.path.join(AUDIO_CACHE_DIR, f"{track_id}.wav")
+
+
+def _pink_noise(samples: int, rng):
+    """Approximately 1/f noise in [-1, 1] by shaping white noise in the frequency domain"""
+    import numpy as np
+
+    spectrum = np.fft.rfft(rng.standard_normal(samples))
+    frequencies = np.arange(len(spectrum), dtype=np.float64)
+    frequencies[0] = 1.0
+    noise = np.fft.irfft(spectrum / np.sqrt(frequencies), samples)
+    peak = np.abs(noise).max()
+    return noise / peak if peak else noise
+
+
+def render_blocks(spec: Dict[str, Any]) -> Iterator[bytes]:
+    """
+    Synthesize the track as interleaved int16 stereo blocks
+
+    Left ear plays the carrier, right ear carrier + beat; modulation_depth
+    adds isochronic amplitude modulation at the beat frequency. Phase is
+    computed from the absolute sample index, so blocks join seamlessly.
+    NumPy is imported here, so serving already rendered tracks never loads it.
+    """
+    import numpy as np
+
+    sample_rate = spec["sample_rate"]
+    total = int(round(spec["duration"] * sample_rate))
+    block = RENDER_BLOCK_SECONDS * sample_rate
+    carrier, beat = spec["carrier_frequency"], spec["binaural_beat_frequency"]
+    depth, noise_level, volume = spec["modulation_depth"], spec["pink_noise_level"], spec["volume"]
+    rng = np.random.default_rng(int(music_id(spec)[:8], 16))
+
+    for start in range(0, total, block):
+        t = np.arange(start, min(start + block, total), dtype=np.float64) / sample_rate
+        stereo = np.empty((len(t), CHANNELS), dtype=np.float64)
+        stereo[:, 0] = np.sin(2 * np.pi * carrier * t)
+        stereo[:, 1] = np.sin(2 * np.pi * (carrier + beat) * t)
+        if depth:
+            stereo *= (1 - depth + depth * (np.sin(2 * np.pi * beat * t) + 1) / 2)[:, None]
+        if noise_level:
+            stereo = stereo * (1 - noise_level) + noise_level * _pink_noise(len(t), rng)[:, None]
+        yield (stereo * volume * 32767).astype("<i2").tobytes()
+
+
+def write_wav(path: str, spec: Dict[str, Any]):
+    """Render to a temporary file and move it into place (atomic for concurrent workers)"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Unique per call, so concurrent renders of one spec never share a file
+    descriptor, temporary = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(descriptor, "wb") as handle, wave.open(handle, "wb") as output:
+            output.setnchannels(CHANNELS)
+            output.setsampwidth(SAMPLE_WIDTH)
+            output.setframerate(spec["sample_rate"])
+            output.setnframes(int(round(spec["duration"] * spec["sample_rate"])))
+            for samples in render_blocks(spec):
+                output.writeframesraw(samples)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def cached_tracks() -> List[Tuple[float, int, str]]:
+    """(last used, bytes, id) of every rendered track, least recently used first"""
+    tracks = []
+    try:
+        with os.scandir(AUDIO_CACHE_DIR) as entries:
+            for entry in entries:
+                track_id, extension = os.path.splitext(entry.name)
+                if extension != ".wav" or not MUSIC_ID_PATTERN.match(track_id):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                tracks.append((stat.st_mtime, stat.st_size, track_id))
+    except FileNotFoundError:
+        return []
+    return sorted(tracks)
+
+
+def prune_cache(
+    keep: Optional[str] = None, max_bytes: int = AUDIO_CACHE_MAX_BYTES, max_age: float = AUDIO_CACHE_MAX_AGE
+) -> List[str]:
+    """
+    Delete expired, then least recently used, tracks until the cache fits; returns their ids
+
+    A file's mtime is its last use (see AudioStore.open). `keep` (the track
+    just rendered) is never deleted. Deleting a file does not break a
+    response that is streaming it, since its memory map stays valid.
+    """
+    tracks = cached_tracks()
+    total = sum(size for _, size, _ in tracks)
+    expired_before = time.time() - max_age if max_age else None
+    removed = []
+    for used_at, size, track_id in tracks:
+        if track_id == keep:
+            continue
+        # Oldest first: once one fits and has not expired, the rest don't need deleting either
+        if total <= max_bytes and (expired_before is None or used_at >= expired_before):
+            break
+        try:
+            os.remove(audio_path(track_id))
+        except FileNotFoundError:
+            pass  # Another worker deleted it first
+        except OSError:
+            continue  # Still open where deleting open files is not allowed; retried after the next render
+        total -= size
+        removed.append(track_id)
+    return removed
+
+
+class AudioStore:
+    """
+    Rendered tracks on disk plus an LRU of open memory maps
+
+    Concurrent requests for a track that is not rendered yet share one
+    render. Dropping a map from the LRU never closes it under a response
+    that is still streaming: each response holds its own reference.
+    """
+
+    def __init__(self, max_open: int = AUDIO_MMAP_CACHE_SIZE):
+        self.max_open = max_open
+        # track_id -> (map, when its file's last-used time was last updated)
+        self._maps: "OrderedDict[str, Tuple[mmap.mmap, float]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def render(self, spec: Dict[str, Any]) -> Tuple[str, bool]:
+        """Ensure the track exists; returns (id, rendered_now)"""
+        track_id = music_id(spec)
+        path = audio_path(track_id)
+        if os.path.exists(path):
+            return track_id, False
+
+        lock = self._locks.setdefault(track_id, asyncio.Lock())
+        async with lock:
+            # Another request may have rendered it while we waited
+            if os.path.exists(path):
+                return track_id, False
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(write_wav, path, spec)
+            finally:
+                self._locks.pop(track_id, None)
+
+        metrics.counter("audio_renders_total", "Tracks synthesized").inc()
+        metrics.histogram(
+            "audio_render_seconds", "Track synthesis time", buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+        ).observe(time.perf_counter() - started)
+
+        removed = await asyncio.to_thread(prune_cache, track_id)
+        for evicted in removed:
+            self._maps.pop(evicted, None)
+        metrics.counter("audio_cache_evictions_total", "Rendered tracks deleted to bound the cache").inc(len(removed))
+        return track_id, True
+
+    def open(self, track_id: str) -> Optional[mmap.mmap]:
+        """Memory map of a rendered track (None if it was never rendered or has been evicted)"""
+        now = time.time()
+        entry = self._maps.get(track_id)
+        if entry is not None:
+            mapped, touched_at = entry
+            if now - touched_at < AUDIO_TOUCH_INTERVAL:
+                self._maps.move_to_end(track_id)
+                return mapped
+            try:
+                # Mark the file as recently used for prune_cache()
+                os.utime(audio_path(track_id), (now, now))
+            except FileNotFoundError:
+                # Evicted by another worker
+                del self._maps[track_id]
+                return None
+            self._maps[track_id] = (mapped, now)
+            self._maps.move_to_end(track_id)
+            return mapped
+
+        path = audio_path(track_id)
+        try:
+            with open(path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(path, (now, now))
+        except (FileNotFoundError, ValueError):
+            return None
+
+        self._maps[track_id] = (mapped, now)
+        while len(self._maps) > self.max_open:
+            self._maps.popitem(last=False)
+        return mapped
+
+    async def status(self) -> Dict[str, Any]:
+        """Health probe: the cache directory is writable; its usage and renders in flight"""
+        tracks = await asyncio.to_thread(cached_tracks)
+        # Before the first render the directory does not exist yet; it is created in its parent
+        directory = AUDIO_CACHE_DIR if os.path.isdir(AUDIO_CACHE_DIR) else os.path.dirname(os.path.abspath(AUDIO_CACHE_DIR))
+        writable = os.access(directory, os.W_OK | os.X_OK)
+        return {
+            "status": "ok" if writable else "error",
+            **({} if writable else {"error": f"{directory} is not writable"}),
+            "cache_dir": AUDIO_CACHE_DIR,
+            "tracks": len(tracks),
+            "bytes": sum(size for _, size, _ in tracks),
+            "max_bytes": AUDIO_CACHE_MAX_BYTES,
+            "renders_in_flight": len(self._locks),
+            "open_maps": len(self._maps),
+        }
+
+
+audio_store = AudioStore()
+
+
+class RangeNotSatisfiable(Exception):
+    """The Range header asks for bytes past the end of the file"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "bytes=" header into an inclusive (start, end)
+
+    Returns None when the whole file should be sent: no header, a malformed
+    one or several ranges (RFC 9110 lets a server ignore Range). Raises
+    RangeNotSatisfiable when the range starts past the end.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def read_range(mapped: mmap.mmap, start: int, end: int) -> bytes:
+    """Inclusive byte range of a memory map"""
+    body = mapped[start:end + 1]
+    metrics.counter("audio_bytes_served_total", "Audio body bytes sent").inc(len(body))
+    return body
+
+
+def iter_range(mapped: mmap.mmap, start: int, end: int, chunk: int = AUDIO_STREAM_CHUNK) -> Iterator[bytes]:
+    """Inclusive byte range of a memory map in chunks"""
+    for offset in range(start, end + 1, chunk):
+        yield read_range(mapped, offset, min(offset + chunk - 1, end))
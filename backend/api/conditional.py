@@ -0,0 +1,82 @@
+"""
+Conditional Requests
+ETags built from cheap version stamps, so unchanged polls get a 304 before the
+route runs its real queries
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+from api.responses import etag_matches, not_modified
+from database.repository import repository
+
+# Granularity (seconds) of the time component in ETags for time-relative
+# results (days= windows, recent_sessions), bounding how stale a 304 can be
+ETAG_TIME_BUCKET_SECONDS = int(os.getenv("ETAG_TIME_BUCKET_SECONDS", "60"))
+
+
+class ConditionalStats:
+    """Per-route counters for conditional GET handling"""
+
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, int]] = {}
+
+    def record(self, route: str, conditional: bool, not_modified: bool):
+        counters = self.routes.setdefault(route, {"requests": 0, "conditional": 0, "not_modified": 0})
+        counters["requests"] += 1
+        counters["conditional"] += conditional
+        counters["not_modified"] += not_modified
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus hit rates (304s per conditional request and per request)"""
+        totals = {"requests": 0, "conditional": 0, "not_modified": 0}
+        routes = {}
+        for route, counters in self.routes.items():
+            for key in totals:
+                totals[key] += counters[key]
+            routes[route] = {**counters, **self._rates(counters)}
+        return {**totals, **self._rates(totals), "routes": routes}
+
+    @staticmethod
+    def _rates(counters: Dict[str, int]) -> Dict[str, float]:
+        return {
+            "hit_rate": round(counters["not_modified"] / counters["conditional"], 4) if counters["conditional"] else 0.0,
+            "savings_rate": round(counters["not_modified"] / counters["requests"], 4) if counters["requests"] else 0.0,
+        }
+
+
+conditional_stats = ConditionalStats()
+
+
+def check_not_modified(request: Request, route: str, etag: Optional[str]) -> Optional[Response]:
+    """Return a 304 if If-None-Match matches the ETag, recording the outcome"""
+    conditional = "if-none-match" in request.headers
+    hit = etag is not None and conditional and etag_matches(request, etag)
+    conditional_stats.record(route, conditional, hit)
+    return not_modified(etag) if hit else None
+
+
+def time_bucket() -> int:
+    """Current ETag time bucket"""
+    return int(time.time() // ETAG_TIME_BUCKET_SECONDS)
+
+
+def user_sessions_etag(stats: Optional[Dict[str, Any]], time_relative: bool = False) -> str:
+    """
+    Strong ETag for a user's session data from their rollup document
+
+    The rollup's version is bumped by every session insert and rating change,
+    and by rebuild_session_stats, so the (_id, version) pair never repeats.
+    """
+    stamp = f"{stats['_id']}-{stats.get('version', 0)}" if stats else "empty"
+    if time_relative:
+        stamp += f"-t{time_bucket()}"
+    return f'"sessions-{stamp}"'
+
+
+async def get_user_version_stamp(user_id: str) -> Optional[Dict[str, Any]]:
+    """Point read of just the rollup _id and version for a user"""
+    return await repository.user_version_stamp(user_id)
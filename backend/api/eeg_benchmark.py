@@ -0,0 +1,159 @@
+"""
+EEG Ingestion Benchmark
+Sustained binary EEG upload throughput through POST /api/eeg-data, in
+samples/sec per worker, plus the parse-only rate of the same frames
+
+Usage:
+    python -m api.eeg_benchmark                                   # in-process app, temporary EEG_DATA_DIR
+    python -m api.eeg_benchmark --channels 64 --sample-rate 512 --frame-seconds 0.25
+    python -m api.eeg_benchmark --format int16 --concurrency 1,8 --duration 10
+    python -m api.eeg_benchmark --base-url http://localhost:8000  # a running server (one worker per process)
+
+In-process runs are a single worker, so their samples/sec is the per-worker
+figure; against a server divide by its worker count.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from api.load_test import ASGIClient, HTTPClient, latency_stats
+
+DEFAULT_CONCURRENCY = [1, 4, 16]
+DEFAULT_DURATION = 5.0  # Seconds per concurrency level
+
+# Stored units for int16 uploads (microvolts per count)
+INT16_SCALE = 0.1
+
+
+def build_upload(args) -> bytes:
+    """One upload body: frames_per_request frames of synthetic ~20 µV noise"""
+    from database.eeg_store import encode_frame
+
+    rng = np.random.default_rng(args.seed)
+    samples_per_frame = int(round(args.sample_rate * args.frame_seconds))
+    frames = []
+    for _ in range(args.frames_per_request):
+        microvolts = rng.standard_normal((samples_per_frame, args.channels)) * 20
+        if args.format == "int16":
+            frames.append(encode_frame((microvolts / INT16_SCALE).astype(np.int16), args.sample_rate, INT16_SCALE))
+        else:
+            frames.append(encode_frame(microvolts.astype(np.float32), args.sample_rate))
+    return b"".join(frames)
+
+
+def parse_rate(body: bytes, seconds: float = 1.0) -> Dict[str, float]:
+    """Parse-only throughput (np.frombuffer views, no copy) for the upload body"""
+    from database.eeg_store import parse_frames
+
+    samples = parses = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        samples += sum(len(frame.samples) for frame in parse_frames(body))
+        parses += 1
+    elapsed = time.perf_counter() - started
+    return {"uploads_per_sec": round(parses / elapsed, 1), "samples_per_sec": round(samples / elapsed)}
+
+
+async def run_level(client, body: bytes, samples_per_upload: int, concurrency: int, duration: float, sessions: int) -> Dict[str, Any]:
+    """Keep `concurrency` uploads in flight for `duration` seconds"""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int):
+        nonlocal errors
+        uploads = 0
+        while time.perf_counter() < deadline:
+            session_id = f"benchmark-{(index + uploads * concurrency) % sessions}"
+            uploads += 1
+            started = time.perf_counter()
+            try:
+                status = await client.request("POST", "/api/eeg-data/", {"session_id": session_id}, body)
+            except Exception:
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stats = latency_stats(latencies, errors, elapsed)
+    stored = (len(latencies) - errors) * samples_per_upload
+    stats["samples_per_sec"] = round(stored / elapsed)
+    stats["mb_per_sec"] = round((len(latencies) - errors) * len(body) / elapsed / 1e6, 1)
+    return stats
+
+
+async def main():
+    """Benchmark EEG ingestion at each concurrency level"""
+    parser = argparse.ArgumentParser(description="Benchmark binary EEG ingestion")
+    parser.add_argument("--base-url", default=None, help="Drive a running server instead of the in-process app")
+    parser.add_argument("--channels", type=int, default=32)
+    parser.add_argument("--sample-rate", type=float, default=256.0, help="Hz")
+    parser.add_argument("--frame-seconds", type=float, default=1.0, help="Seconds of samples per frame")
+    parser.add_argument("--frames-per-request", type=int, default=1)
+    parser.add_argument("--format", choices=["float32", "int16"], default="float32")
+    parser.add_argument("--sessions", type=int, default=8, help="Sessions the uploads are spread over")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=DEFAULT_CONCURRENCY,
+        help="Comma-separated concurrency levels"
+    )
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="Seconds per concurrency level")
+    parser.add_argument("--data-dir", default=None, help="EEG_DATA_DIR for in-process runs (default: a temporary directory)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    temporary_dir = None
+    if args.base_url:
+        client = HTTPClient(args.base_url, max(args.concurrency))
+    else:
+        if not args.data_dir:
+            temporary_dir = args.data_dir = tempfile.mkdtemp(prefix="eeg_benchmark-")
+        # Must be set before the store is first imported
+        os.environ["EEG_DATA_DIR"] = args.data_dir
+        from api.main import app
+        client = ASGIClient(app)
+
+    body = build_upload(args)
+    samples_per_upload = int(round(args.sample_rate * args.frame_seconds)) * args.frames_per_request
+    print(f"\nEEG ingestion into {client.target}: {args.channels}ch {args.format} at {args.sample_rate:g} Hz, "
+          f"{samples_per_upload} samples ({len(body) / 1024:.0f} KiB) per upload")
+
+    parsed = parse_rate(body)
+    print(f"  parse only: {parsed['uploads_per_sec']} uploads/s, {parsed['samples_per_sec']:,} samples/s")
+
+    levels = []
+    try:
+        print(f"\n  {'concurrency':<13}{'uploads':>9}{'errors':>8}{'samples/s':>13}{'ch-samples/s':>15}{'MB/s':>8}{'p50 ms':>9}{'p99 ms':>9}")
+        for concurrency in args.concurrency:
+            stats = await run_level(client, body, samples_per_upload, concurrency, args.duration, args.sessions)
+            levels.append(stats)
+            print(f"  {concurrency:<13}{stats['requests']:>9}{stats['errors']:>8}{stats['samples_per_sec']:>13,}"
+                  f"{stats['samples_per_sec'] * args.channels:>15,}{stats['mb_per_sec']:>8}"
+                  f"{stats['p50_ms'] if stats['p50_ms'] is not None else 'n/a':>9}"
+                  f"{stats['p99_ms'] if stats['p99_ms'] is not None else 'n/a':>9}")
+    finally:
+        await client.close()
+        if temporary_dir:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+
+    return all(level["errors"] == 0 for level in levels)
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)
@@ -0,0 +1,142 @@
+"""
+Health Monitor
+Background probes of the database (and any other registered dependency) on an
+interval, so GET /health serves a stored snapshot instead of pinging storage
+on every load balancer check
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from database.metrics import MetricsRegistry, metrics
+
+# Seconds between probes while everything is healthy
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "5"))
+
+# Seconds between probes while degraded, so recovery is noticed quickly too
+HEALTH_RETRY_INTERVAL = float(os.getenv("HEALTH_RETRY_INTERVAL", "1"))
+
+# A probe slower than this counts as failed
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2"))
+
+# A snapshot older than this is reported degraded (the probe loop has stalled)
+HEALTH_MAX_AGE = float(os.getenv("HEALTH_MAX_AGE", str(HEALTH_PROBE_INTERVAL * 3)))
+
+# Probe result statuses that count as healthy
+HEALTHY_STATUSES = ("connected", "ok")
+
+Probe = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class HealthMonitor:
+    """
+    Periodically run registered probes and keep the latest results
+
+    A probe returns a dict with a "status"; exceptions and timeouts are
+    recorded as {"status": "error"}. The first failed probe flips the
+    snapshot to degraded, and probing then speeds up to the retry interval.
+    """
+
+    def __init__(
+        self,
+        interval: float = HEALTH_PROBE_INTERVAL,
+        retry_interval: float = HEALTH_RETRY_INTERVAL,
+        timeout: float = HEALTH_PROBE_TIMEOUT,
+        max_age: float = HEALTH_MAX_AGE,
+        registry: MetricsRegistry = metrics
+    ):
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.max_age = max_age
+        self.registry = registry
+        self.probes: Dict[str, Probe] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.checked_at: Optional[float] = None
+        self.checked_at_wall: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def register(self, name: str, probe: Probe):
+        self.probes[name] = probe
+
+    async def _probe_one(self, name: str, probe: Probe) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            result = dict(await asyncio.wait_for(probe(), self.timeout))
+        except asyncio.TimeoutError:
+            result = {"status": "error", "error": f"Probe timed out after {self.timeout:g}s"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        elapsed = time.perf_counter() - started
+
+        result["latency_ms"] = round(elapsed * 1000, 2)
+        self.registry.gauge("health_probe_latency_seconds", "Latest health probe latency", probe=name).set(elapsed)
+        if result.get("status") not in HEALTHY_STATUSES:
+            self.registry.counter("health_probe_failures_total", "Failed health probes", probe=name).inc()
+        return result
+
+    async def probe(self):
+        """Run every probe now and store the results"""
+        async with self._lock:
+            names = list(self.probes)
+            results = await asyncio.gather(*(self._probe_one(name, self.probes[name]) for name in names))
+            self.results = dict(zip(names, results))
+            self.checked_at = time.monotonic()
+            self.checked_at_wall = datetime.utcnow()
+            self.registry.gauge("health_status", "1 if the last health snapshot was healthy").set(float(self.healthy))
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last probe finished"""
+        return time.monotonic() - self.checked_at if self.checked_at is not None else None
+
+    @property
+    def healthy(self) -> bool:
+        age = self.age()
+        return (
+            age is not None and age <= self.max_age
+            and all(result.get("status") in HEALTHY_STATUSES for result in self.results.values())
+        )
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval if self.healthy else self.retry_interval)
+            try:
+                await self.probe()
+            except Exception as e:
+                print(f"❌ Health probe failed: {e}")
+
+    async def start(self):
+        """Probe once (so the first /health has data), then keep probing in the background"""
+        await self.probe()
+        if not self.running:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest results with their age"""
+        age = self.age()
+        return {
+            "status": "healthy" if self.healthy else "degraded",
+            "checked_at": self.checked_at_wall.isoformat() if self.checked_at_wall else None,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "probes": self.results,
+        }
+
+
+health_monitor = HealthMonitor()
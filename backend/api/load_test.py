@@ -0,0 +1,410 @@
+"""
+API Load Test
+Async load generator for the API: replays a weighted mix of session and
+knowledge requests at increasing concurrency and reports throughput and
+p50/p95/p99 latency per route
+
+Usage:
+    python -m api.load_test                                      # in-process app on the configured STORAGE_BACKEND
+    python -m api.load_test --stand-in --seed-sessions 50000     # in-process app on an in-memory SQLite store
+    python -m api.load_test --base-url http://localhost:8000     # a running server
+    python -m api.load_test --mix sessions.list=5,sessions.create=1 --concurrency 1,8,32
+    python -m api.load_test --compare load_test_results/<earlier run>.json
+
+In-process runs call the ASGI app directly (no sockets), so they measure the
+application and database rather than HTTP parsing. Every run is saved as JSON
+under load_test_results/ (tagged with the git commit) for later --compare.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import orjson
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database.brainwave_bands import BRAINWAVE_STATES
+from database.seed_training_data import MODULE_TYPES, SAMPLE_USERS
+from database.synthetic_workload import ZIPF_EXPONENT, synthetic_user_ids
+
+# Route name -> relative weight in the default request mix
+DEFAULT_MIX = {
+    "sessions.list": 30,
+    "sessions.filtered": 20,
+    "sessions.stats": 15,
+    "knowledge.list": 10,
+    "knowledge.recommendations": 10,
+    "sessions.create": 15,
+}
+
+DEFAULT_CONCURRENCY = [1, 4, 16, 64]
+DEFAULT_DURATION = 10.0  # Seconds per concurrency level
+
+RESULTS_DIR = "load_test_results"
+
+Request = Tuple[str, str, Dict[str, Any], Optional[Any]]  # method, path, query params, JSON body
+
+
+def build_request(route: str, rng: random.Random, user_id: str) -> Request:
+    """A randomized request for one route of the mix"""
+    if route == "sessions.list":
+        return "GET", "/api/sessions/", {"user_id": user_id, "limit": 50}, None
+
+    if route == "sessions.filtered":
+        params = {"user_id": user_id, "days": rng.choice([7, 30, 90]), "limit": 50, "view": "summary"}
+        module = rng.choice(MODULE_TYPES)
+        params["module_type"] = module
+        if module == "brainwave" and rng.random() < 0.5:
+            params["brainwave_target"] = rng.choice(list(BRAINWAVE_STATES))
+        return "GET", "/api/sessions/", params, None
+
+    if route == "sessions.stats":
+        return "GET", "/api/sessions/stats", {"user_id": user_id, "days": rng.choice([None, 30])}, None
+
+    if route == "knowledge.list":
+        return "GET", "/api/knowledge/", {"min_evidence": rng.choice([0.0, 0.7]), "limit": 20}, None
+
+    if route == "knowledge.recommendations":
+        return "GET", f"/api/knowledge/recommendations/{rng.choice(MODULE_TYPES)}", {}, None
+
+    if route == "sessions.create":
+        target = rng.choice(list(BRAINWAVE_STATES))
+        beat = round(rng.uniform(*BRAINWAVE_STATES[target]["range"]), 2)
+        params = {
+            "user_id": user_id,
+            "module_type": "brainwave",
+            "brainwave_target": target,
+            "duration_seconds": rng.randint(300, 3600),
+        }
+        return "POST", "/api/sessions/", params, {"binaural_beat_frequency": beat, "carrier_frequency": beat + 250}
+
+    raise ValueError(f"Unknown route in mix: {route}")
+
+
+class ASGIClient:
+    """Calls the ASGI app directly, without a server or sockets"""
+
+    def __init__(self, app):
+        self.app = app
+        self.target = "in-process"
+
+    async def request(self, method: str, path: str, params: Dict[str, Any], body: Optional[Any]) -> int:
+        if isinstance(body, bytes):
+            payload, content_type = body, b"application/octet-stream"
+        else:
+            payload, content_type = orjson.dumps(body) if body is not None else b"", b"application/json"
+        query = urlencode({key: value for key, value in params.items() if value is not None})
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", b"load-test"),
+                (b"content-type", content_type),
+                (b"content-length", str(len(payload)).encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("load-test", 80),
+        }
+        status = 0
+        finished = asyncio.Event()
+        delivered = False
+
+        async def receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            # Streaming responses listen for a disconnect until they finish
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                finished.set()
+
+        await self.app(scope, receive, send)
+        return status
+
+    async def close(self):
+        pass
+
+
+class HTTPClient:
+    """Drives a running server over HTTP (aiohttp)"""
+
+    def __init__(self, base_url: str, connections: int):
+        import aiohttp
+        self.base_url = base_url.rstrip("/")
+        self.target = self.base_url
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=connections))
+
+    async def request(self, method: str, path: str, params: Dict[str, Any], body: Optional[Any]) -> int:
+        query = {key: str(value) for key, value in params.items() if value is not None}
+        if isinstance(body, bytes):
+            request = self.session.request(method, self.base_url + path, params=query, data=body)
+        else:
+            request = self.session.request(method, self.base_url + path, params=query, json=body)
+        async with request as response:
+            await response.read()
+            return response.status
+
+    async def close(self):
+        await self.session.close()
+
+
+def load_test_users(count: int) -> List[str]:
+    """Demo users, or the synthetic population (see synthetic_workload.py)"""
+    return synthetic_user_ids(count) if count else list(SAMPLE_USERS)
+
+
+def latency_stats(samples: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Request count, errors, throughput and latency percentiles (ms)"""
+    stats = {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": None,
+        "p95_ms": None,
+        "p99_ms": None,
+    }
+    if len(samples) >= 2:
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+        stats.update(p50_ms=round(cuts[49] * 1000, 2), p95_ms=round(cuts[94] * 1000, 2), p99_ms=round(cuts[98] * 1000, 2))
+    return stats
+
+
+async def run_level(
+    client,
+    concurrency: int,
+    duration: float,
+    mix: Dict[str, int],
+    users: List[str],
+    seed: int
+) -> Dict[str, Dict[str, Any]]:
+    """Keep `concurrency` requests in flight for `duration` seconds"""
+    routes = list(mix)
+    route_weights = list(accumulate(mix.values()))
+    # Zipf-skewed users, like production (and the synthetic seeder)
+    user_weights = list(accumulate(1.0 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(users))))
+
+    samples: Dict[str, List[float]] = {route: [] for route in routes}
+    errors: Dict[str, int] = {route: 0 for route in routes}
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int):
+        rng = random.Random(seed * 1_000_003 + concurrency * 1009 + index)
+        while time.perf_counter() < deadline:
+            route = rng.choices(routes, cum_weights=route_weights)[0]
+            user_id = rng.choices(users, cum_weights=user_weights)[0]
+            method, path, params, body = build_request(route, rng, user_id)
+
+            started = time.perf_counter()
+            try:
+                status = await client.request(method, path, params, body)
+            except Exception:
+                status = 0
+            samples[route].append(time.perf_counter() - started)
+            if not 200 <= status < 400:
+                errors[route] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    results = {route: latency_stats(samples[route], errors[route], elapsed) for route in routes}
+    results["all"] = latency_stats(
+        [sample for route in routes for sample in samples[route]], sum(errors.values()), elapsed
+    )
+    return results
+
+
+def print_level(concurrency: int, results: Dict[str, Dict[str, Any]]):
+    print(f"\nConcurrency {concurrency}:")
+    print(f"  {'route':<28}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, stats in results.items():
+        cells = [f"{stats[key]:>10}" if stats[key] is not None else f"{'n/a':>10}" for key in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"  {route:<28}{stats['requests']:>9}{stats['errors']:>8}{stats['rps']:>10}" + "".join(cells))
+
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checked-out commit (None outside a git checkout)"""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        return output.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(run: Dict[str, Any], output: Optional[str]) -> str:
+    """Write a run to JSON and return the path"""
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{run['commit'] or 'nogit'}.json")
+    with open(output, "w") as handle:
+        json.dump(run, handle, indent=2)
+    return output
+
+
+def percent_change(old: Optional[float], new: Optional[float]) -> str:
+    if not old or new is None:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def print_comparison(previous: Dict[str, Any], current: Dict[str, Any]):
+    """req/s and p95/p99 change per route for concurrency levels both runs share"""
+    print(f"\nCompared with {previous.get('commit') or 'unknown commit'} ({previous.get('created_at')}):")
+    earlier = {level["concurrency"]: level["routes"] for level in previous.get("levels", [])}
+
+    for level in current["levels"]:
+        before = earlier.get(level["concurrency"])
+        if not before:
+            continue
+        print(f"  Concurrency {level['concurrency']}:")
+        for route, stats in level["routes"].items():
+            old = before.get(route)
+            if not old:
+                continue
+            print(
+                f"    {route:<28} req/s {percent_change(old['rps'], stats['rps']):>6}  "
+                f"p95 {percent_change(old['p95_ms'], stats['p95_ms']):>6}  "
+                f"p99 {percent_change(old['p99_ms'], stats['p99_ms']):>6}"
+            )
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """"route=weight,route=weight" -> {route: weight}"""
+    mix = {}
+    for part in value.split(","):
+        route, _, weight = part.partition("=")
+        if route.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown route {route!r} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[route.strip()] = int(weight or 1)
+    return mix
+
+
+async def seed_stand_in(sessions: int, users: int, seed: int):
+    """Fill the in-memory stand-in with synthetic sessions and the knowledge base (rollups maintained on insert)"""
+    from database.knowledge_cache import knowledge_cache
+    from database.repository import repository
+    from database.seed_training_data import seed_brain_knowledge, stream_training_sessions
+    from database.synthetic_workload import SyntheticWorkload
+
+    await seed_brain_knowledge()
+    await knowledge_cache.load()
+    workload = SyntheticWorkload(users, seed)
+    await stream_training_sessions(sessions, documents=workload.generate(sessions), insert_many=repository.insert_sessions)
+
+
+async def main():
+    """Run the load test at each concurrency level"""
+    parser = argparse.ArgumentParser(description="Load test the Brain Buddy API")
+    parser.add_argument("--base-url", default=None, help="Drive a running server instead of the in-process app")
+    parser.add_argument(
+        "--stand-in",
+        action="store_true",
+        help="In-process app on an in-memory embedded store (STORAGE_BACKEND=sqlite, SQLITE_PATH=:memory:)"
+    )
+    parser.add_argument("--seed-sessions", type=int, default=0, help="Synthetic sessions to load into the stand-in")
+    parser.add_argument("--users", type=int, default=0, help="Synthetic users to spread requests over (0: demo users)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="route=weight,... (default: all routes)")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=DEFAULT_CONCURRENCY,
+        help="Comma-separated concurrency levels"
+    )
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="Seconds per concurrency level")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed for the request sequence")
+    parser.add_argument("--output", default=None, help=f"Results file (default {RESULTS_DIR}/<time>-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    if args.seed_sessions and not args.stand_in:
+        print("❌ --seed-sessions only seeds the in-memory stand-in (use seed_training_data.py for a real database)")
+        return False
+    if args.seed_sessions and not args.users:
+        args.users = 1000  # Requests must target the seeded synthetic users
+
+    users = load_test_users(args.users)
+    levels = []
+
+    if args.base_url:
+        client = HTTPClient(args.base_url, max(args.concurrency))
+        lifespan = None
+    else:
+        if args.stand_in:
+            # Must be set before the repository is first imported
+            os.environ["STORAGE_BACKEND"] = "sqlite"
+            os.environ["SQLITE_PATH"] = ":memory:"
+
+        from api.main import app
+        client = ASGIClient(app)
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+        if args.seed_sessions:
+            await seed_stand_in(args.seed_sessions, args.users, args.seed)
+
+    print(f"\nLoad testing {client.target} for {args.duration:.0f}s per level, mix: "
+          + ", ".join(f"{route}={weight}" for route, weight in args.mix.items()))
+
+    try:
+        for concurrency in args.concurrency:
+            results = await run_level(client, concurrency, args.duration, args.mix, users, args.seed)
+            print_level(concurrency, results)
+            levels.append({"concurrency": concurrency, "duration": args.duration, "routes": results})
+    finally:
+        await client.close()
+        if lifespan:
+            await lifespan.__aexit__(None, None, None)
+
+    run = {
+        "commit": git_commit(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "target": "stand-in" if args.stand_in else client.target,
+        "config": {
+            "mix": args.mix,
+            "users": args.users,
+            "seed": args.seed,
+            "seed_sessions": args.seed_sessions,
+            "backend": None if args.base_url else os.getenv("STORAGE_BACKEND", "mongodb"),
+        },
+        "levels": levels,
+    }
+    path = save_results(run, args.output)
+    print(f"\n✓ Results saved to {path}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            print_comparison(json.load(handle), run)
+
+    return all(level["routes"]["all"]["errors"] == 0 for level in levels)
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)
@@ -3,37 +3,69 @@ Brain Buddy Backend API
 Main FastAPI application entry point
 """
 
-from fastapi import FastAPI
+# First, so the import phase of the startup profile covers everything below
+from api.startup import FirstRequestMiddleware, startup_profile
+
+from fastapi import FastAPI, Query
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 
 # Import database functions
-from database.models import init_db, close_db, get_db_status
+from database.repository import repository
+from database.knowledge_cache import knowledge_cache
+from database.ratings import rating_coalescer
+from database.monitoring import driver_metrics_summary
+from api.conditional import conditional_stats
+from api.health import health_monitor
+from api.metrics import MetricsMiddleware, PROMETHEUS_CONTENT_TYPE, render_prometheus
 
 # Import routers
-from api.routes import sessions, knowledge
+from api.routes import sessions, knowledge, music, eeg
 
 load_dotenv()
 
+startup_profile.record("imports", startup_profile.elapsed())
+
+async def audio_renderer_status():
+    # Lazy: the renderer module is only imported once something probes or uses it
+    from api.audio import audio_store
+    return await audio_store.status()
+
+def register_health_probes():
+    """Dependencies whose status /health reports"""
+    health_monitor.register("database", repository.status)
+    health_monitor.register("audio_renderer", audio_renderer_status)
+    health_monitor.register("ratings", rating_coalescer.status)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     # Startup
     print("🧠 Brain Buddy API starting...")
     try:
-        await init_db()
-        print("✅ Database initialized")
+        with startup_profile.phase("database"):
+            await repository.connect()
+        print(f"✅ Database initialized ({repository.backend})")
+        with startup_profile.phase("knowledge_cache"):
+            await knowledge_cache.load()
+        print(f"✅ Knowledge cache loaded (version {knowledge_cache.version})")
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
     # TODO: Load pre-trained AI models
+    register_health_probes()
+    await health_monitor.start()
+    startup_profile.ready()
     
     yield
     
     # Shutdown
     print("🧠 Brain Buddy API shutting down...")
-    await close_db()
+    await health_monitor.stop()
+    await rating_coalescer.close()
+    await repository.close()
     # TODO: Save model states
 
 app = FastAPI(
@@ -55,8 +87,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+app.add_middleware(FirstRequestMiddleware)
+# Per-route request metrics. Added last, so it is outermost: CORS preflights
+# and the first request's cold start are counted too
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -67,19 +105,46 @@ async def root():
     }
 
 @app.get("/health")
-async def health_check():
-    """Detailed health check"""
-    db_status = await get_db_status()
+async def health_check(
+    verbose: bool = Query(False, description="Also include the startup profile and driver pool metrics")
+):
+    """
+    Detailed health check (served from the background probe snapshot)
+
+    Load balancers poll this, so the startup profile and driver metrics are
+    only included with `?verbose=1` (they are always in /metrics).
+    """
+    if not health_monitor.running:
+        # No background probing (the lifespan did not run): probe inline
+        register_health_probes()
+        await health_monitor.probe()
+    snapshot = health_monitor.snapshot()
     
-    return {
-        "status": "healthy" if db_status["status"] == "connected" else "degraded",
-        "database": db_status,
-        "ai_models": "not_loaded"  # TODO: Actual model check
+    health = {
+        "status": snapshot["status"],
+        "database": snapshot["probes"].get("database"),
+        "audio_renderer": snapshot["probes"].get("audio_renderer"),
+        "ratings": snapshot["probes"].get("ratings"),
+        "checked_at": snapshot["checked_at"],
+        "age_seconds": snapshot["age_seconds"],
+        "ai_models": "not_loaded",  # TODO: Actual model check
+        "conditional_requests": conditional_stats.snapshot(),
     }
+    if verbose:
+        health["startup"] = startup_profile.snapshot()
+        health["database_driver"] = driver_metrics_summary()
+    return health
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request and database driver metrics in Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 # Include API routers
 app.include_router(sessions.router, prefix="/api/sessions", tags=["Training Sessions"])
 app.include_router(knowledge.router, prefix="/api/knowledge", tags=["Brain Knowledge"])
+app.include_router(music.router, prefix="/api/music", tags=["Music"])
+app.include_router(eeg.router, prefix="/api/eeg-data", tags=["EEG Data"])
 
 # TODO: Additional routers
 # app.include_router(users.router, prefix="/api/users", tags=["users"])
@@ -0,0 +1,115 @@
+"""
+Request Metrics
+Pure ASGI middleware recording per-route request counts, status codes, in-flight
+requests and latency histograms, rendered in Prometheus text format at /metrics
+"""
+
+import time
+from typing import Dict, Tuple
+
+from database.metrics import Counter, Histogram, MetricsRegistry, metrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Label for requests that matched no route, so 404 scans can't explode cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Record every HTTP request against its templated route path
+
+    Routes are labelled by their path template ("/api/sessions/{session_id}"),
+    read from the route FastAPI stores in the scope while routing. Metric
+    objects are cached per label set so the per-request cost is two
+    perf_counter calls and a few dict lookups.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+        self.in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+        self._requests: Dict[Tuple[str, str, str], Counter] = {}
+        self._durations: Dict[Tuple[str, str], Histogram] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path_format", None) or UNMATCHED_ROUTE
+            self._record(scope["method"], path, status[0], elapsed)
+
+    def _record(self, method: str, route: str, status: int, elapsed: float):
+        key = (method, route, str(status))
+        counter = self._requests.get(key)
+        if counter is None:
+            counter = self._requests[key] = self.registry.counter(
+                "http_requests_total",
+                "HTTP requests by route and status code",
+                method=method, route=route, status=key[2]
+            )
+        counter.inc()
+
+        histogram = self._durations.get(key[:2])
+        if histogram is None:
+            histogram = self._durations[key[:2]] = self.registry.histogram(
+                "http_request_duration_seconds",
+                "HTTP request latency by route",
+                method=method, route=route
+            )
+        histogram.observe(elapsed)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_prometheus(registry: MetricsRegistry = metrics) -> str:
+    """Render every metric family in Prometheus text exposition format"""
+    lines = []
+    for name, family in sorted(list(registry.families.items())):
+        lines.append(f"# HELP {name} {family.help}")
+        lines.append(f"# TYPE {name} {family.kind}")
+
+        for key, metric in sorted(list(family.series.items())):
+            if family.kind != "histogram":
+                lines.append(f"{name}{_labels(key)} {_number(metric.value)}")
+                continue
+
+            for bound, count in metric.cumulative():
+                lines.append(f"{name}_bucket{_labels(key + (('le', _number(bound)),))} {count}")
+            lines.append(f"{name}_sum{_labels(key)} {repr(metric.sum)}")
+            lines.append(f"{name}_count{_labels(key)} {metric.count}")
+
+    lines.append("")
+    return "\n".join(lines)
@@ -0,0 +1,39 @@
+"""
+NDJSON Streaming
+Helpers for newline-delimited JSON request bodies
+"""
+
+from typing import AsyncIterator, Tuple
+
+from fastapi import HTTPException, Request
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Longest single row accepted before the upload is rejected
+MAX_LINE_BYTES = 1024 * 1024
+
+
+async def iter_ndjson_lines(request: Request, max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Yield (line_number, line) pairs from a streamed request body
+
+    Lines are split as chunks arrive, so memory stays bounded by one chunk plus
+    one row. Blank lines are skipped but still counted.
+    """
+    buffer = b""
+    line_number = 0
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+
+        if len(buffer) > max_line_bytes:
+            raise HTTPException(status_code=413, detail=f"Line {line_number + 1} exceeds {max_line_bytes} bytes")
+
+    if buffer.strip():
+        yield line_number + 1, buffer
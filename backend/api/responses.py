@@ -0,0 +1,55 @@
+"""
+Fast JSON Responses
+Serialize raw MongoDB documents with orjson, bypassing response_model validation,
+and answer conditional (If-None-Match) requests
+"""
+
+from typing import Any, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+import orjson
+
+
+def _default(value: Any) -> Any:
+    """Fallback encoder for BSON types orjson doesn't know"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson-backed response for payloads built from raw Motor documents
+
+    Returning a Response from a route skips FastAPI's response_model
+    validation, so routes keep their response_model for the OpenAPI schema
+    while the body is rendered straight from dicts.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def parse_object_id(value: str) -> Optional[ObjectId]:
+    """Parse a path parameter as an ObjectId (None if malformed)"""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match already names this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the current ETag"""
+    return Response(status_code=304, headers={"ETag": etag})
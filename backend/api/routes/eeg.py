@@ -0,0 +1,144 @@
+"""
+EEG Data API Routes
+Binary EEG ingestion into per-session sample files
+"""
+
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Path, Query, Request
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+router = APIRouter()
+
+EEG_MEDIA_TYPE = "application/octet-stream"
+
+
+class EEGSessionInfo(BaseModel):
+    """Stored EEG layout and totals for a session"""
+    format: str  # float32 or int16
+    channels: int
+    sample_rate: float
+    scale: float  # Microvolts per stored unit
+    created_at: str
+    total_samples: int  # Per channel
+    seconds: float
+
+
+class EEGIngestResult(EEGSessionInfo):
+    """Outcome of one upload"""
+    session_id: str
+    frames: int
+    appended_samples: int
+
+
+class BandPowerResponse(BaseModel):
+    """Welch band powers over the latest window of a session's EEG"""
+    session_id: str
+    channels: int
+    sample_rate: float
+    window_seconds: float
+    segment_seconds: float
+    total_samples: int
+    samples_processed: int  # By this worker's engine for the session
+    segments: int  # Welch segments averaged (fewer until a full window has arrived)
+    bands: List[str]
+    absolute: Optional[Dict[str, float]] = None  # µV² per band, averaged over channels
+    relative: Optional[Dict[str, float]] = None  # Share of total power (BrainwaveState shape)
+    dominant: Optional[str] = None
+    per_channel: Optional[List[Dict[str, float]]] = None  # Relative powers per channel
+
+
+def check_session_id(session_id: str) -> str:
+    from database.eeg_store import SESSION_ID_PATTERN
+
+    if not SESSION_ID_PATTERN.match(session_id):
+        raise HTTPException(status_code=400, detail="session_id must be 1-64 letters, digits, '_' or '-'")
+    return session_id
+
+
+@router.post(
+    "/",
+    response_model=EEGIngestResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {EEG_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+async def ingest_eeg(
+    request: Request,
+    session_id: str = Query(..., description="Training session the samples belong to")
+):
+    """
+    Append framed binary EEG samples to a session
+
+    The body is one or more frames (see database/eeg_store.py): a 20-byte
+    header with format (float32/int16), channel count, sample rate, scale and
+    sample count, followed by interleaved samples. Payloads are parsed
+    zero-copy with np.frombuffer and appended to the session's sample file.
+    A malformed upload stores nothing.
+    """
+    # NumPy loads with the first upload, not at API startup
+    from database.eeg_store import EEG_MAX_BODY_BYTES, FormatConflict, FrameError, eeg_store, parse_frames
+
+    check_session_id(session_id)
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > EEG_MAX_BODY_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {EEG_MAX_BODY_BYTES} bytes")
+
+    # Chunked uploads carry no Content-Length; stop reading once over the limit
+    chunks = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > EEG_MAX_BODY_BYTES:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds {EEG_MAX_BODY_BYTES} bytes")
+        chunks.append(chunk)
+    body = b"".join(chunks)
+
+    try:
+        frames = parse_frames(body)
+        result = await asyncio.to_thread(eeg_store.append, session_id, frames)
+    except FormatConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except FrameError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"session_id": session_id, "frames": len(frames), **result}
+
+
+@router.get("/{session_id}", response_model=EEGSessionInfo)
+async def get_eeg_info(session_id: str = Path(..., description="Training session ID")):
+    """Stored EEG layout, sample count and duration for a session"""
+    from database.eeg_store import eeg_store
+
+    info = eeg_store.info(check_session_id(session_id))
+    if info is None:
+        raise HTTPException(status_code=404, detail="No EEG data for this session")
+    return info
+
+
+@router.get("/{session_id}/band-power", response_model=BandPowerResponse)
+async def get_band_power(
+    session_id: str = Path(..., description="Training session ID"),
+    window_seconds: Optional[float] = Query(
+        None, gt=0, le=300, description="Seconds averaged into the estimate (default BAND_POWER_WINDOW_SECONDS)"
+    ),
+    per_channel: bool = Query(False, description="Include relative band powers for every channel")
+):
+    """
+    Delta/theta/alpha/beta/gamma power over the latest window of stored EEG
+
+    Uses Welch's method with the BRAINWAVE_STATES band edges. Repeated polls
+    only process samples uploaded since the previous poll.
+    """
+    from database.band_power import BAND_POWER_WINDOW_SECONDS, session_band_power
+
+    result = await session_band_power.get(
+        check_session_id(session_id), window_seconds or BAND_POWER_WINDOW_SECONDS, per_channel
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="No EEG data for this session")
+    return result
@@ -3,11 +3,14 @@ Brain Knowledge API Routes
 Endpoints for scientific knowledge base
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Path, Query, Request
 from typing import List, Optional
 from pydantic import BaseModel
 
-from database.models import BrainKnowledge
+from api.conditional import check_not_modified
+from api.responses import FastJSONResponse
+from database.knowledge_cache import knowledge_cache
+from database.queries import MODULE_TO_STIMULUS
 
 router = APIRouter()
 
@@ -35,8 +38,24 @@ class BrainKnowledgeResponse(BaseModel):
         }
 
 
+def knowledge_document_to_response(document: dict) -> dict:
+    """Map a raw brain_knowledge document to the BrainKnowledgeResponse JSON shape"""
+    return {
+        "id": str(document["_id"]),
+        "stimulus_type": document["stimulus_type"],
+        "stimulus_parameters": document.get("stimulus_parameters") or {},
+        "outcome": document["outcome"],
+        "evidence_strength": float(document["evidence_strength"]),
+        "citations": [
+            {field: citation.get(field) for field in Citation.model_fields}
+            for citation in document.get("citations") or []
+        ],
+    }
+
+
 @router.get("/", response_model=List[BrainKnowledgeResponse])
 async def get_brain_knowledge(
+    request: Request,
     stimulus_type: Optional[str] = Query(None, description="Filter by stimulus type"),
     outcome: Optional[str] = Query(None, description="Filter by outcome"),
     min_evidence: Optional[float] = Query(None, ge=0.0, le=1.0, description="Minimum evidence strength"),
@@ -49,91 +68,77 @@ async def get_brain_knowledge(
     - **outcome**: Filter by outcome (increased_focus, reduced_anxiety, etc.)
     - **min_evidence**: Only return entries with evidence strength >= this value
     - **limit**: Maximum results (default 50, max 100)
-    """
-    query = {}
-    
-    if stimulus_type:
-        query["stimulus_type"] = stimulus_type
     
-    if outcome:
-        query["outcome"] = outcome
+    Served from the in-process knowledge cache; send the returned `ETag` back
+    in `If-None-Match` to get a 304 when nothing changed.
+    """
+    await knowledge_cache.refresh()
     
-    if min_evidence is not None:
-        query["evidence_strength"] = {"$gte": min_evidence}
+    not_modified = check_not_modified(request, "knowledge.list", knowledge_cache.etag)
+    if not_modified:
+        return not_modified
     
-    knowledge_entries = await BrainKnowledge.find(query).sort("-evidence_strength").limit(limit).to_list()
+    documents = knowledge_cache.query(stimulus_type, outcome, min_evidence, limit)
     
-    return [
-        BrainKnowledgeResponse(
-            id=str(entry.id),
-            stimulus_type=entry.stimulus_type,
-            stimulus_parameters=entry.stimulus_parameters,
-            outcome=entry.outcome,
-            evidence_strength=entry.evidence_strength,
-            citations=[Citation(**citation) for citation in entry.citations]
-        )
-        for entry in knowledge_entries
-    ]
+    return FastJSONResponse(
+        [knowledge_document_to_response(document) for document in documents],
+        headers={"ETag": knowledge_cache.etag}
+    )
 
 
 @router.get("/{knowledge_id}", response_model=BrainKnowledgeResponse)
-async def get_knowledge_by_id(knowledge_id: str):
+async def get_knowledge_by_id(knowledge_id: str, request: Request):
     """
     Get a specific knowledge entry by ID
     
     - **knowledge_id**: MongoDB ObjectId of the knowledge entry
     """
-    entry = await BrainKnowledge.get(knowledge_id)
+    await knowledge_cache.refresh()
+    document = knowledge_cache.get(knowledge_id)
     
-    if not entry:
+    if not document:
         raise HTTPException(status_code=404, detail="Knowledge entry not found")
     
-    return BrainKnowledgeResponse(
-        id=str(entry.id),
-        stimulus_type=entry.stimulus_type,
-        stimulus_parameters=entry.stimulus_parameters,
-        outcome=entry.outcome,
-        evidence_strength=entry.evidence_strength,
-        citations=[Citation(**citation) for citation in entry.citations]
-    )
+    not_modified = check_not_modified(request, "knowledge.get", knowledge_cache.etag)
+    if not_modified:
+        return not_modified
+    
+    return FastJSONResponse(knowledge_document_to_response(document), headers={"ETag": knowledge_cache.etag})
 
 
 @router.get("/recommendations/{module_type}")
 async def get_module_recommendations(
-    module_type: str = Query(..., description="Module type to get recommendations for")
+    request: Request,
+    module_type: str = Path(..., description="Module type to get recommendations for")
 ):
     """
     Get scientifically-backed recommendations for a specific training module
     
     - **module_type**: movers, pfc_gym, mental_rehearsal, or brainwave
     """
-    # Map module types to relevant stimulus types
-    module_to_stimulus = {
-        "movers": ["meditation", "breathwork"],
-        "pfc_gym": ["breathwork", "neurofeedback"],
-        "mental_rehearsal": ["mental_rehearsal", "visualization"],
-        "brainwave": ["binaural_beats", "gamma_entrainment", "neurofeedback"]
-    }
-    
-    if module_type not in module_to_stimulus:
+    if module_type not in MODULE_TO_STIMULUS:
         raise HTTPException(status_code=400, detail="Invalid module_type")
     
-    relevant_stimuli = module_to_stimulus[module_type]
+    relevant_stimuli = MODULE_TO_STIMULUS[module_type]
     
-    knowledge_entries = await BrainKnowledge.find(
-        {"stimulus_type": {"$in": relevant_stimuli}}
-    ).sort("-evidence_strength").to_list()
+    await knowledge_cache.refresh()
     
-    return {
+    not_modified = check_not_modified(request, "knowledge.recommendations", knowledge_cache.etag)
+    if not_modified:
+        return not_modified
+    
+    documents = knowledge_cache.for_stimuli(relevant_stimuli)
+    
+    return FastJSONResponse({
         "module_type": module_type,
         "recommendations": [
             {
-                "stimulus_type": entry.stimulus_type,
-                "outcome": entry.outcome,
-                "evidence_strength": entry.evidence_strength,
-                "parameters": entry.stimulus_parameters,
-                "key_citation": entry.citations[0] if entry.citations else None
+                "stimulus_type": document["stimulus_type"],
+                "outcome": document["outcome"],
+                "evidence_strength": document["evidence_strength"],
+                "parameters": document.get("stimulus_parameters") or {},
+                "key_citation": document["citations"][0] if document.get("citations") else None
             }
-            for entry in knowledge_entries
+            for document in documents
         ]
-    }
+    }, headers={"ETag": knowledge_cache.etag})
@@ -0,0 +1,167 @@
+"""
+Music API Routes
+Render entrainment tracks and serve them with HTTP Range support
+"""
+
+from fastapi import APIRouter, HTTPException, Path, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from api.conditional import check_not_modified
+from api.responses import parse_object_id
+from database.metrics import metrics
+from database.repository import repository
+
+router = APIRouter()
+
+# Rendered files never change for an id, so clients and CDNs may keep them
+AUDIO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class MusicCreate(BaseModel):
+    """Request to render (or reuse) a track"""
+    user_id: str
+    session_id: Optional[str] = None  # Defaults parameters/target/duration from a stored session
+    target_state: Optional[str] = None  # Brainwave band or frontend target (focus, calm, relax, energize, sleep)
+    parameters: dict = Field(default_factory=dict)
+    duration: Optional[float] = None  # Seconds
+    model_version: Optional[str] = None
+
+
+class MusicResponse(BaseModel):
+    """A rendered track and where to fetch it"""
+    id: str
+    url: str
+    band: Optional[str] = None
+    parameters: dict
+    duration: float
+    sample_rate: int
+    channels: int
+    bytes: int
+    rendered: bool  # False when an identical track was already on disk
+
+
+def audio_etag(music_id: str) -> str:
+    return f'"music-{music_id}"'
+
+
+@router.post("/", response_model=MusicResponse)
+async def create_music(request: MusicCreate):
+    """
+    Render a track for a target state and/or explicit parameters
+
+    Identical parameters map to the same id, so repeated requests reuse the
+    rendered file. With session_id, the session's generated_content,
+    brainwave_target and duration_seconds fill in whatever is not given.
+    """
+    # Lazy, like the EEG routes: keeps the renderer out of worker startup
+    from api.audio import CHANNELS, audio_store, render_spec
+
+    parameters = dict(request.parameters)
+    target_state = request.target_state
+    duration = request.duration
+
+    if request.session_id:
+        object_id = parse_object_id(request.session_id)
+        session = await repository.get_session(object_id) if object_id else None
+        if not session or session.get("user_id") != request.user_id:
+            raise HTTPException(status_code=404, detail="Session not found")
+        parameters = {**(session.get("generated_content") or {}), **parameters}
+        target_state = target_state or session.get("brainwave_target")
+        duration = duration or session.get("duration_seconds")
+
+    try:
+        spec = render_spec(target_state, parameters, duration or 300)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    music_id, rendered = await audio_store.render(spec)
+    mapped = audio_store.open(music_id)
+    if mapped is None:
+        raise HTTPException(status_code=500, detail="Rendered track is missing")
+
+    return {
+        "id": music_id,
+        "url": f"/api/music/{music_id}",
+        "band": spec["band"],
+        "parameters": {name: spec[name] for name in (
+            "binaural_beat_frequency", "carrier_frequency", "modulation_depth", "pink_noise_level", "volume"
+        )},
+        "duration": spec["duration"],
+        "sample_rate": spec["sample_rate"],
+        "channels": CHANNELS,
+        "bytes": len(mapped),
+        "rendered": rendered,
+    }
+
+
+@router.get("/{music_id}")
+@router.head("/{music_id}", include_in_schema=False)
+async def get_music(
+    request: Request,
+    music_id: str = Path(..., description="Track id returned by POST /api/music")
+):
+    """
+    Stream a rendered track (audio/wav), honouring single byte Range requests
+
+    Responses are 206 with Content-Range for a satisfiable range, 416 past
+    the end, and 200 with the whole file otherwise (including several
+    ranges, or an If-Range that no longer matches).
+    """
+    from api.audio import (
+        AUDIO_STREAM_CHUNK,
+        MUSIC_ID_PATTERN,
+        RangeNotSatisfiable,
+        audio_store,
+        iter_range,
+        parse_range,
+        read_range,
+    )
+
+    mapped = audio_store.open(music_id) if MUSIC_ID_PATTERN.match(music_id) else None
+    if mapped is None:
+        raise HTTPException(status_code=404, detail="Track not found")
+
+    etag = audio_etag(music_id)
+    not_modified = check_not_modified(request, "music.get", etag)
+    if not_modified:
+        return not_modified
+
+    size = len(mapped)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Cache-Control": AUDIO_CACHE_CONTROL,
+    }
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        metrics.counter("audio_requests_total", "Audio requests by outcome", outcome="not_satisfiable").inc()
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        start, end = 0, size - 1
+        status_code = 200
+    headers["Content-Length"] = str(end - start + 1)
+    metrics.counter(
+        "audio_requests_total", "Audio requests by outcome", outcome="partial" if byte_range else "full"
+    ).inc()
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type="audio/wav")
+    if end - start < AUDIO_STREAM_CHUNK:
+        return Response(read_range(mapped, start, end), status_code=status_code, headers=headers, media_type="audio/wav")
+    return StreamingResponse(
+        iter_range(mapped, start, end), status_code=status_code, headers=headers, media_type="audio/wav"
+    )
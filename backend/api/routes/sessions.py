@@ -3,15 +3,31 @@ Training Sessions API Routes
 Endpoints for managing and retrieving training sessions
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
-from datetime import datetime, timedelta
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Dict, List, Optional, Tuple, Type
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, create_model, model_validator
+from bson import ObjectId
+import os
 
-from database.models import TrainingSession
+from api.conditional import check_not_modified, get_user_version_stamp, user_sessions_etag
+from api.ndjson import NDJSON_MEDIA_TYPE, iter_ndjson_lines
+from api.responses import FastJSONResponse, parse_object_id
+from database.queries import apply_session_cursor, build_session_query, encode_session_cursor
+from database.ratings import rating_coalescer
+from database.repository import repository
+from database.session_export import iter_session_export
+from database.session_store import bucket_day
+from database.session_stats import empty_rollup
 
 router = APIRouter()
 
+# Rows per insert_many during bulk NDJSON ingestion
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+
 
 class TrainingSessionResponse(BaseModel):
     """Response model for training sessions"""
@@ -31,6 +47,61 @@ class TrainingSessionResponse(BaseModel):
         }
 
 
+class TrainingSessionSummary(BaseModel):
+    """Slim listing row for dashboards (no generated_content)"""
+    id: str
+    module_type: str
+    brainwave_target: Optional[str] = None
+    user_rating: Optional[int] = None
+    effectiveness_score: Optional[float] = None
+    timestamp: datetime
+    duration_seconds: Optional[int] = None
+
+
+class TrainingSessionCreate(BaseModel):
+    """One row of a bulk NDJSON upload"""
+    user_id: str
+    module_type: str
+    brainwave_target: Optional[str] = None
+    generated_content: dict = Field(default_factory=dict)
+    user_rating: Optional[int] = Field(None, ge=1, le=5)
+    effectiveness_score: Optional[float] = Field(None, ge=0.0, le=1.0)
+    timestamp: Optional[datetime] = None  # When the session happened (defaults to upload time)
+    duration_seconds: Optional[int] = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def check_module(self):
+        if self.module_type not in ["movers", "pfc_gym", "mental_rehearsal", "brainwave"]:
+            raise ValueError("Invalid module_type")
+        if self.module_type == "brainwave" and not self.brainwave_target:
+            raise ValueError("brainwave_target required for brainwave module")
+        if self.brainwave_target and self.brainwave_target not in ["delta", "theta", "alpha", "beta", "gamma"]:
+            raise ValueError("Invalid brainwave_target")
+        return self
+
+    def to_document(self) -> dict:
+        """Raw sessions document with a client-side _id"""
+        timestamp = self.timestamp or datetime.utcnow()
+        if timestamp.tzinfo:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        return {"_id": ObjectId(), **self.model_dump(exclude={"timestamp"}), "timestamp": timestamp}
+
+
+class BulkRowResult(BaseModel):
+    """Outcome of one NDJSON line"""
+    line: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkIngestResult(BaseModel):
+    """Summary of a bulk NDJSON upload"""
+    received: int
+    inserted: int
+    failed: int
+    results: List[BulkRowResult]
+
+
 class SessionStats(BaseModel):
     """Statistics about user's training sessions"""
     total_sessions: int
@@ -41,85 +112,257 @@ class SessionStats(BaseModel):
     recent_sessions: int  # Last 7 days
 
 
+class TrendDay(BaseModel):
+    """One day of a user's training trend"""
+    date: str  # YYYY-MM-DD (UTC)
+    sessions: int
+    minutes: float
+    minutes_by_module: dict
+    average_effectiveness: Optional[float] = None
+    average_rating: Optional[float] = None
+    rolling_effectiveness: Optional[float] = None  # Over the trailing `window` days
+
+
+class SessionTrends(BaseModel):
+    """Daily training trend for a user"""
+    user_id: str
+    days: int
+    window: int
+    total_sessions: int
+    total_minutes: float
+    minutes_by_module: dict
+    daily: List[TrendDay]
+
+
+class ParameterBin(BaseModel):
+    """Outcome statistics for sessions whose parameter falls in [low, high) (low == high: one setting)"""
+    low: Optional[float] = None
+    high: Optional[float] = None
+    sessions: int
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    high_rate: Optional[float] = None  # Share of sessions with a high outcome
+
+
+class ParameterEffect(BaseModel):
+    """How one generated_content parameter relates to one outcome"""
+    sessions: int
+    pearson: Optional[float] = None
+    spearman: Optional[float] = None
+    spread: Optional[float] = None  # Best minus worst bin mean
+    bins: List[ParameterBin]
+
+
+class TargetEffects(BaseModel):
+    """Parameter effects for one brainwave target"""
+    sessions: int
+    parameters: Dict[str, Dict[str, ParameterEffect]]  # parameter -> outcome -> effect
+
+
+class ParameterEffectiveness(BaseModel):
+    """Parameter-effectiveness analysis over all brainwave sessions"""
+    generated_at: datetime
+    age_seconds: float
+    sessions_analyzed: int
+    bins: int
+    targets: Dict[str, TargetEffects]
+
+
+def session_document_to_response(document: dict) -> dict:
+    """Map a raw sessions document to the TrainingSessionResponse JSON shape"""
+    effectiveness_score = document.get("effectiveness_score")
+    return {
+        "id": str(document["_id"]),
+        "user_id": document["user_id"],
+        "module_type": document["module_type"],
+        "brainwave_target": document.get("brainwave_target"),
+        "generated_content": document.get("generated_content") or {},
+        "user_rating": document.get("user_rating"),
+        "effectiveness_score": float(effectiveness_score) if effectiveness_score is not None else None,
+        "timestamp": document["timestamp"],
+        "duration_seconds": document.get("duration_seconds"),
+    }
+
+
+@lru_cache(maxsize=64)
+def session_projection_model(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Build (and cache) a response model holding only the requested fields"""
+    definitions = {}
+    for name in fields:
+        field = TrainingSessionResponse.model_fields[name]
+        definitions[name] = (field.annotation, field.default if not field.is_required() else ...)
+    return create_model("TrainingSessionProjection", id=(str, ...), **definitions)
+
+
+@lru_cache(maxsize=64)
+def session_list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """Cached JSON serializer for a list of projection rows"""
+    return TypeAdapter(List[model])
+
+
+def parse_session_fields(fields: str) -> Tuple[str, ...]:
+    """Validate a comma-separated fields= parameter; id and timestamp are always kept"""
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(TrainingSessionResponse.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    requested.add("timestamp")
+    requested.discard("id")
+    
+    # Keep declaration order so equivalent requests share one cached model
+    return tuple(name for name in TrainingSessionResponse.model_fields if name in requested)
+
+
+async def list_session_projection(
+    model: Type[BaseModel],
+    query: dict,
+    skip: int,
+    limit: int,
+    headers: Optional[dict] = None
+) -> Response:
+    """
+    List sessions with the projection pushed into storage
+    
+    Rows are built with model_construct (stored documents are trusted, not
+    re-validated) and serialized by pydantic-core, skipping the Beanie
+    document and full response model. A field missing from a document is
+    returned as null rather than failing the whole page.
+    """
+    projection = {name: 1 for name in model.model_fields if name != "id"}
+    
+    documents = await repository.find_sessions(query, projection, skip, limit)
+    
+    rows = [
+        model.model_construct(id=str(document["_id"]), **{name: document.get(name) for name in projection})
+        for document in documents
+    ]
+    
+    response = Response(
+        # warnings=False: a null in a non-optional field is sent as-is
+        content=session_list_adapter(model).dump_json(rows, warnings=False),
+        media_type="application/json",
+        headers=headers
+    )
+    
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_session_cursor(rows[-1].timestamp, rows[-1].id)
+    
+    return response
+
+
 @router.get("/", response_model=List[TrainingSessionResponse])
 async def get_training_sessions(
+    request: Request,
     user_id: Optional[str] = Query(None, description="Filter by user ID"),
     module_type: Optional[str] = Query(None, description="Filter by module type (movers, pfc_gym, mental_rehearsal, brainwave)"),
     brainwave_target: Optional[str] = Query(None, description="Filter by brainwave target (delta, theta, alpha, beta, gamma)"),
     days: Optional[int] = Query(None, description="Only return sessions from last N days"),
     limit: int = Query(100, ge=1, le=500, description="Maximum number of sessions to return"),
-    skip: int = Query(0, ge=0, description="Number of sessions to skip")
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    skip: int = Query(0, ge=0, description="Number of sessions to skip (deprecated, use cursor)"),
+    view: str = Query("full", description="full, or summary for timestamp/module/brainwave/rating/duration only"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id and timestamp always included)")
 ):
     """
     Retrieve training sessions with optional filters
     
+    Pages are returned newest first. When more results may follow, the
+    `X-Next-Cursor` response header holds a cursor for the next page; every
+    page costs the same regardless of depth, unlike `skip`.
+    
     - **user_id**: Filter by specific user
     - **module_type**: Filter by training module
     - **brainwave_target**: Filter by target brainwave state
     - **days**: Only return sessions from last N days
     - **limit**: Maximum results (default 100, max 500)
-    - **skip**: Pagination offset
+    - **cursor**: Resume after the last session of the previous page
+    - **skip**: Pagination offset (kept for backward compatibility)
+    - **view**: `summary` drops generated_content and user_id from each row
+    - **fields**: Return only these fields; the projection is applied in storage
+    
+    With `user_id`, responses carry an `ETag` from the user's version stamp and
+    a matching `If-None-Match` returns 304 without running the listing query.
     """
-    query = {}
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either cursor or skip, not both")
     
+    if view not in ["full", "summary"]:
+        raise HTTPException(status_code=400, detail="Invalid view")
+    
+    if fields and view != "full":
+        raise HTTPException(status_code=400, detail="Use either fields or view, not both")
+    
+    try:
+        query = build_session_query(user_id, module_type, brainwave_target, days)
+        if cursor:
+            query = apply_session_cursor(query, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = {}
     if user_id:
-        query["user_id"] = user_id
+        etag = user_sessions_etag(await get_user_version_stamp(user_id), time_relative=bool(days))
+        not_modified = check_not_modified(request, "sessions.list", etag)
+        if not_modified:
+            return not_modified
+        headers["ETag"] = etag
     
-    if module_type:
-        if module_type not in ["movers", "pfc_gym", "mental_rehearsal", "brainwave"]:
-            raise HTTPException(status_code=400, detail="Invalid module_type")
-        query["module_type"] = module_type
+    if fields or view == "summary":
+        model = session_projection_model(parse_session_fields(fields)) if fields else TrainingSessionSummary
+        return await list_session_projection(model, query, skip, limit, headers)
     
-    if brainwave_target:
-        if brainwave_target not in ["delta", "theta", "alpha", "beta", "gamma"]:
-            raise HTTPException(status_code=400, detail="Invalid brainwave_target")
-        query["brainwave_target"] = brainwave_target
+    # Raw documents straight to orjson; response_model only documents the shape
+    documents = await repository.find_sessions(query, skip=skip, limit=limit)
     
-    if days:
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        query["timestamp"] = {"$gte": cutoff_date}
+    response = FastJSONResponse([session_document_to_response(document) for document in documents], headers=headers)
     
-    # Execute query
-    sessions = await TrainingSession.find(query).sort("-timestamp").skip(skip).limit(limit).to_list()
+    if len(documents) == limit:
+        last = documents[-1]
+        response.headers["X-Next-Cursor"] = encode_session_cursor(last["timestamp"], last["_id"])
     
-    # Convert to response model
-    return [
-        TrainingSessionResponse(
-            id=str(session.id),
-            user_id=session.user_id,
-            module_type=session.module_type,
-            brainwave_target=session.brainwave_target,
-            generated_content=session.generated_content,
-            user_rating=session.user_rating,
-            effectiveness_score=session.effectiveness_score,
-            timestamp=session.timestamp,
-            duration_seconds=session.duration_seconds
-        )
-        for session in sessions
-    ]
+    return response
 
 
 @router.get("/stats", response_model=SessionStats)
 async def get_session_statistics(
+    request: Request,
+    response: Response,
     user_id: str = Query(..., description="User ID to get statistics for"),
     days: Optional[int] = Query(None, description="Only include sessions from last N days")
 ):
     """
     Get comprehensive statistics about a user's training sessions
     
+    All-time stats are a point read of the user's `user_session_stats` rollup;
+    a `days` window falls back to an aggregation over the user's sessions.
+    
     - **user_id**: User to get stats for (required)
     - **days**: Only include sessions from last N days
+    
+    Supports `If-None-Match` against the user's version stamp (plus a short
+    time bucket, since `recent_sessions` slides with the clock).
     """
-    query = {"user_id": user_id}
+    stats = await repository.user_stats(user_id)
+    
+    etag = user_sessions_etag(stats, time_relative=True)
+    not_modified = check_not_modified(request, "sessions.stats", etag)
+    if not_modified:
+        return not_modified
+    response.headers["ETag"] = etag
+    
+    recent_cutoff = datetime.utcnow() - timedelta(days=7)
     
     if days:
+        # Windowed stats can't come from the all-time rollup
         cutoff_date = datetime.utcnow() - timedelta(days=days)
-        query["timestamp"] = {"$gte": cutoff_date}
-    
-    # Get all sessions for user
-    sessions = await TrainingSession.find(query).to_list()
+        rollup = await repository.window_stats(user_id, cutoff_date)
+        recent_cutoff = max(recent_cutoff, cutoff_date)
+    else:
+        # $inc upserts only create the counters they touched
+        rollup = {**empty_rollup(), **stats} if stats else None
     
-    if not sessions:
+    if not rollup or not rollup["total_sessions"]:
         return SessionStats(
             total_sessions=0,
             total_hours=0.0,
@@ -129,40 +372,182 @@ async def get_session_statistics(
             recent_sessions=0
         )
     
-    # Calculate statistics
-    total_seconds = sum(s.duration_seconds or 0 for s in sessions)
-    total_hours = round(total_seconds / 3600, 2)
-    
-    ratings = [s.user_rating for s in sessions if s.user_rating is not None]
-    average_rating = round(sum(ratings) / len(ratings), 2) if ratings else 0.0
+    total_hours = round(rollup["total_duration_seconds"] / 3600, 2)
     
-    # Count by module type
-    sessions_by_module = {}
-    for session in sessions:
-        module = session.module_type
-        sessions_by_module[module] = sessions_by_module.get(module, 0) + 1
+    rating_count = rollup["rating_count"]
+    average_rating = round(rollup["rating_sum"] / rating_count, 2) if rating_count else 0.0
     
-    # Count by brainwave target
-    sessions_by_brainwave = {}
-    for session in sessions:
-        if session.brainwave_target:
-            target = session.brainwave_target
-            sessions_by_brainwave[target] = sessions_by_brainwave.get(target, 0) + 1
-    
-    # Count recent sessions (last 7 days)
-    recent_cutoff = datetime.utcnow() - timedelta(days=7)
-    recent_sessions = sum(1 for s in sessions if s.timestamp >= recent_cutoff)
+    # Count recent sessions (last 7 days) - bounded range on the user/timestamp index
+    recent_sessions = await repository.count_sessions({"user_id": user_id, "timestamp": {"$gte": recent_cutoff}})
     
     return SessionStats(
-        total_sessions=len(sessions),
+        total_sessions=rollup["total_sessions"],
         total_hours=total_hours,
         average_rating=average_rating,
-        sessions_by_module=sessions_by_module,
-        sessions_by_brainwave=sessions_by_brainwave,
+        sessions_by_module=rollup["sessions_by_module"],
+        sessions_by_brainwave=rollup["sessions_by_brainwave"],
         recent_sessions=recent_sessions
     )
 
 
+def build_trend_days(rows: List[dict], start: datetime, days: int, window: int) -> List[dict]:
+    """
+    Zero-filled TrendDay rows for `days` days from `start`
+    
+    `rows` are daily rollups starting `window - 1` days before `start`, so the
+    first day's rolling average already covers a full window.
+    """
+    by_day = {row["day"]: row for row in rows}
+    trailing: deque = deque()
+    rolling_sum, rolling_count = 0.0, 0
+    daily = []
+    
+    first = start - timedelta(days=window - 1)
+    for offset in range(days + window - 1):
+        day = first + timedelta(days=offset)
+        row = by_day.get(day, {})
+        
+        effectiveness = (row.get("effectiveness_sum", 0.0), row.get("effectiveness_count", 0))
+        trailing.append(effectiveness)
+        rolling_sum += effectiveness[0]
+        rolling_count += effectiveness[1]
+        if len(trailing) > window:
+            dropped_sum, dropped_count = trailing.popleft()
+            rolling_sum -= dropped_sum
+            rolling_count -= dropped_count
+        
+        if day < start:
+            continue
+        
+        rating_count = row.get("rating_count", 0)
+        daily.append({
+            "date": day.date().isoformat(),
+            "sessions": row.get("sessions", 0),
+            "minutes": round(row.get("duration_seconds", 0) / 60, 1),
+            "minutes_by_module": {
+                module: round(seconds / 60, 1) for module, seconds in row.get("duration_by_module", {}).items()
+            },
+            "average_effectiveness": round(effectiveness[0] / effectiveness[1], 3) if effectiveness[1] else None,
+            "average_rating": round(row.get("rating_sum", 0) / rating_count, 2) if rating_count else None,
+            "rolling_effectiveness": round(rolling_sum / rolling_count, 3) if rolling_count else None,
+        })
+    
+    return daily
+
+
+@router.get("/trends", response_model=SessionTrends)
+async def get_session_trends(
+    request: Request,
+    user_id: str = Query(..., description="User ID to get trends for"),
+    days: int = Query(30, ge=1, le=365, description="Number of days to chart, ending today (UTC)"),
+    window: int = Query(7, ge=1, le=90, description="Days in the rolling effectiveness average")
+):
+    """
+    Get a user's training progress per day
+    
+    Reads one small `user_daily_stats` document per active day (a 180-day
+    chart is at most ~180 documents), maintained on every insert and rating
+    change. Days without sessions are returned with zeros.
+    
+    - **user_id**: User to chart (required)
+    - **days**: Days to return (default 30, max 365)
+    - **window**: Trailing days in `rolling_effectiveness` (default 7)
+    
+    Supports `If-None-Match` against the user's version stamp (plus a short
+    time bucket, since the range ends today).
+    """
+    etag = user_sessions_etag(await get_user_version_stamp(user_id), time_relative=True)
+    not_modified = check_not_modified(request, "sessions.trends", etag)
+    if not_modified:
+        return not_modified
+    
+    start = bucket_day(datetime.utcnow()) - timedelta(days=days - 1)
+    rows = await repository.daily_stats(user_id, start - timedelta(days=window - 1), start + timedelta(days=days - 1))
+    daily = build_trend_days(rows, start, days, window)
+    
+    minutes_by_module: Dict[str, float] = {}
+    for day in daily:
+        for module, minutes in day["minutes_by_module"].items():
+            minutes_by_module[module] = round(minutes_by_module.get(module, 0) + minutes, 1)
+    
+    return FastJSONResponse({
+        "user_id": user_id,
+        "days": days,
+        "window": window,
+        "total_sessions": sum(day["sessions"] for day in daily),
+        "total_minutes": round(sum(day["minutes"] for day in daily), 1),
+        "minutes_by_module": minutes_by_module,
+        "daily": daily,
+    }, headers={"ETag": etag})
+
+
+@router.get("/parameter-effectiveness", response_model=ParameterEffectiveness)
+async def get_parameter_effectiveness(
+    brainwave_target: Optional[str] = Query(None, description="Only analyse this brainwave target"),
+    bins: int = Query(5, ge=2, le=20, description="Quantile bins per parameter")
+):
+    """
+    Which brainwave parameters predict high effectiveness and ratings
+    
+    For each brainwave target, every `generated_content` parameter
+    (binaural beat, carrier, modulation depth, pink noise) is correlated with
+    `effectiveness_score` and `user_rating` (Pearson and Spearman) and split
+    into quantile bins with the outcome mean, spread and high-outcome rate.
+    
+    The analysis scans all brainwave sessions, so results are cached per
+    (bins, brainwave_target) in this worker. An entry is recomputed by the
+    first request after it is ANALYSIS_CACHE_TTL seconds old (default 600),
+    so new sessions are reflected within that time; `age_seconds` tells how
+    old the returned result is.
+    """
+    # Lazy: keeps NumPy out of worker startup until the first analysis
+    from database.parameter_analysis import BRAINWAVE_TARGETS, parameter_analysis_cache
+    
+    if brainwave_target and brainwave_target not in BRAINWAVE_TARGETS:
+        raise HTTPException(status_code=400, detail="Invalid brainwave_target")
+    
+    result = await parameter_analysis_cache.get(bins, brainwave_target)
+    age = parameter_analysis_cache.age(bins, brainwave_target) or 0.0
+    
+    return FastJSONResponse({**result, "age_seconds": round(age, 1)})
+
+
+@router.get("/export")
+async def export_training_sessions(
+    user_id: Optional[str] = Query(None, description="Filter by user ID"),
+    module_type: Optional[str] = Query(None, description="Filter by module type"),
+    brainwave_target: Optional[str] = Query(None, description="Filter by brainwave target"),
+    days: Optional[int] = Query(None, description="Only export sessions from last N days"),
+    format: str = Query("ndjson", description="ndjson or csv"),
+    flatten: bool = Query(False, description="Expand generated_content keys into generated_content.<key> fields")
+):
+    """
+    Stream every matching session as NDJSON or CSV
+    
+    The body is produced batch by batch from a storage cursor, so memory stays
+    constant regardless of how many sessions are exported. Rows are in natural
+    (storage) order. For offline jobs see `database/session_export.py`.
+    
+    - **user_id**, **module_type**, **brainwave_target**, **days**: Same filters as the listing
+    - **format**: `ndjson` (default) or `csv`
+    - **flatten**: Expand generated_content into one field/column per key
+    """
+    if format not in ["ndjson", "csv"]:
+        raise HTTPException(status_code=400, detail="Invalid format")
+    
+    try:
+        query = build_session_query(user_id, module_type, brainwave_target, days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type = NDJSON_MEDIA_TYPE if format == "ndjson" else "text/csv"
+    
+    return StreamingResponse(
+        iter_session_export(query, format, flatten),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="sessions.{format}"'}
+    )
+
+
 @router.get("/{session_id}", response_model=TrainingSessionResponse)
 async def get_session_by_id(session_id: str):
     """
@@ -170,22 +555,16 @@ async def get_session_by_id(session_id: str):
     
     - **session_id**: MongoDB ObjectId of the session
     """
-    session = await TrainingSession.get(session_id)
+    object_id = parse_object_id(session_id)
+    document = None
     
-    if not session:
+    if object_id:
+        document = await repository.get_session(object_id)
+    
+    if not document:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return TrainingSessionResponse(
-        id=str(session.id),
-        user_id=session.user_id,
-        module_type=session.module_type,
-        brainwave_target=session.brainwave_target,
-        generated_content=session.generated_content,
-        user_rating=session.user_rating,
-        effectiveness_score=session.effectiveness_score,
-        timestamp=session.timestamp,
-        duration_seconds=session.duration_seconds
-    )
+    return FastJSONResponse(session_document_to_response(document))
 
 
 @router.post("/", response_model=TrainingSessionResponse)
@@ -211,46 +590,127 @@ async def create_training_session(
     if module_type == "brainwave" and not brainwave_target:
         raise HTTPException(status_code=400, detail="brainwave_target required for brainwave module")
     
-    session = TrainingSession(
-        user_id=user_id,
-        module_type=module_type,
-        brainwave_target=brainwave_target,
-        generated_content=generated_content,
-        duration_seconds=duration_seconds
-    )
+    if brainwave_target and brainwave_target not in ["delta", "theta", "alpha", "beta", "gamma"]:
+        raise HTTPException(status_code=400, detail="Invalid brainwave_target")
     
-    await session.insert()
-    
-    return TrainingSessionResponse(
-        id=str(session.id),
-        user_id=session.user_id,
-        module_type=session.module_type,
-        brainwave_target=session.brainwave_target,
-        generated_content=session.generated_content,
-        user_rating=session.user_rating,
-        effectiveness_score=session.effectiveness_score,
-        timestamp=session.timestamp,
-        duration_seconds=session.duration_seconds
+    document = {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "module_type": module_type,
+        "brainwave_target": brainwave_target,
+        "generated_content": generated_content,
+        "user_rating": None,
+        "effectiveness_score": None,
+        "timestamp": datetime.utcnow(),
+        "duration_seconds": duration_seconds,
+    }
+    failed = await repository.insert_sessions([document])
+    if failed:
+        raise HTTPException(status_code=500, detail=failed[0])
+    
+    return FastJSONResponse(session_document_to_response(document))
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Compact one-line description of a row validation error"""
+    return "; ".join(
+        (".".join(str(part) for part in item["loc"]) + ": " if item["loc"] else "") + item["msg"]
+        for item in error.errors()
     )
 
 
+async def insert_session_batch(batch: List[Tuple[int, dict]]) -> List[dict]:
+    """Unordered insert of validated rows (rollups included); returns per-row results"""
+    documents = [document for _, document in batch]
+    failed = await repository.insert_sessions(documents)
+    
+    return [
+        {"line": line, "error": failed[index]} if index in failed else {"line": line, "id": str(document["_id"])}
+        for index, (line, document) in enumerate(batch)
+    ]
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkIngestResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}}
+        }
+    }
+)
+async def bulk_create_training_sessions(request: Request):
+    """
+    Create many training sessions from a streamed NDJSON body
+    
+    Each line is one JSON session (same fields as a session, plus optional
+    `timestamp` and `user_rating` for sessions recorded offline). Rows are
+    validated as they arrive and written with unordered `insert_many` in
+    batches of `BULK_INSERT_BATCH_SIZE`, so a bad row never blocks the rest.
+    
+    Returns one result per non-blank line: the new `id`, or an `error`.
+    """
+    results = []
+    batch: List[Tuple[int, dict]] = []
+    
+    async for line_number, line in iter_ndjson_lines(request):
+        try:
+            row = TrainingSessionCreate.model_validate_json(line)
+        except ValidationError as e:
+            results.append({"line": line_number, "error": format_validation_error(e)})
+            continue
+        
+        batch.append((line_number, row.to_document()))
+        if len(batch) >= BULK_INSERT_BATCH_SIZE:
+            results.extend(await insert_session_batch(batch))
+            batch = []
+    
+    if batch:
+        results.extend(await insert_session_batch(batch))
+    
+    results.sort(key=lambda result: result["line"])
+    failed = sum(1 for result in results if "error" in result)
+    
+    return FastJSONResponse({
+        "received": len(results),
+        "inserted": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    })
+
+
 @router.patch("/{session_id}/rating")
 async def update_session_rating(
     session_id: str,
-    rating: int = Query(..., ge=1, le=5, description="User rating 1-5")
+    rating: int = Query(..., ge=1, le=5, description="User rating 1-5"),
+    deferred: bool = Query(False, description="Queue the rating for a coalesced write-behind flush")
 ):
     """
     Update the user rating for a session
     
+    The rating is written with one atomic update. With `deferred=true` it is
+    queued instead and merged with other ratings into one batched write within
+    `RATING_FLUSH_INTERVAL` seconds (202 Accepted; unknown sessions are
+    dropped at flush time rather than reported).
+    
     - **session_id**: Session to rate
     - **rating**: Rating from 1-5
+    - **deferred**: Use the write-behind coalescer (for rapid rating feeds)
     """
-    session = await TrainingSession.get(session_id)
+    object_id = parse_object_id(session_id)
     
-    if not session:
+    if not object_id:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session.user_rating = rating
-    await session.save()
+    if deferred:
+        rating_coalescer.submit(object_id, rating)
+        return JSONResponse(
+            status_code=202,
+            content={"message": "Rating queued", "session_id": session_id, "rating": rating}
+        )
+    
+    if not await repository.set_session_rating(object_id, rating):
+        raise HTTPException(status_code=404, detail="Session not found")
     
     return {"message": "Rating updated", "session_id": session_id, "rating": rating}
@@ -0,0 +1,111 @@
+"""
+Startup Profiling
+Per-phase timing of a worker's startup (imports, database, caches) and its
+time to first request, logged once and exported as /metrics gauges
+
+api.main imports this module before anything else, so the "imports" phase
+covers the application's own import graph. Process uptime (Linux /proc) adds
+the interpreter and server start before that.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from database.metrics import MetricsRegistry, metrics
+
+IMPORT_STARTED = time.perf_counter()
+
+
+def process_uptime() -> Optional[float]:
+    """Seconds since this process started (None where /proc is unavailable)"""
+    try:
+        with open("/proc/self/stat") as stat:
+            start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as uptime:
+            system_uptime = float(uptime.read().split()[0])
+        return max(system_uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfile:
+    """Phase durations for one worker, from first import to first request"""
+
+    def __init__(self, registry: MetricsRegistry = metrics):
+        self.registry = registry
+        self.phases: Dict[str, float] = {}
+        self.process_age_at_import = process_uptime()
+        self.ready_seconds: Optional[float] = None
+        self.first_request_seconds: Optional[float] = None
+
+    def elapsed(self) -> float:
+        """Seconds since api.main started importing"""
+        return time.perf_counter() - IMPORT_STARTED
+
+    def record(self, phase: str, seconds: float):
+        self.phases[phase] = seconds
+        self.registry.gauge("startup_phase_seconds", "Worker startup time by phase", phase=phase).set(seconds)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a startup phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def ready(self):
+        """Startup finished (end of the lifespan startup); log the breakdown"""
+        self.ready_seconds = self.elapsed()
+        self.registry.gauge("startup_ready_seconds", "Seconds from import to accepting requests").set(self.ready_seconds)
+        breakdown = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
+        print(f"⏱️  Startup {self.ready_seconds * 1000:.0f} ms ({breakdown}){self._process_note(self.ready_seconds)}")
+
+    def first_request(self):
+        """Record time to first request (only the first call counts)"""
+        if self.first_request_seconds is not None:
+            return
+        self.first_request_seconds = self.elapsed()
+        self.registry.gauge(
+            "startup_first_request_seconds", "Seconds from import to the first request"
+        ).set(self.first_request_seconds)
+        print(f"⏱️  First request {self.first_request_seconds * 1000:.0f} ms after import"
+              f"{self._process_note(self.first_request_seconds)}")
+
+    def _process_note(self, seconds: float) -> str:
+        if self.process_age_at_import is None:
+            return ""
+        return f", {(self.process_age_at_import + seconds) * 1000:.0f} ms since process start"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Startup timings in milliseconds"""
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 1) if seconds is not None else None
+
+        return {
+            "phases_ms": {name: ms(seconds) for name, seconds in self.phases.items()},
+            "ready_ms": ms(self.ready_seconds),
+            "first_request_ms": ms(self.first_request_seconds),
+            "process_age_at_import_ms": ms(self.process_age_at_import),
+        }
+
+
+startup_profile = StartupProfile()
+
+
+class FirstRequestMiddleware:
+    """Mark the first HTTP request, then get out of the way"""
+
+    def __init__(self, app, profile: StartupProfile = startup_profile):
+        self.app = app
+        self.profile = profile
+        self.seen = False
+
+    async def __call__(self, scope, receive, send):
+        if not self.seen and scope["type"] == "http":
+            self.seen = True
+            self.profile.first_request()
+        await self.app(scope, receive, send)
@@ -0,0 +1,337 @@
+"""
+EEG Band Power
+Vectorized Welch PSD band powers (delta..gamma, with the band edges from
+BRAINWAVE_STATES) for many channels at once, updated incrementally as samples
+arrive
+
+Welch's estimate averages the periodograms of overlapping Hann-windowed
+segments. Band power is linear in the PSD, so the window's band powers are the
+mean of per-segment band powers. The engine therefore transforms each new
+segment once, keeps the last few segments' band powers in a ring and averages
+them, instead of recomputing the whole window on every update.
+
+Usage:
+    python database/band_power.py --channels 64 --sample-rate 256 --seconds 600
+    python database/band_power.py --chunk-seconds 0.1 --window-seconds 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database.brainwave_bands import BRAINWAVE_STATES
+from database.eeg_store import eeg_store
+from database.metrics import metrics
+
+BAND_NAMES = list(BRAINWAVE_STATES)
+
+# Seconds of samples averaged into one estimate
+BAND_POWER_WINDOW_SECONDS = float(os.getenv("BAND_POWER_WINDOW_SECONDS", "4"))
+
+# Welch segment length (2 s gives 0.5 Hz bins, the lower edge of delta)
+WELCH_SEGMENT_SECONDS = float(os.getenv("WELCH_SEGMENT_SECONDS", "2"))
+
+WELCH_OVERLAP = 0.5
+
+# Segments transformed per FFT call (bounds memory when catching up)
+SEGMENT_BATCH = 256
+
+# Sessions whose engines are kept between band-power requests, per worker
+BAND_POWER_MAX_SESSIONS = int(os.getenv("BAND_POWER_MAX_SESSIONS", "256"))
+
+
+def band_matrix(frequencies: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    (frequencies, bands) weights turning |FFT|^2 into band power
+
+    Each column sums the PSD bins in [low, high) of one band times the bin
+    width, with the one-sided density scaling already folded in.
+    """
+    step = frequencies[1] - frequencies[0]
+    matrix = np.zeros((len(frequencies), len(BAND_NAMES)))
+    for column, name in enumerate(BAND_NAMES):
+        low, high = BRAINWAVE_STATES[name]["range"]
+        matrix[:, column] = ((frequencies >= low) & (frequencies < high)) * scale * step
+    return matrix
+
+
+class BandPowerEngine:
+    """
+    Incremental Welch band powers for a (samples, channels) stream
+
+    update() takes any number of new samples. Each complete segment is
+    detrended, Hann-windowed and transformed once, for all channels in one
+    batched rfft. The estimate is the mean of the last window's segments.
+    Before the first full segment there is no estimate.
+    """
+
+    def __init__(
+        self,
+        channels: int,
+        sample_rate: float,
+        window_seconds: float = BAND_POWER_WINDOW_SECONDS,
+        segment_seconds: float = WELCH_SEGMENT_SECONDS,
+        overlap: float = WELCH_OVERLAP
+    ):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.segment = max(int(round(segment_seconds * sample_rate)), 8)
+        self.step = max(int(round(self.segment * (1 - overlap))), 1)
+        window_samples = max(int(round(window_seconds * sample_rate)), self.segment)
+        self.segments_per_window = (window_samples - self.segment) // self.step + 1
+
+        # Periodic Hann window and one-sided PSD density scaling
+        self.window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(self.segment) / self.segment)
+        frequencies = np.fft.rfftfreq(self.segment, 1 / sample_rate)
+        scale = np.full(len(frequencies), 2 / (sample_rate * (self.window ** 2).sum()))
+        scale[0] /= 2
+        if self.segment % 2 == 0:
+            scale[-1] /= 2
+        self.bands = band_matrix(frequencies, scale)
+
+        self._pending = np.empty((channels, 0))
+        self._ring = np.zeros((self.segments_per_window, channels, len(BAND_NAMES)))
+        self._head = 0
+        self.filled = 0
+        self.samples_seen = 0
+
+    def segment_powers(self, signal: np.ndarray, count: int) -> np.ndarray:
+        """Band powers (count, channels, bands) of the first `count` segments of a (channels, samples) array"""
+        segments = sliding_window_view(signal, self.segment, axis=-1)[:, :count * self.step:self.step]
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        spectrum = np.fft.rfft(segments * self.window, axis=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        return (power @ self.bands).transpose(1, 0, 2)
+
+    def update(self, samples: np.ndarray) -> int:
+        """
+        Add (samples, channels) values; returns how many segments completed
+
+        Segments that would already have left the window are skipped when a
+        large backlog arrives at once.
+        """
+        self.samples_seen += len(samples)
+        signal = np.concatenate([self._pending, np.asarray(samples, dtype=np.float64).T], axis=1)
+        available = signal.shape[1]
+        count = (available - self.segment) // self.step + 1 if available >= self.segment else 0
+
+        first = max(count - self.segments_per_window, 0)
+        for start in range(first, count, SEGMENT_BATCH):
+            stop = min(start + SEGMENT_BATCH, count)
+            self._push(self.segment_powers(signal[:, start * self.step:], stop - start))
+
+        self._pending = signal[:, count * self.step:].copy()
+        return count
+
+    @property
+    def window_end(self) -> int:
+        """Sample index (exclusive) where the newest segment ends"""
+        return self.samples_seen - self._pending.shape[1] + self.segment - self.step
+
+    @property
+    def window_samples(self) -> int:
+        """Samples spanned by a full window of segments"""
+        return self.segment + (self.segments_per_window - 1) * self.step
+
+    def _push(self, powers: np.ndarray):
+        slots = (self._head + np.arange(len(powers))) % self.segments_per_window
+        self._ring[slots] = powers
+        self._head = (self._head + len(powers)) % self.segments_per_window
+        self.filled = min(self.filled + len(powers), self.segments_per_window)
+
+    def powers(self) -> Optional[np.ndarray]:
+        """Current (channels, bands) absolute band powers (signal units squared)"""
+        return self._ring[:self.filled].mean(axis=0) if self.filled else None
+
+    def summary(self, per_channel: bool = False) -> Dict[str, Any]:
+        """Channel-averaged absolute and relative band powers (relative sums to 1, like BrainwaveState)"""
+        powers = self.powers()
+        result: Dict[str, Any] = {
+            "bands": BAND_NAMES,
+            "segments": self.filled,
+            "samples_processed": self.samples_seen,
+            "absolute": None,
+            "relative": None,
+            "dominant": None,
+        }
+        if powers is None:
+            return result
+
+        totals = powers.sum(axis=1, keepdims=True)
+        relative = np.divide(powers, totals, out=np.zeros_like(powers), where=totals > 0)
+        mean_absolute, mean_relative = powers.mean(axis=0), relative.mean(axis=0)
+        result.update(
+            absolute={name: round(float(value), 4) for name, value in zip(BAND_NAMES, mean_absolute)},
+            relative={name: round(float(value), 4) for name, value in zip(BAND_NAMES, mean_relative)},
+            dominant=BAND_NAMES[int(mean_relative.argmax())],
+        )
+        if per_channel:
+            result["per_channel"] = [
+                {name: round(float(value), 4) for name, value in zip(BAND_NAMES, row)} for row in relative
+            ]
+        return result
+
+
+def welch_band_powers(
+    samples: np.ndarray,
+    sample_rate: float,
+    segment_seconds: float = WELCH_SEGMENT_SECONDS,
+    overlap: float = WELCH_OVERLAP
+) -> np.ndarray:
+    """One-shot Welch band powers (channels, bands) over all of a (samples, channels) array"""
+    engine = BandPowerEngine(samples.shape[1], sample_rate, len(samples) / sample_rate, segment_seconds, overlap)
+    engine.update(samples)
+    powers = engine.powers()
+    return powers if powers is not None else np.zeros((samples.shape[1], len(BAND_NAMES)))
+
+
+class SessionBandPower:
+    """
+    Per-session engines over the stored EEG (database/eeg_store.py)
+
+    Each request feeds only the samples appended since the previous one. A
+    new engine starts one window before the end of the stored samples.
+    Requests for the same session and window take turns, and the session's
+    sample count is read inside that turn, so no sample is fed twice.
+    """
+
+    def __init__(self, max_sessions: int = BAND_POWER_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._engines: "OrderedDict[Tuple[str, float], Tuple[BandPowerEngine, int]]" = OrderedDict()
+        # key -> [lock, requests holding or waiting for it]; dropped when unused
+        self._locks: Dict[Tuple[str, float], list] = {}
+
+    def _advance(
+        self, session_id: str, window_seconds: float
+    ) -> Optional[Tuple[BandPowerEngine, Dict[str, Any]]]:
+        info = eeg_store.info(session_id)
+        if info is None:
+            return None
+
+        key = (session_id, window_seconds)
+        if key in self._engines:
+            engine, position = self._engines.pop(key)
+        else:
+            engine = BandPowerEngine(info["channels"], info["sample_rate"], window_seconds)
+            position = max(info["total_samples"] - engine.window_samples, 0)
+        # The file only grows; never step back over samples already fed
+        total = max(info["total_samples"], position)
+
+        new = eeg_store.read(session_id, position, total)
+        started = time.thread_time()
+        engine.update(new * info["scale"] if info["scale"] != 1 else new)
+        metrics.counter(
+            "band_power_channel_seconds_total", "EEG channel-seconds run through band-power engines"
+        ).inc(len(new) * info["channels"] / info["sample_rate"])
+        metrics.counter("band_power_cpu_seconds_total", "CPU time spent in band-power updates").inc(
+            time.thread_time() - started
+        )
+        self._engines[key] = (engine, total)
+        return engine, {**info, "total_samples": total}
+
+    async def get(
+        self, session_id: str, window_seconds: float = BAND_POWER_WINDOW_SECONDS, per_channel: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Band powers over the last window of a session's samples (None without EEG data)"""
+        key = (session_id, window_seconds)
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                advanced = await asyncio.to_thread(self._advance, session_id, window_seconds)
+                if advanced is None:
+                    return None
+                engine, info = advanced
+                summary = engine.summary(per_channel)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+        while len(self._engines) > self.max_sessions:
+            self._engines.popitem(last=False)
+
+        return {
+            "session_id": session_id,
+            "channels": info["channels"],
+            "sample_rate": info["sample_rate"],
+            "window_seconds": window_seconds,
+            "segment_seconds": engine.segment / info["sample_rate"],
+            "total_samples": info["total_samples"],
+            **summary,
+        }
+
+
+session_band_power = SessionBandPower()
+
+
+def synthetic_eeg(channels: int, sample_rate: float, seconds: float, seed: int = 42) -> np.ndarray:
+    """Pink-ish noise plus a 10 Hz alpha rhythm on every channel, in µV (samples, channels)"""
+    rng = np.random.default_rng(seed)
+    samples = int(seconds * sample_rate)
+    noise = np.cumsum(rng.standard_normal((samples, channels)), axis=0)
+    noise -= np.linspace(noise[0], noise[-1], samples)
+    t = np.arange(samples)[:, None] / sample_rate
+    alpha = 20 * np.sin(2 * np.pi * 10 * t + rng.uniform(0, 2 * np.pi, channels))
+    return (noise + alpha).astype(np.float32)
+
+
+def main():
+    """Benchmark incremental band power in channel-seconds per CPU-second"""
+    parser = argparse.ArgumentParser(description="Benchmark the incremental Welch band-power engine")
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--sample-rate", type=float, default=256.0, help="Hz")
+    parser.add_argument("--seconds", type=float, default=600.0, help="Seconds of synthetic EEG to stream")
+    parser.add_argument("--chunk-seconds", type=float, default=0.25, help="Seconds of samples per update")
+    parser.add_argument("--window-seconds", type=float, default=BAND_POWER_WINDOW_SECONDS)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = synthetic_eeg(args.channels, args.sample_rate, args.seconds, args.seed)
+    chunk = max(int(args.chunk_seconds * args.sample_rate), 1)
+    channel_seconds = args.channels * len(data) / args.sample_rate
+    print(f"Streaming {args.seconds:g}s of {args.channels}ch EEG at {args.sample_rate:g} Hz "
+          f"in {chunk}-sample updates ({args.window_seconds:g}s window)")
+
+    engine = BandPowerEngine(args.channels, args.sample_rate, args.window_seconds)
+    started = time.process_time()
+    for offset in range(0, len(data), chunk):
+        engine.update(data[offset:offset + chunk])
+    incremental = max(time.process_time() - started, 1e-9)
+
+    # Baseline: recompute Welch over the whole trailing window on every update
+    window = engine.window_samples
+    updates = 0
+    started = time.process_time()
+    for offset in range(chunk, len(data) + 1, chunk):
+        if offset >= window:
+            welch_band_powers(data[offset - window:offset], args.sample_rate)
+        updates += 1
+    recompute = max(time.process_time() - started, 1e-9)
+
+    end = engine.window_end
+    matches = bool(np.allclose(engine.powers(), welch_band_powers(data[end - window:end], args.sample_rate), rtol=1e-6))
+
+    summary = engine.summary()
+    print(f"✓ Incremental: {channel_seconds / incremental:,.0f} channel-seconds per CPU-second "
+          f"({incremental:.2f} CPU s, {updates} updates)")
+    print(f"  Recompute window per update: {channel_seconds / recompute:,.0f} channel-seconds per CPU-second "
+          f"({recompute:.2f} CPU s, {recompute / incremental:.1f}x slower)")
+    print("  Relative power: " + ", ".join(f"{name} {value:.2f}" for name, value in summary["relative"].items())
+          + f" (dominant {summary['dominant']})")
+    print(f"  Matches one-shot Welch over the last window: {'yes' if matches else 'NO'}")
+    return matches
+
+
+if __name__ == "__main__":
+    result = main()
+    sys.exit(0 if result else 1)
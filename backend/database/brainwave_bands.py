@@ -0,0 +1,14 @@
+"""
+Brainwave Bands
+Frequency ranges of the EEG bands, shared by the seeder, audio rendering,
+band-power analysis and the load and verification tools
+"""
+
+# Realistic brainwave frequency ranges based on research
+BRAINWAVE_STATES = {
+    "delta": {"range": (0.5, 4), "description": "Deep sleep, healing"},
+    "theta": {"range": (4, 8), "description": "Meditation, creativity"},
+    "alpha": {"range": (8, 13), "description": "Relaxed focus, calm"},
+    "beta": {"range": (13, 30), "description": "Active thinking, focus"},
+    "gamma": {"range": (30, 100), "description": "Peak performance, insight"}
+}
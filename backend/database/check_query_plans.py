@@ -0,0 +1,246 @@
+"""
+Query Plan Regression Check
+Runs explain() for every route query shape against a local mongod and fails
+if any winning plan uses a COLLSCAN or an in-memory SORT stage, or no IXSCAN
+(also run by tests/test_query_plans.py, which skips without a mongod)
+
+Usage:
+    python database/check_query_plans.py
+
+Uses a scratch database (brain_buddy_plan_check by default, override with
+PLAN_CHECK_DATABASE) which is dropped afterwards.
+"""
+
+import asyncio
+import itertools
+import sys
+from datetime import datetime, timedelta
+from bson import ObjectId
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+import os
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database.models import TrainingSession, BrainKnowledge, UserSessionStats, UserDailyStats
+from database.session_stats import session_stats_pipeline
+from database.queries import (
+    MODULE_TO_STIMULUS,
+    apply_session_cursor,
+    build_knowledge_query,
+    build_session_query,
+    encode_session_cursor,
+)
+from database.session_store import SESSION_SORT
+
+load_dotenv()
+
+PLAN_CHECK_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+PLAN_CHECK_DATABASE = os.getenv("PLAN_CHECK_DATABASE", "brain_buddy_plan_check")
+
+FORBIDDEN_STAGES = {"COLLSCAN", "SORT"}
+
+STATS_AGGREGATION = "sessions stats windowed aggregation"
+
+# (name, collection, filter, sort) for find-shaped queries
+QueryShape = Tuple[str, str, Dict[str, Any], Optional[List[Tuple[str, int]]]]
+
+
+def session_query_shapes() -> Iterator[QueryShape]:
+    """Every filter combination accepted by GET /api/sessions plus /stats lookups"""
+    filters = {
+        "user_id": "plan_user_1",
+        "module_type": "brainwave",
+        "brainwave_target": "alpha",
+        "days": 30,
+    }
+    cursor = encode_session_cursor(datetime.utcnow() - timedelta(hours=12), ObjectId())
+    for size in range(len(filters) + 1):
+        for combo in itertools.combinations(filters, size):
+            query = build_session_query(**{key: filters[key] for key in combo})
+            name = "sessions list [" + ", ".join(combo or ("no filter",)) + "]"
+            yield name, "sessions", query, SESSION_SORT
+            yield name + " after cursor", "sessions", apply_session_cursor(query, cursor), SESSION_SORT
+
+    recent_cutoff = datetime.utcnow() - timedelta(days=7)
+    yield "sessions stats recent count", "sessions", {
+        "user_id": "plan_user_1", "timestamp": {"$gte": recent_cutoff}
+    }, None
+    yield "sessions stats rollup read", "user_session_stats", {"user_id": "plan_user_1"}, None
+    yield "sessions trends daily range", "user_daily_stats", {
+        "user_id": "plan_user_1", "day": {"$gte": recent_cutoff, "$lte": datetime.utcnow()}
+    }, [("day", 1)]
+
+
+def knowledge_query_shapes() -> Iterator[QueryShape]:
+    """Every filter combination accepted by GET /api/knowledge plus recommendations"""
+    filters = {
+        "stimulus_type": "binaural_beats",
+        "outcome": "reduced_anxiety",
+        "min_evidence": 0.5,
+    }
+    for size in range(len(filters) + 1):
+        for combo in itertools.combinations(filters, size):
+            query = build_knowledge_query(**{key: filters[key] for key in combo})
+            name = "knowledge list [" + ", ".join(combo or ("no filter",)) + "]"
+            yield name, "brain_knowledge", query, [("evidence_strength", -1)]
+
+    for module_type, stimuli in MODULE_TO_STIMULUS.items():
+        yield f"knowledge recommendations [{module_type}]", "brain_knowledge", {
+            "stimulus_type": {"$in": stimuli}
+        }, [("evidence_strength", -1)]
+
+
+def plan_stages(plan: Any) -> Iterator[str]:
+    """Yield every stage name in an explain() plan tree (classic and SBE layouts)"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+async def seed_scratch_data(database):
+    """Insert a handful of documents so the planner has real indexes and stats"""
+    now = datetime.utcnow()
+    await database["sessions"].insert_many([
+        {
+            "user_id": f"plan_user_{i % 3}",
+            "module_type": ["movers", "pfc_gym", "mental_rehearsal", "brainwave"][i % 4],
+            "brainwave_target": ["delta", "theta", "alpha", "beta", "gamma"][i % 5] if i % 4 == 3 else None,
+            "generated_content": {},
+            "user_rating": (i % 5) + 1,
+            "timestamp": now - timedelta(hours=i),
+            "duration_seconds": 600,
+        }
+        for i in range(200)
+    ])
+    await database["brain_knowledge"].insert_many([
+        {
+            "stimulus_type": stimulus,
+            "stimulus_parameters": {},
+            "outcome": outcome,
+            "evidence_strength": 0.5 + i / 100,
+            "citations": [],
+            "created_at": now,
+        }
+        for i, (stimulus, outcome) in enumerate(itertools.product(
+            ["binaural_beats", "meditation", "breathwork", "neurofeedback"],
+            ["reduced_anxiety", "improved_attention", "increased_focus"],
+        ))
+    ])
+    await database["user_session_stats"].insert_many([
+        {"user_id": f"plan_user_{i}", "total_sessions": 0} for i in range(3)
+    ])
+
+
+async def explain_find(database, collection: str, query: Dict[str, Any], sort) -> Dict[str, Any]:
+    """Run explain (queryPlanner verbosity) for a find command"""
+    command = {"find": collection, "filter": query}
+    if sort:
+        command["sort"] = dict(sort)
+    return await database.command("explain", command, verbosity="queryPlanner")
+
+
+def forbidden_stages(stages: Set[str]) -> Set[str]:
+    """Stages that mean a find-shaped query is not served by an index in order"""
+    bad = stages & FORBIDDEN_STAGES
+    if "IXSCAN" not in stages:
+        bad.add("no IXSCAN")
+    return bad
+
+
+def all_query_shapes() -> List[QueryShape]:
+    """Find-shaped queries of the session and knowledge routes"""
+    return list(session_query_shapes()) + list(knowledge_query_shapes())
+
+
+async def open_scratch_database(timeout_ms: int = 30000):
+    """
+    Fresh scratch database with the declared indexes and a few documents
+
+    Returns (client, database); the caller drops it with drop_scratch_database.
+    Raises pymongo's ServerSelectionTimeoutError when no mongod is reachable.
+    """
+    client = AsyncIOMotorClient(PLAN_CHECK_URL, serverSelectionTimeoutMS=timeout_ms)
+    await client.drop_database(PLAN_CHECK_DATABASE)
+    database = client[PLAN_CHECK_DATABASE]
+
+    # Builds the declared indexes on the scratch database
+    await init_beanie(
+        database=database,
+        document_models=[TrainingSession, BrainKnowledge, UserSessionStats, UserDailyStats]
+    )
+    await seed_scratch_data(database)
+    return client, database
+
+
+async def drop_scratch_database(client):
+    await client.drop_database(PLAN_CHECK_DATABASE)
+    client.close()
+
+
+async def explain_query_plans(database) -> Dict[str, Set[str]]:
+    """Winning plan stages of every route query shape, plus the windowed /stats aggregation"""
+    plans = {}
+    for name, collection, query, sort in all_query_shapes():
+        explain = await explain_find(database, collection, query, sort)
+        plans[name] = set(plan_stages(explain["queryPlanner"]["winningPlan"]))
+
+    cutoff = datetime.utcnow() - timedelta(days=30)
+    explain = await database.command("explain", {
+        "aggregate": "sessions",
+        "pipeline": session_stats_pipeline({"user_id": "plan_user_1", "timestamp": {"$gte": cutoff}}),
+        "cursor": {},
+    }, verbosity="queryPlanner")
+    plans[STATS_AGGREGATION] = set(plan_stages(explain))
+    return plans
+
+
+def plan_problems(name: str, stages: Set[str]) -> Set[str]:
+    """Forbidden stages for one explained query (the aggregation may sort in memory after $group)"""
+    if name == STATS_AGGREGATION:
+        return stages & {"COLLSCAN"}
+    return forbidden_stages(stages)
+
+
+async def check_query_plans() -> bool:
+    """Explain every route query shape and report forbidden plan stages"""
+    print("=" * 60)
+    print("Brain Buddy - Query Plan Check")
+    print("=" * 60)
+
+    client, database = await open_scratch_database()
+    try:
+        plans = await explain_query_plans(database)
+    finally:
+        await drop_scratch_database(client)
+
+    failures = []
+    for name, stages in plans.items():
+        bad = plan_problems(name, stages)
+        if bad:
+            failures.append(name)
+            print(f"   ❌ {name}: {', '.join(sorted(bad))}")
+        else:
+            print(f"   ✅ {name}")
+
+    print("\n" + "=" * 60)
+    if failures:
+        print(f"⚠️  {len(failures)} query shapes need an index:")
+        for name in failures:
+            print(f"  - {name}")
+    else:
+        print(f"✅ All {len(plans)} query shapes use indexes without an in-memory sort")
+    print("=" * 60)
+
+    return not failures
+
+
+if __name__ == "__main__":
+    result = asyncio.run(check_query_plans())
+    sys.exit(0 if result else 1)
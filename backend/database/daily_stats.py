@@ -0,0 +1,284 @@
+"""
+Daily Session Rollups
+Per-user per-day session totals in the user_daily_stats collection, maintained
+incrementally on session inserts and rating changes (feeds /api/sessions/trends)
+
+Usage:
+    python database/daily_stats.py rebuild [--user USER_ID]
+    python database/daily_stats.py check [--user USER_ID]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database.models import UserDailyStats
+from database.session_store import bucket_day, session_store
+
+# Daily rollup upserts per bulk_write during a rebuild
+REBUILD_BATCH_SIZE = 1000
+
+# Fields compared when checking stored daily rollups against the sessions
+DAILY_FIELDS = [
+    "sessions",
+    "duration_seconds",
+    "sessions_by_module",
+    "duration_by_module",
+    "effectiveness_sum",
+    "effectiveness_count",
+    "rating_sum",
+    "rating_count",
+]
+
+DayKey = Tuple[str, datetime]
+
+
+def empty_daily_rollup() -> Dict[str, Any]:
+    """Daily rollup values for a day without sessions"""
+    return {
+        "sessions": 0,
+        "duration_seconds": 0,
+        "sessions_by_module": {},
+        "duration_by_module": {},
+        "effectiveness_sum": 0.0,
+        "effectiveness_count": 0,
+        "rating_sum": 0,
+        "rating_count": 0,
+    }
+
+
+def daily_increments(session: Dict[str, Any]) -> Dict[str, float]:
+    """$inc deltas that one new session contributes to its day"""
+    duration = session.get("duration_seconds") or 0
+    module = session["module_type"]
+    increments = {
+        "sessions": 1,
+        "duration_seconds": duration,
+        f"sessions_by_module.{module}": 1,
+        f"duration_by_module.{module}": duration,
+    }
+
+    if session.get("effectiveness_score") is not None:
+        increments["effectiveness_sum"] = session["effectiveness_score"]
+        increments["effectiveness_count"] = 1
+
+    if session.get("user_rating") is not None:
+        increments["rating_sum"] = session["user_rating"]
+        increments["rating_count"] = 1
+
+    return increments
+
+
+async def apply_daily_increments(per_day: Dict[DayKey, Dict[str, float]]):
+    """One upsert per (user, day)"""
+    if not per_day:
+        return
+
+    now = datetime.utcnow()
+    await UserDailyStats.get_motor_collection().bulk_write([
+        UpdateOne(
+            {"user_id": user_id, "day": day},
+            {"$inc": increments, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for (user_id, day), increments in per_day.items()
+    ], ordered=False)
+
+
+def merge_increments(totals: Dict[str, float], increments: Dict[str, float]):
+    for field, amount in increments.items():
+        totals[field] = totals.get(field, 0) + amount
+
+
+async def record_daily_sessions(sessions: List[Dict[str, Any]]):
+    """Fold inserted sessions into their users' daily rollups"""
+    per_day: Dict[DayKey, Dict[str, float]] = {}
+    for session in sessions:
+        key = (session["user_id"], bucket_day(session["timestamp"]))
+        merge_increments(per_day.setdefault(key, {}), daily_increments(session))
+    await apply_daily_increments(per_day)
+
+
+async def record_daily_ratings(changes: List[Tuple[str, Optional[int], int, datetime]]):
+    """Apply (user_id, old_rating, new_rating, session timestamp) changes to daily rollups"""
+    per_day: Dict[DayKey, Dict[str, float]] = {}
+    for user_id, old_rating, new_rating, timestamp in changes:
+        if old_rating == new_rating or timestamp is None:
+            continue
+        increments = {"rating_sum": new_rating - (old_rating or 0)}
+        if old_rating is None:
+            increments["rating_count"] = 1
+        merge_increments(per_day.setdefault((user_id, bucket_day(timestamp)), {}), increments)
+    await apply_daily_increments(per_day)
+
+
+async def get_daily_stats(user_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """A user's daily rollups for days in [start, end], oldest first"""
+    return await UserDailyStats.get_motor_collection().find(
+        {"user_id": user_id, "day": {"$gte": start, "$lte": end}}
+    ).sort("day", 1).to_list(length=None)
+
+
+def daily_stats_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Aggregation computing rollup rows per (user, day, module) from sessions"""
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "day": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}},
+                "module_type": "$module_type",
+            },
+            "count": {"$sum": 1},
+            "duration": {"$sum": {"$ifNull": ["$duration_seconds", 0]}},
+            "effectiveness_sum": {"$sum": {"$ifNull": ["$effectiveness_score", 0]}},
+            "effectiveness_count": {"$sum": {"$cond": [{"$isNumber": "$effectiveness_score"}, 1, 0]}},
+            "rating_sum": {"$sum": {"$ifNull": ["$user_rating", 0]}},
+            "rating_count": {"$sum": {"$cond": [{"$isNumber": "$user_rating"}, 1, 0]}},
+        }},
+    ]
+
+
+def fold_daily_rows(rows: List[Dict[str, Any]]) -> Dict[DayKey, Dict[str, Any]]:
+    """Combine aggregation rows into one rollup dict per (user, day)"""
+    rollups: Dict[DayKey, Dict[str, Any]] = {}
+
+    for row in rows:
+        key = row["_id"]
+        rollup = rollups.setdefault((key["user_id"], key["day"]), empty_daily_rollup())
+        module = key["module_type"]
+
+        rollup["sessions"] += row["count"]
+        rollup["duration_seconds"] += row["duration"]
+        rollup["sessions_by_module"][module] = rollup["sessions_by_module"].get(module, 0) + row["count"]
+        rollup["duration_by_module"][module] = rollup["duration_by_module"].get(module, 0) + row["duration"]
+        rollup["effectiveness_sum"] += row["effectiveness_sum"]
+        rollup["effectiveness_count"] += row["effectiveness_count"]
+        rollup["rating_sum"] += row["rating_sum"]
+        rollup["rating_count"] += row["rating_count"]
+
+    return rollups
+
+
+async def compute_daily_rollups(user_id: Optional[str] = None) -> Dict[DayKey, Dict[str, Any]]:
+    """Recompute daily rollups from the sessions (either storage layout)"""
+    match = {"user_id": user_id} if user_id else {}
+    rows = await session_store.aggregate(daily_stats_pipeline(match)).to_list(length=None)
+    return fold_daily_rows(rows)
+
+
+async def rebuild_daily_stats(user_id: Optional[str] = None) -> int:
+    """
+    Backfill daily rollups from the sessions collection ($dateTrunc aggregation)
+
+    Each (user, day) rollup is overwritten in place by an upsert, so /trends
+    never sees a missing day while the rebuild runs. Only days that no longer
+    have sessions are deleted. Sessions written during the rebuild can still
+    be overwritten, so run it while writes are quiet.
+
+    Returns the number of daily documents written.
+    """
+    rollups = await compute_daily_rollups(user_id)
+    collection = UserDailyStats.get_motor_collection()
+
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"user_id": uid, "day": day},
+            {"$set": {**values, "updated_at": now}},
+            upsert=True
+        )
+        for (uid, day), values in rollups.items()
+    ]
+    for start in range(0, len(operations), REBUILD_BATCH_SIZE):
+        await collection.bulk_write(operations[start:start + REBUILD_BATCH_SIZE], ordered=False)
+
+    query = {"user_id": user_id} if user_id else {}
+    stale = [
+        document["_id"]
+        async for document in collection.find(query, {"user_id": 1, "day": 1})
+        if (document["user_id"], document["day"]) not in rollups
+    ]
+    for start in range(0, len(stale), REBUILD_BATCH_SIZE):
+        await collection.delete_many({"_id": {"$in": stale[start:start + REBUILD_BATCH_SIZE]}})
+
+    return len(operations)
+
+
+def values_match(expected: Any, stored: Any) -> bool:
+    if isinstance(expected, float) or isinstance(stored, float):
+        return stored is not None and math.isclose(expected, stored, rel_tol=1e-9, abs_tol=1e-6)
+    return expected == stored
+
+
+async def check_daily_stats_drift(user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Compare stored daily rollups with values recomputed from sessions"""
+    expected = await compute_daily_rollups(user_id)
+
+    query = {"user_id": user_id} if user_id else {}
+    stored = {
+        (doc["user_id"], doc["day"]): doc
+        async for doc in UserDailyStats.get_motor_collection().find(query)
+    }
+
+    drift = []
+    for key in sorted(set(expected) | set(stored)):
+        want = expected.get(key, empty_daily_rollup())
+        # $inc upserts only create the counters they touched
+        have = {**empty_daily_rollup(), **stored.get(key, {})}
+        mismatched = {
+            field: {"expected": want[field], "stored": have.get(field)}
+            for field in DAILY_FIELDS
+            if not values_match(want[field], have.get(field))
+        }
+        if mismatched:
+            drift.append({"user_id": key[0], "day": key[1], "fields": mismatched})
+
+    return drift
+
+
+async def main():
+    """Rebuild or check daily rollups"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from beanie import init_beanie
+    from database.models import MONGODB_URL, DATABASE_NAME, SessionBucket, TrainingSession
+
+    parser = argparse.ArgumentParser(description="Maintain user_daily_stats rollups")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--user", default=None, help="Only process this user ID")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(MONGODB_URL)
+    await init_beanie(
+        database=client[DATABASE_NAME],
+        document_models=[TrainingSession, SessionBucket, UserDailyStats]
+    )
+
+    if args.command == "rebuild":
+        written = await rebuild_daily_stats(args.user)
+        print(f"✓ Rebuilt {written} daily rollups")
+        return True
+
+    drift = await check_daily_stats_drift(args.user)
+    if not drift:
+        print("✓ Daily rollups match the sessions collection")
+        return True
+
+    print(f"⚠️  {len(drift)} daily rollups drifted:")
+    for entry in drift:
+        print(f"  - {entry['user_id']} {entry['day'].date()}")
+        for field, values in entry["fields"].items():
+            print(f"      {field}: stored={values['stored']} expected={values['expected']}")
+    return False
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)
@@ -0,0 +1,247 @@
+"""
+EEG Sample Store
+Framed binary EEG ingestion (float32 or int16 multi-channel samples) parsed
+zero-copy with np.frombuffer, and an append-only sample file per session
+
+Frame layout (little-endian), repeated any number of times per upload:
+
+    magic     4s   b"EEG1"
+    format    B    1 = float32, 2 = int16
+    reserved  B    0
+    channels  H    1..EEG_MAX_CHANNELS
+    rate      f    sample rate (Hz)
+    scale     f    microvolts per unit (1.0 for float32 already in µV)
+    samples   I    samples per channel in this frame
+    payload        samples x channels values, interleaved (sample-major)
+
+Each session is stored as EEG_DATA_DIR/<session_id>.eeg (the raw payloads,
+appended in arrival order) plus <session_id>.json (format, channels, rate,
+scale). The first frame fixes the session's format; the sample count is the
+data file's size, so appends never rewrite anything.
+"""
+
+import json
+import os
+import re
+import struct
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database.metrics import metrics
+
+# Where session sample files are written
+EEG_DATA_DIR = os.getenv("EEG_DATA_DIR", "eeg_data")
+
+# Largest accepted upload (bytes)
+EEG_MAX_BODY_BYTES = int(os.getenv("EEG_MAX_BODY_BYTES", str(16 * 1024 * 1024)))
+
+EEG_MAX_CHANNELS = 1024
+
+FRAME_MAGIC = b"EEG1"
+FRAME_HEADER = struct.Struct("<4sBBHffI")
+
+# Frame format code -> (name, little-endian dtype)
+SAMPLE_FORMATS = {
+    1: ("float32", np.dtype("<f4")),
+    2: ("int16", np.dtype("<i2")),
+}
+FORMAT_DTYPES = {name: dtype for name, dtype in SAMPLE_FORMATS.values()}
+
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class FrameError(ValueError):
+    """An upload that is not a sequence of well-formed frames"""
+
+
+class FormatConflict(ValueError):
+    """A frame whose format differs from the one the session was started with"""
+
+
+class EEGFrame:
+    """One parsed frame; samples is a (samples, channels) view into the upload"""
+
+    __slots__ = ("sample_format", "channels", "sample_rate", "scale", "samples")
+
+    def __init__(self, sample_format: str, channels: int, sample_rate: float, scale: float, samples: np.ndarray):
+        self.sample_format = sample_format
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.scale = scale
+        self.samples = samples
+
+    def layout(self) -> Dict[str, Any]:
+        return {
+            "format": self.sample_format,
+            "channels": self.channels,
+            "sample_rate": self.sample_rate,
+            "scale": self.scale,
+        }
+
+
+def encode_frame(samples: np.ndarray, sample_rate: float, scale: float = 1.0) -> bytes:
+    """Frame a (samples, channels) float32 or int16 array (for clients and benchmarks)"""
+    codes = {dtype: code for code, (_, dtype) in SAMPLE_FORMATS.items()}
+    dtype = np.dtype(samples.dtype).newbyteorder("<")
+    if dtype not in codes or samples.ndim != 2:
+        raise FrameError("Samples must be a 2-D float32 or int16 array")
+    header = FRAME_HEADER.pack(FRAME_MAGIC, codes[dtype], 0, samples.shape[1], sample_rate, scale, samples.shape[0])
+    return header + np.ascontiguousarray(samples, dtype=dtype).tobytes()
+
+
+def parse_frames(body: bytes) -> List[EEGFrame]:
+    """
+    Split an upload into frames without copying the payloads
+
+    Each frame's samples are np.frombuffer views of `body`. Raises FrameError
+    for a bad header or a truncated payload, so nothing is stored from a
+    malformed upload.
+    """
+    frames = []
+    offset = 0
+    while offset < len(body):
+        if len(body) - offset < FRAME_HEADER.size:
+            raise FrameError(f"Truncated frame header at byte {offset}")
+        magic, code, _, channels, sample_rate, scale, count = FRAME_HEADER.unpack_from(body, offset)
+        if magic != FRAME_MAGIC:
+            raise FrameError(f"Bad frame magic at byte {offset}")
+        if code not in SAMPLE_FORMATS:
+            raise FrameError(f"Unknown sample format {code} at byte {offset}")
+        if not 1 <= channels <= EEG_MAX_CHANNELS:
+            raise FrameError(f"Channel count must be 1-{EEG_MAX_CHANNELS}")
+        if not (sample_rate > 0 and np.isfinite(sample_rate)) or not np.isfinite(scale):
+            raise FrameError("Sample rate must be positive and scale finite")
+
+        sample_format, dtype = SAMPLE_FORMATS[code]
+        offset += FRAME_HEADER.size
+        values = count * channels
+        if offset + values * dtype.itemsize > len(body):
+            raise FrameError(f"Truncated frame payload at byte {offset}")
+
+        samples = np.frombuffer(body, dtype=dtype, count=values, offset=offset).reshape(count, channels)
+        frames.append(EEGFrame(sample_format, channels, float(sample_rate), float(scale), samples))
+        offset += values * dtype.itemsize
+    return frames
+
+
+class EEGStore:
+    """Append-only sample files per session, with cached session layouts"""
+
+    def __init__(self, directory: str = EEG_DATA_DIR):
+        self.directory = directory
+        self._layouts: Dict[str, Dict[str, Any]] = {}
+
+    def _paths(self, session_id: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, session_id)
+        return f"{base}.json", f"{base}.eeg"
+
+    def layout(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """The session's format, channels, rate and scale (None if it has no samples)"""
+        layout = self._layouts.get(session_id)
+        if layout is None:
+            try:
+                with open(self._paths(session_id)[0]) as handle:
+                    layout = json.load(handle)
+            except FileNotFoundError:
+                return None
+            self._layouts[session_id] = layout
+        return layout
+
+    def _claim_layout(self, session_id: str, frame: EEGFrame) -> Dict[str, Any]:
+        """Existing layout, or write the frame's (exclusively, so concurrent workers agree)"""
+        layout = self.layout(session_id)
+        if layout is not None:
+            return layout
+
+        os.makedirs(self.directory, exist_ok=True)
+        layout_path = self._paths(session_id)[0]
+        # Unique per call, so concurrent threads and workers never share one
+        descriptor, temporary = tempfile.mkstemp(prefix=f"{session_id}.", suffix=".tmp", dir=self.directory)
+        with os.fdopen(descriptor, "w") as handle:
+            json.dump({**frame.layout(), "created_at": datetime.utcnow().isoformat()}, handle)
+        try:
+            os.link(temporary, layout_path)
+        except FileExistsError:
+            pass  # Another worker started the session first
+        finally:
+            os.remove(temporary)
+        return self.layout(session_id)
+
+    def append(self, session_id: str, frames: List[EEGFrame]) -> Dict[str, Any]:
+        """
+        Append frames to a session (one writev, O_APPEND) and return its totals
+
+        Raises FormatConflict if a frame's layout differs from the session's.
+        """
+        if not frames:
+            raise FrameError("No frames in upload")
+        started = time.perf_counter()
+        layout = self._claim_layout(session_id, frames[0])
+        for frame in frames:
+            if any(layout[key] != value for key, value in frame.layout().items()):
+                raise FormatConflict(
+                    f"Session {session_id} is {layout['channels']}ch {layout['format']} at {layout['sample_rate']:g} Hz"
+                    f" (scale {layout['scale']:g}); frame is {frame.channels}ch {frame.sample_format}"
+                    f" at {frame.sample_rate:g} Hz (scale {frame.scale:g})"
+                )
+
+        buffers = [memoryview(frame.samples).cast("B") for frame in frames if frame.samples.size]
+        written = 0
+        descriptor = os.open(self._paths(session_id)[1], os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            while buffers:
+                written_now = os.writev(descriptor, buffers)
+                written += written_now
+                # Rare short write: drop what was written and retry the rest
+                while buffers and written_now >= len(buffers[0]):
+                    written_now -= len(buffers[0])
+                    buffers.pop(0)
+                if buffers and written_now:
+                    buffers[0] = buffers[0][written_now:]
+            size = os.fstat(descriptor).st_size
+        finally:
+            os.close(descriptor)
+
+        samples = sum(len(frame.samples) for frame in frames)
+        channels = layout["channels"]
+        metrics.counter("eeg_samples_ingested_total", "EEG samples per channel appended").inc(samples)
+        metrics.counter("eeg_values_ingested_total", "EEG values (samples x channels) appended").inc(samples * channels)
+        metrics.counter("eeg_bytes_ingested_total", "EEG payload bytes appended").inc(written)
+        metrics.histogram("eeg_append_seconds", "EEG append time per upload").observe(time.perf_counter() - started)
+
+        total = size // (channels * FORMAT_DTYPES[layout["format"]].itemsize)
+        return {**layout, "appended_samples": samples, "total_samples": total, "seconds": round(total / layout["sample_rate"], 3)}
+
+    def info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Layout plus stored sample count and duration"""
+        layout = self.layout(session_id)
+        if layout is None:
+            return None
+        try:
+            size = os.path.getsize(self._paths(session_id)[1])
+        except FileNotFoundError:
+            size = 0
+        total = size // (layout["channels"] * FORMAT_DTYPES[layout["format"]].itemsize)
+        return {**layout, "total_samples": total, "seconds": round(total / layout["sample_rate"], 3)}
+
+    def read(self, session_id: str, start: int = 0, stop: Optional[int] = None) -> Optional[np.ndarray]:
+        """Samples [start, stop) as a read-only (samples, channels) memory map in the stored dtype"""
+        info = self.info(session_id)
+        if info is None:
+            return None
+        total = info["total_samples"]
+        start, stop = max(start, 0), min(total if stop is None else stop, total)
+        if stop <= start:
+            return np.empty((0, info["channels"]), dtype=FORMAT_DTYPES[info["format"]])
+        samples = np.memmap(
+            self._paths(session_id)[1], dtype=FORMAT_DTYPES[info["format"]], mode="r",
+            shape=(total, info["channels"])
+        )
+        return samples[start:stop]
+
+
+eeg_store = EEGStore()
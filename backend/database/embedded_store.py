@@ -0,0 +1,591 @@
+"""
+Embedded Storage
+SQLite implementation of the repository (STORAGE_BACKEND=sqlite) for small
+single-node deployments and load tests without a MongoDB server
+
+Sessions get the same compound indexes as the MongoDB collection (generated
+from the Beanie IndexModels), so the listing, cursor and stats filters are
+index range scans here too. Rollups live in tables updated in the same
+transaction as the writes, and reads are sub-millisecond point or range
+lookups. All statements run on one dedicated thread, which serializes writes
+without blocking the event loop.
+
+SQLITE_PATH selects the database file (":memory:" for a throwaway store).
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import DESCENDING
+
+from database.daily_stats import fold_daily_rows
+from database.models import BrainKnowledge, TrainingSession
+from database.session_store import bucket_day
+from database.session_stats import fold_stats_rows
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "brain_buddy.db")
+
+EPOCH = datetime(1970, 1, 1)
+
+# Session field -> column; timestamps are stored as epoch milliseconds (BSON precision)
+SESSION_COLUMNS = {
+    "_id": "id",
+    "user_id": "user_id",
+    "module_type": "module_type",
+    "brainwave_target": "brainwave_target",
+    "generated_content": "generated_content",
+    "user_rating": "user_rating",
+    "effectiveness_score": "effectiveness_score",
+    "timestamp": "timestamp",
+    "duration_seconds": "duration_seconds",
+}
+
+SELECTED_COLUMNS = ", ".join(f"sessions.{column}" for column in SESSION_COLUMNS.values())
+SELECT_SESSIONS = f"SELECT {SELECTED_COLUMNS} FROM sessions"
+
+RANGE_OPERATORS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+KNOWLEDGE_COLUMNS = {"_id": "id", "stimulus_type": "stimulus_type", "outcome": "outcome", "evidence_strength": "evidence_strength"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    module_type TEXT NOT NULL,
+    brainwave_target TEXT,
+    generated_content TEXT NOT NULL,
+    user_rating INTEGER,
+    effectiveness_score REAL,
+    timestamp INTEGER NOT NULL,
+    duration_seconds INTEGER
+);
+CREATE TABLE IF NOT EXISTS brain_knowledge (
+    id TEXT PRIMARY KEY,
+    stimulus_type TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    evidence_strength REAL NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_versions (
+    user_id TEXT PRIMARY KEY,
+    epoch TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_session_stats (
+    user_id TEXT NOT NULL,
+    module_type TEXT NOT NULL,
+    brainwave_target TEXT NOT NULL,
+    sessions INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    rating_sum INTEGER NOT NULL,
+    rating_count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, module_type, brainwave_target)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_daily_stats (
+    user_id TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    module_type TEXT NOT NULL,
+    sessions INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    effectiveness_sum REAL NOT NULL,
+    effectiveness_count INTEGER NOT NULL,
+    rating_sum INTEGER NOT NULL,
+    rating_count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, day, module_type)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS collection_versions (
+    collection TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# Rollup upserts; user_session_stats rows are keyed by (user, module, target or '')
+UPSERT_VERSION = """
+INSERT INTO user_versions (user_id, epoch, version) VALUES (?, ?, ?)
+ON CONFLICT (user_id) DO UPDATE SET version = version + excluded.version
+"""
+UPSERT_USER_STATS = """
+INSERT INTO user_session_stats VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, module_type, brainwave_target) DO UPDATE SET
+    sessions = sessions + excluded.sessions,
+    duration = duration + excluded.duration,
+    rating_sum = rating_sum + excluded.rating_sum,
+    rating_count = rating_count + excluded.rating_count
+"""
+UPSERT_DAILY_STATS = """
+INSERT INTO user_daily_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, day, module_type) DO UPDATE SET
+    sessions = sessions + excluded.sessions,
+    duration = duration + excluded.duration,
+    effectiveness_sum = effectiveness_sum + excluded.effectiveness_sum,
+    effectiveness_count = effectiveness_count + excluded.effectiveness_count,
+    rating_sum = rating_sum + excluded.rating_sum,
+    rating_count = rating_count + excluded.rating_count
+"""
+
+
+def to_millis(value: datetime) -> int:
+    """Epoch milliseconds of a naive UTC datetime (truncated like BSON dates)"""
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+def from_millis(value: int) -> datetime:
+    return EPOCH + timedelta(milliseconds=value)
+
+
+def index_statements(table: str, indexes: list, columns: Dict[str, str]) -> List[str]:
+    """CREATE INDEX statements equivalent to a model's Mongo IndexModels"""
+    statements = []
+    for index in indexes:
+        spec = index.document
+        keys = ", ".join(
+            f"{columns[field]} {'DESC' if direction == DESCENDING else 'ASC'}"
+            for field, direction in spec["key"].items()
+        )
+        statements.append(f"CREATE INDEX IF NOT EXISTS {table}_{spec['name']} ON {table} ({keys})")
+    return statements
+
+
+def sql_value(value: Any) -> Any:
+    """Query value in its column representation"""
+    if isinstance(value, datetime):
+        return to_millis(value)
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+def where_clause(query: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    Translate a session query to SQL
+
+    Supports the shapes the API builds: equality on any field, $in on _id,
+    range operators ($gt/$gte/$lt/$lte) and $or of such queries.
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+
+    for field, condition in query.items():
+        if field == "$or":
+            parts = [where_clause(branch) for branch in condition]
+            clauses.append("(" + " OR ".join(f"({sql})" for sql, _ in parts) + ")")
+            for _, branch_params in parts:
+                params.extend(branch_params)
+            continue
+
+        if field not in SESSION_COLUMNS:
+            raise ValueError(f"Unsupported session query field: {field}")
+        column = f"sessions.{SESSION_COLUMNS[field]}"
+
+        if not isinstance(condition, dict):
+            if condition is None:
+                clauses.append(f"{column} IS NULL")
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(sql_value(condition))
+            continue
+
+        for operator, value in condition.items():
+            if operator == "$in":
+                values = [sql_value(item) for item in value]
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else "0")
+                params.extend(values)
+            elif operator in RANGE_OPERATORS:
+                clauses.append(f"{column} {RANGE_OPERATORS[operator]} ?")
+                params.append(sql_value(value))
+            else:
+                raise ValueError(f"Unsupported session query operator: {operator}")
+
+    return " AND ".join(clauses) or "1", params
+
+
+def session_row(document: Dict[str, Any]) -> tuple:
+    """Column values for a plain session document"""
+    return (
+        str(document["_id"]),
+        document["user_id"],
+        document["module_type"],
+        document.get("brainwave_target"),
+        json.dumps(document.get("generated_content") or {}, separators=(",", ":"), default=str),
+        document.get("user_rating"),
+        document.get("effectiveness_score"),
+        to_millis(document["timestamp"]),
+        document.get("duration_seconds"),
+    )
+
+
+def session_document(row: tuple) -> Dict[str, Any]:
+    """Plain session document (same shape as the MongoDB documents layout)"""
+    session_id, user_id, module_type, target, content, rating, score, timestamp, duration = row
+    return {
+        "_id": ObjectId(session_id),
+        "user_id": user_id,
+        "module_type": module_type,
+        "brainwave_target": target,
+        "generated_content": json.loads(content),
+        "user_rating": rating,
+        "effectiveness_score": score,
+        "timestamp": from_millis(timestamp),
+        "duration_seconds": duration,
+    }
+
+
+def project(document: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply an inclusion projection (dotted generated_content.<key> paths allowed)"""
+    if not projection:
+        return document
+
+    result = {} if projection.get("_id", 1) == 0 else {"_id": document["_id"]}
+    for field, include in projection.items():
+        if field == "_id" or not include:
+            continue
+        parent, _, key = field.partition(".")
+        if not key:
+            result[field] = document.get(field)
+        elif key in (document.get(parent) or {}):
+            result.setdefault(parent, {})[key] = document[parent][key]
+    return result
+
+
+def stats_rows(rows: Iterable[tuple]) -> List[Dict[str, Any]]:
+    """(user, module, target, count, duration, rating_sum, rating_count) rows -> fold_stats_rows input"""
+    return [
+        {
+            "_id": {"user_id": user_id, "module_type": module, "brainwave_target": target or None},
+            "count": count,
+            "duration": duration,
+            "rating_sum": rating_sum,
+            "rating_count": rating_count,
+        }
+        for user_id, module, target, count, duration, rating_sum, rating_count in rows
+    ]
+
+
+class SQLiteRepository:
+    """Repository over an embedded SQLite database"""
+
+    backend = "sqlite"
+    embedded = True
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def _run(self, function, *args):
+        """Run a blocking database call on the store's thread"""
+        if self._connection is None:
+            raise RuntimeError("Embedded store is not connected")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def connect(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._connection = await asyncio.get_running_loop().run_in_executor(self._executor, self._open)
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        for statement in (
+            index_statements("sessions", TrainingSession.Settings.indexes, SESSION_COLUMNS)
+            + index_statements("brain_knowledge", BrainKnowledge.Settings.indexes, KNOWLEDGE_COLUMNS)
+        ):
+            connection.execute(statement)
+        connection.commit()
+        return connection
+
+    async def close(self):
+        if self._connection is None:
+            return
+        await self._run(self._connection.close)
+        self._connection = None
+        self._executor.shutdown()
+
+    async def status(self) -> Dict[str, Any]:
+        if self._connection is None:
+            return {"status": "disconnected", "database": None, "backend": self.backend}
+        try:
+            await self._run(self._fetch_one, "SELECT 1", ())
+            return {"status": "connected", "database": self.path, "backend": self.backend}
+        except Exception as e:
+            return {"status": "error", "error": str(e), "backend": self.backend}
+
+    def _fetch_all(self, sql: str, params) -> List[tuple]:
+        return self._connection.execute(sql, params).fetchall()
+
+    def _fetch_one(self, sql: str, params) -> Optional[tuple]:
+        return self._connection.execute(sql, params).fetchone()
+
+    # Sessions
+
+    async def find_sessions(
+        self,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, int]] = None,
+        skip: int = 0,
+        limit: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Sessions matching a query, newest first (served by the matching timestamp index)"""
+        where, params = where_clause(query)
+        rows = await self._run(
+            self._fetch_all,
+            f"{SELECT_SESSIONS} WHERE {where} ORDER BY sessions.timestamp DESC, sessions.id DESC LIMIT ? OFFSET ?",
+            (*params, limit or -1, skip)
+        )
+        return [project(session_document(row), projection) for row in rows]
+
+    async def get_session(self, session_id: ObjectId) -> Optional[Dict[str, Any]]:
+        row = await self._run(self._fetch_one, f"{SELECT_SESSIONS} WHERE id = ?", (str(session_id),))
+        return session_document(row) if row else None
+
+    async def count_sessions(self, query: Dict[str, Any]) -> int:
+        where, params = where_clause(query)
+        row = await self._run(self._fetch_one, f"SELECT COUNT(*) FROM sessions WHERE {where}", params)
+        return row[0]
+
+    async def iter_sessions(
+        self,
+        query: Dict[str, Any],
+        batch_size: int,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Matching sessions in natural (rowid) order, one keyset batch per round trip"""
+        where, params = where_clause(query)
+        sql = (
+            f"SELECT sessions.rowid, {SELECTED_COLUMNS} FROM sessions "
+            f"WHERE {where} AND sessions.rowid > ? ORDER BY sessions.rowid LIMIT ?"
+        )
+        last = 0
+        while True:
+            rows = await self._run(self._fetch_all, sql, (*params, last, batch_size))
+            for row in rows:
+                yield project(session_document(row[1:]), projection)
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][0]
+
+    async def generated_content_keys(self, query: Dict[str, Any]) -> List[str]:
+        where, params = where_clause(query)
+        rows = await self._run(
+            self._fetch_all,
+            f"SELECT DISTINCT content.key FROM sessions, json_each(sessions.generated_content) AS content WHERE {where}",
+            params
+        )
+        return sorted(row[0] for row in rows)
+
+    async def insert_sessions(self, documents: List[Dict[str, Any]]) -> Dict[int, str]:
+        """
+        Insert plain session documents and fold them into the rollups (one transaction)
+
+        Returns {index: error message} for rows that failed (duplicate _ids).
+        """
+        if not documents:
+            return {}
+        return await self._run(self._insert_sessions, documents)
+
+    def _insert_sessions(self, documents: List[Dict[str, Any]]) -> Dict[int, str]:
+        connection = self._connection
+        ids = [str(document["_id"]) for document in documents]
+        existing = set()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            existing.update(row[0] for row in connection.execute(
+                f"SELECT id FROM sessions WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            ))
+
+        failed: Dict[int, str] = {}
+        inserted = []
+        for index, (session_id, document) in enumerate(zip(ids, documents)):
+            if session_id in existing:
+                failed[index] = f"Duplicate session _id {session_id}"
+                continue
+            existing.add(session_id)
+            inserted.append(document)
+
+        # Per-batch rollup deltas, one upsert per key
+        versions: Dict[str, int] = {}
+        user_stats: Dict[tuple, List[int]] = {}  # sessions, duration, rating_sum, rating_count
+        daily_stats: Dict[tuple, List[float]] = {}  # ... plus effectiveness_sum, effectiveness_count
+        for document in inserted:
+            user_id, module = document["user_id"], document["module_type"]
+            duration = document.get("duration_seconds") or 0
+            rating = document.get("user_rating")
+            score = document.get("effectiveness_score")
+            versions[user_id] = versions.get(user_id, 0) + 1
+
+            totals = user_stats.setdefault((user_id, module, document.get("brainwave_target") or ""), [0, 0, 0, 0])
+            totals[0] += 1
+            totals[1] += duration
+            if rating is not None:
+                totals[2] += rating
+                totals[3] += 1
+
+            day = daily_stats.setdefault((user_id, to_millis(bucket_day(document["timestamp"])), module), [0, 0, 0, 0, 0.0, 0])
+            day[0] += 1
+            day[1] += duration
+            if rating is not None:
+                day[2] += rating
+                day[3] += 1
+            if score is not None:
+                day[4] += score
+                day[5] += 1
+
+        with connection:
+            connection.executemany(
+                "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", map(session_row, inserted)
+            )
+            connection.executemany(UPSERT_VERSION, [(user_id, str(ObjectId()), count) for user_id, count in versions.items()])
+            connection.executemany(UPSERT_USER_STATS, [(*key, *values) for key, values in user_stats.items()])
+            connection.executemany(UPSERT_DAILY_STATS, [
+                (*key, sessions, duration, effectiveness_sum, effectiveness_count, rating_sum, rating_count)
+                for key, (sessions, duration, rating_sum, rating_count, effectiveness_sum, effectiveness_count)
+                in daily_stats.items()
+            ])
+
+        return failed
+
+    async def set_session_rating(self, session_id: ObjectId, rating: int) -> Optional[str]:
+        """Set a session's rating and apply the delta to its rollups; returns the user_id"""
+        return (await self._run(self._write_ratings, {session_id: rating})).get(session_id)
+
+    async def write_ratings(self, pending: Dict[ObjectId, int]):
+        """Apply many ratings in one transaction (unknown sessions are dropped)"""
+        await self._run(self._write_ratings, pending)
+
+    def _write_ratings(self, pending: Dict[ObjectId, int]) -> Dict[ObjectId, str]:
+        connection = self._connection
+        users: Dict[ObjectId, str] = {}
+
+        with connection:
+            for session_id, rating in pending.items():
+                row = connection.execute(
+                    "SELECT user_id, module_type, brainwave_target, timestamp, user_rating FROM sessions WHERE id = ?",
+                    (str(session_id),)
+                ).fetchone()
+                if not row:
+                    continue
+
+                user_id, module, target, timestamp, old_rating = row
+                users[session_id] = user_id
+                if old_rating == rating:
+                    continue
+
+                delta, counted = rating - (old_rating or 0), int(old_rating is None)
+                connection.execute("UPDATE sessions SET user_rating = ? WHERE id = ?", (rating, str(session_id)))
+                connection.execute(UPSERT_VERSION, (user_id, str(ObjectId()), 1))
+                connection.execute(UPSERT_USER_STATS, (user_id, module, target or "", 0, 0, delta, counted))
+                connection.execute(
+                    UPSERT_DAILY_STATS,
+                    (user_id, to_millis(bucket_day(from_millis(timestamp))), module, 0, 0, 0.0, 0, delta, counted)
+                )
+
+        return users
+
+    # Rollups
+
+    async def user_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """A user's all-time rollup: version stamp plus the folded per-module rows"""
+        return await self._run(self._user_stats, user_id)
+
+    def _user_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
+        stamp = self._fetch_one("SELECT epoch, version FROM user_versions WHERE user_id = ?", (user_id,))
+        if not stamp:
+            return None
+        rows = self._fetch_all("SELECT * FROM user_session_stats WHERE user_id = ?", (user_id,))
+        rollup = fold_stats_rows(stats_rows(rows)).get(user_id, {})
+        return {"_id": stamp[0], "user_id": user_id, "version": stamp[1], **rollup}
+
+    async def user_version_stamp(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = await self._run(self._fetch_one, "SELECT epoch, version FROM user_versions WHERE user_id = ?", (user_id,))
+        return {"_id": row[0], "version": row[1]} if row else None
+
+    async def window_stats(self, user_id: str, since: datetime) -> Optional[Dict[str, Any]]:
+        """Rollup values over a user's sessions since a time (range scan on user_timestamp)"""
+        rows = await self._run(
+            self._fetch_all,
+            """
+            SELECT user_id, module_type, brainwave_target, COUNT(*), COALESCE(SUM(duration_seconds), 0),
+                   COALESCE(SUM(user_rating), 0), COUNT(user_rating)
+            FROM sessions WHERE user_id = ? AND timestamp >= ?
+            GROUP BY module_type, brainwave_target
+            """,
+            (user_id, to_millis(since))
+        )
+        return fold_stats_rows(stats_rows(rows)).get(user_id)
+
+    async def daily_stats(self, user_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """A user's daily rollups for days in [start, end], oldest first"""
+        rows = await self._run(
+            self._fetch_all,
+            "SELECT * FROM user_daily_stats WHERE user_id = ? AND day BETWEEN ? AND ?",
+            (user_id, to_millis(start), to_millis(end))
+        )
+        rollups = fold_daily_rows([
+            {
+                "_id": {"user_id": row_user, "day": from_millis(day), "module_type": module},
+                "count": count,
+                "duration": duration,
+                "effectiveness_sum": effectiveness_sum,
+                "effectiveness_count": effectiveness_count,
+                "rating_sum": rating_sum,
+                "rating_count": rating_count,
+            }
+            for row_user, day, module, count, duration, effectiveness_sum, effectiveness_count, rating_sum, rating_count in rows
+        ])
+        return [
+            {"user_id": row_user, "day": day, **values}
+            for (row_user, day), values in sorted(rollups.items(), key=lambda item: item[0][1])
+        ]
+
+    # Knowledge
+
+    async def knowledge_entries(self) -> List[Dict[str, Any]]:
+        rows = await self._run(self._fetch_all, "SELECT id, document FROM brain_knowledge", ())
+        entries = []
+        for knowledge_id, document in rows:
+            entry = {"_id": ObjectId(knowledge_id), **json.loads(document)}
+            entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+            entries.append(entry)
+        return entries
+
+    async def insert_knowledge(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Insert knowledge entries and bump the collection version (one transaction)"""
+        documents = [
+            {"stimulus_parameters": {}, "citations": [], "created_at": datetime.utcnow(), **entry}
+            for entry in entries
+        ]
+        if documents:
+            await self._run(self._insert_knowledge, documents)
+        return len(documents)
+
+    def _insert_knowledge(self, documents: List[Dict[str, Any]]):
+        with self._connection as connection:
+            connection.executemany(
+                "INSERT INTO brain_knowledge VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        str(ObjectId()),
+                        document["stimulus_type"],
+                        document["outcome"],
+                        document["evidence_strength"],
+                        json.dumps(document, default=lambda value: value.isoformat()),
+                    )
+                    for document in documents
+                ]
+            )
+            connection.execute(
+                "INSERT INTO collection_versions VALUES ('brain_knowledge', 1) "
+                "ON CONFLICT (collection) DO UPDATE SET version = version + 1"
+            )
+
+    async def collection_version(self, collection: str) -> int:
+        row = await self._run(self._fetch_one, "SELECT version FROM collection_versions WHERE collection = ?", (collection,))
+        return row[0] if row else 0
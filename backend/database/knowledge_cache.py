@@ -0,0 +1,126 @@
+"""
+Brain Knowledge Cache
+In-process copy of the brain_knowledge collection, indexed by stimulus_type and
+outcome and pre-sorted by evidence_strength, so knowledge queries skip storage
+"""
+
+import asyncio
+import heapq
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from database.repository import KNOWLEDGE_COLLECTION, repository
+
+# How often (seconds) a worker checks the shared version stamp for changes
+KNOWLEDGE_CACHE_CHECK_SECONDS = float(os.getenv("KNOWLEDGE_CACHE_CHECK_SECONDS", "5"))
+
+
+def _sort_key(document: Dict[str, Any]):
+    """Descending evidence_strength, _id as a stable tie-breaker"""
+    return (-document["evidence_strength"], str(document["_id"]))
+
+
+class KnowledgeCache:
+    """
+    Versioned in-memory index of the knowledge base
+
+    Writers bump the `brain_knowledge` version stamp (see database/versions.py);
+    each worker compares it at most every KNOWLEDGE_CACHE_CHECK_SECONDS and
+    reloads the whole (small) collection when it changed.
+    """
+
+    def __init__(self, check_interval: float = KNOWLEDGE_CACHE_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self.version: Optional[int] = None
+        self.checked_at = 0.0
+        self._entries: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_stimulus: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_outcome: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag for any representation built from the loaded version"""
+        return f'"knowledge-v{self.version}"'
+
+    async def load(self):
+        """Load the collection and rebuild the indexes"""
+        version = await repository.collection_version(KNOWLEDGE_COLLECTION)
+        documents = await repository.knowledge_entries()
+        documents.sort(key=_sort_key)
+
+        by_stimulus: Dict[str, List[Dict[str, Any]]] = {}
+        by_outcome: Dict[str, List[Dict[str, Any]]] = {}
+        for document in documents:
+            by_stimulus.setdefault(document["stimulus_type"], []).append(document)
+            by_outcome.setdefault(document["outcome"], []).append(document)
+
+        # Swap everything at once so readers never see a half-built index
+        self._entries = documents
+        self._by_id = {str(document["_id"]): document for document in documents}
+        self._by_stimulus = by_stimulus
+        self._by_outcome = by_outcome
+        self.version = version
+        self.checked_at = time.monotonic()
+
+    async def refresh(self):
+        """Reload if the version stamp moved (checked at most once per interval)"""
+        if self.version is not None and time.monotonic() - self.checked_at < self.check_interval:
+            return
+
+        async with self._lock:
+            if self.version is not None and time.monotonic() - self.checked_at < self.check_interval:
+                return
+
+            if self.version is None or await repository.collection_version(KNOWLEDGE_COLLECTION) != self.version:
+                await self.load()
+            else:
+                self.checked_at = time.monotonic()
+
+    def invalidate(self):
+        """Force a version check on the next refresh()"""
+        self.checked_at = 0.0
+
+    def query(
+        self,
+        stimulus_type: Optional[str] = None,
+        outcome: Optional[str] = None,
+        min_evidence: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Answer a knowledge listing filter from memory, sorted by -evidence_strength"""
+        if stimulus_type:
+            candidates = self._by_stimulus.get(stimulus_type, [])
+        elif outcome:
+            candidates = self._by_outcome.get(outcome, [])
+        else:
+            candidates = self._entries
+
+        results = []
+        for document in candidates:
+            # Candidates are sorted, so nothing past this point can qualify
+            if min_evidence is not None and document["evidence_strength"] < min_evidence:
+                break
+            if outcome and document["outcome"] != outcome:
+                continue
+            results.append(document)
+            if limit and len(results) >= limit:
+                break
+
+        return results
+
+    def get(self, knowledge_id: str) -> Optional[Dict[str, Any]]:
+        """Look up one entry by its ObjectId string"""
+        return self._by_id.get(knowledge_id)
+
+    def for_stimuli(self, stimulus_types: Iterable[str]) -> List[Dict[str, Any]]:
+        """Entries for any of the stimulus types, merged in -evidence_strength order"""
+        return list(heapq.merge(
+            *(self._by_stimulus.get(stimulus, []) for stimulus in dict.fromkeys(stimulus_types)),
+            key=_sort_key
+        ))
+
+
+knowledge_cache = KnowledgeCache()
@@ -0,0 +1,66 @@
+"""
+Index Management
+Create (and optionally prune) the indexes declared on the document models, so
+API workers can start with MANAGE_INDEXES=false
+
+Usage:
+    python database/manage_indexes.py              # create missing indexes
+    python database/manage_indexes.py --drop-unknown
+    python database/manage_indexes.py --list       # only show existing indexes
+
+Run it once per deploy (before the workers restart) or keep MANAGE_INDEXES
+enabled on a single designated process instead.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database.models import DOCUMENT_MODELS, close_db, init_db
+from database.repository import repository
+
+
+async def main():
+    """Create the declared indexes and list what each collection has"""
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes for the document models")
+    parser.add_argument(
+        "--drop-unknown",
+        action="store_true",
+        help="Also drop indexes that no model declares (Beanie allow_index_dropping)"
+    )
+    parser.add_argument("--list", action="store_true", help="Only list existing indexes")
+    args = parser.parse_args()
+
+    if repository.embedded:
+        # The embedded store creates its (IF NOT EXISTS) indexes when opened
+        started = time.perf_counter()
+        await repository.connect()
+        await repository.close()
+        print(f"✓ SQLite indexes ensured at {repository.path} in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return True
+
+    started = time.perf_counter()
+    try:
+        await init_db(manage_indexes=not args.list, allow_index_dropping=args.drop_unknown)
+    except Exception as e:
+        print(f"❌ Index management failed: {e}")
+        return False
+    elapsed = time.perf_counter() - started
+
+    for model in DOCUMENT_MODELS:
+        indexes = await model.get_motor_collection().index_information()
+        print(f"  {model.get_collection_name()}: {', '.join(sorted(indexes))}")
+
+    if not args.list:
+        print(f"✓ Indexes ensured for {len(DOCUMENT_MODELS)} collections in {elapsed:.2f}s")
+
+    await close_db()
+    return True
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)
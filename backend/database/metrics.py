@@ -0,0 +1,173 @@
+"""
+In-Process Metrics
+Lock-cheap counters, gauges and fixed-bucket histograms shared by the database
+driver listeners and the API, with no external service
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds) from 0.5ms to 10s
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """Monotonic counter"""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down (in-flight requests, open connections)"""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Histogram:
+    """Fixed-bucket histogram; buckets are upper bounds, +Inf is implicit"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """(upper bound, cumulative count) pairs ending with +Inf"""
+        with self._lock:
+            counts = list(self.counts)
+        running = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate quantile (upper bound of the bucket holding it)"""
+        pairs = self.cumulative()
+        total = pairs[-1][1]
+        if not total:
+            return None
+        rank = q * total
+        for bound, running in pairs:
+            if running >= rank:
+                return bound
+        return pairs[-1][0]
+
+
+class MetricFamily:
+    """All label combinations of one named metric"""
+
+    def __init__(self, name: str, kind: str, help_text: str, buckets: Optional[Sequence[float]] = None):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.buckets = buckets
+        self.series: Dict[LabelSet, Any] = {}
+
+
+class MetricsRegistry:
+    """
+    Get-or-create registry of metric families
+
+    Metrics are created on first use and cached per label set, so hot paths
+    should keep a reference to the returned metric rather than looking it up
+    on every call.
+    """
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, kind: str, help_text: str, labels: Dict[str, str], factory, buckets=None):
+        key = tuple(sorted((label, str(value)) for label, value in labels.items()))
+        family = self.families.get(name)
+        if family is not None:
+            metric = family.series.get(key)
+            if metric is not None:
+                return metric
+
+        with self._lock:
+            family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = MetricFamily(name, kind, help_text, buckets)
+            elif family.kind != kind:
+                raise ValueError(f"Metric {name} is already registered as a {family.kind}")
+            return family.series.setdefault(key, factory())
+
+    def counter(self, name: str, help_text: str = "", **labels) -> Counter:
+        return self._get(name, "counter", help_text, labels, Counter)
+
+    def gauge(self, name: str, help_text: str = "", **labels) -> Gauge:
+        return self._get(name, "gauge", help_text, labels, Gauge)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str = "",
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        **labels
+    ) -> Histogram:
+        return self._get(name, "histogram", help_text, labels, lambda: Histogram(buckets), buckets)
+
+    def histogram_summary(self, name: str) -> Dict[str, Dict[str, Any]]:
+        """Count, mean and approximate p50/p95/p99 per label set of a histogram"""
+        family = self.families.get(name)
+        if family is None:
+            return {}
+
+        summary = {}
+        for key, histogram in list(family.series.items()):
+            if not histogram.count:
+                continue
+            label = ",".join(value for _, value in key) or "all"
+            summary[label] = {
+                "count": histogram.count,
+                "mean_ms": round(histogram.sum / histogram.count * 1000, 3),
+                "p50_ms": _ms(histogram.quantile(0.5)),
+                "p95_ms": _ms(histogram.quantile(0.95)),
+                "p99_ms": _ms(histogram.quantile(0.99)),
+            }
+        return summary
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    if seconds is None or seconds == float("inf"):
+        return None
+    return round(seconds * 1000, 3)
+
+
+metrics = MetricsRegistry()
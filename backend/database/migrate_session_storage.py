@@ -0,0 +1,215 @@
+"""
+Session Storage Migration and Benchmark
+Copy training sessions between the per-session and per-user-per-day bucket
+layouts, and compare the two on storage size and range-query latency
+
+Usage:
+    python database/migrate_session_storage.py migrate --to buckets
+    python database/migrate_session_storage.py migrate --to documents --clear-target
+    python database/migrate_session_storage.py benchmark --users 20 --days 30
+
+Migration copies sessions (keeping their _ids, so rollups, ETags and client
+links stay valid) and leaves the source collection in place. Point the API at
+the new layout with SESSION_STORAGE once it has finished.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from beanie import init_beanie
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database.models import MONGODB_URL, DATABASE_NAME, SessionBucket, TrainingSession, UserSessionStats
+from database.session_store import SESSION_BUCKET_SIZE, SessionStore, bucket_day, to_bucket_entry
+
+load_dotenv()
+
+MIGRATION_BATCH_SIZE = 1000
+
+
+async def migrate_to_buckets(source: SessionStore, target: SessionStore, batch_size: int) -> int:
+    """Pack sessions into full buckets, streaming them in (user_id, timestamp) order"""
+    cursor = source.collection().find({}).sort(
+        [("user_id", 1), ("timestamp", -1), ("_id", -1)]
+    ).batch_size(batch_size)
+
+    buckets: List[Dict[str, Any]] = []
+    pending = 0
+    migrated = 0
+
+    async def flush():
+        nonlocal pending
+        if buckets:
+            await target.collection().insert_many(buckets, ordered=False)
+            buckets.clear()
+            pending = 0
+
+    async for document in cursor:
+        key = (document["user_id"], bucket_day(document["timestamp"]))
+        bucket = buckets[-1] if buckets else None
+
+        if bucket is None or (bucket["user_id"], bucket["day"]) != key or bucket["session_count"] >= SESSION_BUCKET_SIZE:
+            if pending >= batch_size:
+                await flush()
+            bucket = {"_id": ObjectId(), "user_id": key[0], "day": key[1], "session_count": 0, "sessions": []}
+            buckets.append(bucket)
+
+        bucket["sessions"].append(to_bucket_entry(document))
+        bucket["session_count"] += 1
+        pending += 1
+        migrated += 1
+
+    await flush()
+
+    return migrated
+
+
+async def migrate_to_documents(source: SessionStore, target: SessionStore, batch_size: int) -> int:
+    """Unwind buckets back into one document per session"""
+    batch: List[Dict[str, Any]] = []
+    migrated = 0
+
+    async for document in source.cursor({}, batch_size):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            await target.insert_many(batch)
+            migrated += len(batch)
+            batch = []
+
+    if batch:
+        await target.insert_many(batch)
+        migrated += len(batch)
+
+    return migrated
+
+
+async def migrate(layout: str, batch_size: int, clear_target: bool) -> bool:
+    """Copy every session into the given layout"""
+    target = SessionStore(layout)
+    source = SessionStore("documents" if target.bucketed else "buckets")
+
+    existing = await target.collection().count_documents({})
+    if existing and not clear_target:
+        print(f"❌ {target.collection().name} already holds {existing} documents (use --clear-target)")
+        return False
+    if existing:
+        await target.collection().delete_many({})
+        print(f"✓ Cleared {existing} documents from {target.collection().name}")
+
+    started = time.perf_counter()
+    if target.bucketed:
+        migrated = await migrate_to_buckets(source, target, batch_size)
+    else:
+        migrated = await migrate_to_documents(source, target, batch_size)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+
+    print(f"✓ Migrated {migrated} sessions to the {layout} layout in {elapsed:.1f}s ({migrated / elapsed:,.0f}/s)")
+    print(f"  Set SESSION_STORAGE={layout} to serve sessions from {target.collection().name}")
+    return True
+
+
+async def collection_size(database, name: str) -> Dict[str, Any]:
+    """Document count and sizes (bytes) of a collection"""
+    stats = await database.command("collStats", name)
+    return {
+        "documents": stats.get("count", 0),
+        "size": stats.get("size", 0),
+        "storage": stats.get("storageSize", 0),
+        "indexes": stats.get("totalIndexSize", 0),
+    }
+
+
+def latency_summary(samples: List[float]) -> str:
+    """p50/p95/mean in milliseconds"""
+    if len(samples) < 2:
+        return "n/a"
+    cuts = statistics.quantiles(samples, n=20)
+    return f"p50 {cuts[9] * 1000:7.2f}ms  p95 {cuts[18] * 1000:7.2f}ms  mean {statistics.mean(samples) * 1000:7.2f}ms"
+
+
+async def benchmark(database, users: int, days: int, limit: int, repeat: int) -> bool:
+    """Compare storage size and per-user range-query latency of both layouts"""
+    print("\nStorage:")
+    for layout in ("documents", "buckets"):
+        name = SessionStore(layout).collection().name
+        sizes = await collection_size(database, name)
+        print(
+            f"  {layout:<10} {sizes['documents']:>10} docs  data {sizes['size'] / 1e6:8.1f} MB  "
+            f"storage {sizes['storage'] / 1e6:8.1f} MB  indexes {sizes['indexes'] / 1e6:8.1f} MB"
+        )
+
+    # Heaviest users first: the timelines where the layouts differ most
+    user_ids = [
+        document["user_id"]
+        async for document in UserSessionStats.get_motor_collection().find(
+            {}, {"user_id": 1}
+        ).sort("total_sessions", -1).limit(users)
+    ]
+    if not user_ids:
+        print("⚠️  No user_session_stats rollups to pick users from (run session_stats.py rebuild)")
+        return False
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    print(f"\nRange queries ({len(user_ids)} users x {repeat} runs, last {days} days, limit {limit}):")
+
+    for layout in ("documents", "buckets"):
+        store = SessionStore(layout)
+        listing, counting = [], []
+
+        for _ in range(repeat):
+            for user_id in user_ids:
+                query = {"user_id": user_id, "timestamp": {"$gte": cutoff}}
+
+                started = time.perf_counter()
+                await store.find(query, limit=limit)
+                listing.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                await store.count(query)
+                counting.append(time.perf_counter() - started)
+
+        print(f"  {layout:<10} list   {latency_summary(listing)}")
+        print(f"  {layout:<10} count  {latency_summary(counting)}")
+
+    return True
+
+
+async def main():
+    """Migrate between layouts or benchmark them"""
+    parser = argparse.ArgumentParser(description="Migrate and benchmark session storage layouts")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subcommands.add_parser("migrate", help="Copy sessions into another layout")
+    migrate_parser.add_argument("--to", choices=["buckets", "documents"], required=True)
+    migrate_parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    migrate_parser.add_argument("--clear-target", action="store_true", help="Empty the target collection first")
+
+    benchmark_parser = subcommands.add_parser("benchmark", help="Compare size and range-query latency")
+    benchmark_parser.add_argument("--users", type=int, default=20, help="Number of (heaviest) users to query")
+    benchmark_parser.add_argument("--days", type=int, default=30, help="Range length in days")
+    benchmark_parser.add_argument("--limit", type=int, default=100, help="Listing page size")
+    benchmark_parser.add_argument("--repeat", type=int, default=5, help="Runs per user")
+
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(MONGODB_URL)
+    database = client[DATABASE_NAME]
+    await init_beanie(database=database, document_models=[TrainingSession, SessionBucket, UserSessionStats])
+
+    if args.command == "migrate":
+        return await migrate(args.to, args.batch_size, args.clear_target)
+    return await benchmark(database, args.users, args.days, args.limit, args.repeat)
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)
@@ -3,11 +3,13 @@ Database Configuration for MongoDB
 Beanie ODM models and database setup
 """
 
-from beanie import Document, Link, init_beanie
+from beanie import Document, Link
+from beanie.odm.utils.init import Initializer
 from pydantic import Field, EmailStr
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
 import os
 from dotenv import load_dotenv
 
@@ -17,10 +19,37 @@ load_dotenv()
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = "brain_buddy"
 
+# Connection pool and wire settings (unset values keep the driver defaults)
+MONGODB_POOL_SETTINGS = {
+    "maxPoolSize": ("MONGODB_MAX_POOL_SIZE", int),
+    "minPoolSize": ("MONGODB_MIN_POOL_SIZE", int),
+    "maxIdleTimeMS": ("MONGODB_MAX_IDLE_TIME_MS", int),
+    "waitQueueTimeoutMS": ("MONGODB_WAIT_QUEUE_TIMEOUT_MS", int),
+    "serverSelectionTimeoutMS": ("MONGODB_SERVER_SELECTION_TIMEOUT_MS", int),
+    "connectTimeoutMS": ("MONGODB_CONNECT_TIMEOUT_MS", int),
+    "compressors": ("MONGODB_COMPRESSORS", str),  # e.g. "zstd,snappy,zlib"
+    "zlibCompressionLevel": ("MONGODB_ZLIB_LEVEL", int),
+}
+
+# Whether this process checks and creates indexes at startup. Set it to false on
+# API workers and let one designated process (or database/manage_indexes.py at
+# deploy time) manage them, so rolling restarts skip a round trip per model.
+MANAGE_INDEXES = os.getenv("MANAGE_INDEXES", "true").lower() not in ("0", "false", "no")
+
 # Global client variable
 mongo_client: Optional[AsyncIOMotorClient] = None
 
 
+def mongo_client_options() -> Dict[str, Any]:
+    """AsyncIOMotorClient keyword options from MONGODB_* environment variables"""
+    options = {}
+    for option, (env_var, cast) in MONGODB_POOL_SETTINGS.items():
+        value = os.getenv(env_var)
+        if value:
+            options[option] = cast(value)
+    return options
+
+
 # Models
 
 class User(Document):
@@ -51,10 +80,53 @@ class TrainingSession(Document):
     
     class Settings:
         name = "sessions"
+        # Equality fields first, then the (-timestamp, -_id) sort key, so every
+        # listing/stats filter combination and keyset cursor is served without
+        # an in-memory SORT
         indexes = [
-            "user_id",
-            "module_type",
-            "timestamp",
+            IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp_id"),
+            IndexModel(
+                [("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                name="user_timestamp"
+            ),
+            IndexModel(
+                [("user_id", ASCENDING), ("module_type", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                name="user_module_timestamp"
+            ),
+            IndexModel(
+                [("user_id", ASCENDING), ("brainwave_target", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                name="user_brainwave_timestamp"
+            ),
+            IndexModel(
+                [("module_type", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                name="module_timestamp"
+            ),
+            IndexModel(
+                [("brainwave_target", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                name="brainwave_timestamp"
+            ),
+        ]
+
+
+class SessionBucket(Document):
+    """
+    One user's sessions for one UTC day (SESSION_STORAGE=buckets layout)
+    
+    Sessions are stored as compact entries with short keys (see
+    database/session_store.py); a busy day spills into extra buckets once
+    `session_count` reaches SESSION_BUCKET_SIZE.
+    """
+    user_id: str  # Reference to User
+    day: datetime  # UTC midnight
+    session_count: int = Field(default=0)
+    sessions: List[Dict[str, Any]] = Field(default_factory=list)
+    
+    class Settings:
+        name = "session_buckets"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("day", DESCENDING)], name="user_day"),
+            IndexModel([("day", DESCENDING)], name="day"),
+            IndexModel([("sessions._id", ASCENDING)], name="session_id"),
         ]
 
 
@@ -69,9 +141,63 @@ class BrainKnowledge(Document):
     
     class Settings:
         name = "brain_knowledge"
+        # Filters are followed by the -evidence_strength sort key
+        indexes = [
+            IndexModel([("evidence_strength", DESCENDING)], name="evidence"),
+            IndexModel([("stimulus_type", ASCENDING), ("evidence_strength", DESCENDING)], name="stimulus_evidence"),
+            IndexModel([("outcome", ASCENDING), ("evidence_strength", DESCENDING)], name="outcome_evidence"),
+        ]
+
+
+class UserSessionStats(Document):
+    """Per-user rollup of training session statistics (maintained incrementally)"""
+    user_id: str  # Reference to User
+    total_sessions: int = Field(default=0)
+    total_duration_seconds: int = Field(default=0)
+    rating_sum: int = Field(default=0)
+    rating_count: int = Field(default=0)
+    sessions_by_module: Dict[str, int] = Field(default_factory=dict)
+    sessions_by_brainwave: Dict[str, int] = Field(default_factory=dict)
+    version: int = Field(default=0)  # Bumped on every change, used for ETags
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "user_session_stats"
         indexes = [
-            "stimulus_type",
-            "outcome",
+            IndexModel([("user_id", ASCENDING)], unique=True),
+        ]
+
+
+class UserDailyStats(Document):
+    """Per-user per-day session totals (maintained incrementally, feeds trends)"""
+    user_id: str  # Reference to User
+    day: datetime  # UTC midnight
+    sessions: int = Field(default=0)
+    duration_seconds: int = Field(default=0)
+    sessions_by_module: Dict[str, int] = Field(default_factory=dict)
+    duration_by_module: Dict[str, int] = Field(default_factory=dict)
+    effectiveness_sum: float = Field(default=0.0)
+    effectiveness_count: int = Field(default=0)
+    rating_sum: int = Field(default=0)
+    rating_count: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "user_daily_stats"
+        indexes = [
+            IndexModel([("user_id", ASCENDING), ("day", DESCENDING)], name="user_day", unique=True),
+        ]
+
+
+class CollectionVersion(Document):
+    """Monotonic change counter for a collection (cache invalidation and ETags)"""
+    collection: str
+    version: int = Field(default=0)
+    
+    class Settings:
+        name = "collection_versions"
+        indexes = [
+            IndexModel([("collection", ASCENDING)], unique=True),
         ]
 
 
@@ -110,33 +236,63 @@ class Habit(Document):
         ]
 
 
+DOCUMENT_MODELS = [
+    User,
+    TrainingSession,
+    SessionBucket,
+    BrainKnowledge,
+    UserSessionStats,
+    UserDailyStats,
+    CollectionVersion,
+    UserModel,
+    Habit,
+]
+
+
 # Database initialization functions
 
-async def init_db():
-    """Initialize MongoDB connection and Beanie"""
+class ModelInitializer(Initializer):
+    """Beanie initializer that can leave index management to another process"""
+
+    def __init__(self, *args, manage_indexes: bool = True, **kwargs):
+        self.manage_indexes = manage_indexes
+        super().__init__(*args, **kwargs)
+
+    async def init_indexes(self, cls, allow_index_dropping: bool = False):
+        if self.manage_indexes:
+            await super().init_indexes(cls, allow_index_dropping)
+
+
+async def init_db(manage_indexes: bool = MANAGE_INDEXES, allow_index_dropping: bool = False):
+    """Initialize MongoDB connection and Beanie (index checks only if manage_indexes)"""
     global mongo_client
     
     try:
-        # Create Motor client
-        mongo_client = AsyncIOMotorClient(MONGODB_URL)
+        # Create Motor client with configured pool settings and driver listeners
+        from database.monitoring import driver_event_listeners
+        options = mongo_client_options()
+        mongo_client = AsyncIOMotorClient(
+            MONGODB_URL,
+            event_listeners=driver_event_listeners(),
+            **options
+        )
         
         # Get database
         database = mongo_client[DATABASE_NAME]
         
         # Initialize Beanie with document models
-        await init_beanie(
+        await ModelInitializer(
             database=database,
-            document_models=[
-                User,
-                TrainingSession,
-                BrainKnowledge,
-                UserModel,
-                Habit,
-            ]
+            document_models=DOCUMENT_MODELS,
+            allow_index_dropping=allow_index_dropping,
+            manage_indexes=manage_indexes
         )
         
         print(f"✅ Connected to MongoDB: {DATABASE_NAME}")
-        print(f"✅ Initialized Beanie with {len([User, TrainingSession, BrainKnowledge, UserModel, Habit])} document models")
+        if options:
+            print(f"✅ Connection options: {options}")
+        print(f"✅ Initialized Beanie with {len(DOCUMENT_MODELS)} document models"
+              + ("" if manage_indexes else " (index management skipped)"))
         
     except Exception as e:
         print(f"❌ Error connecting to MongoDB: {e}")
@@ -176,6 +332,8 @@ async def get_db_status() -> Dict[str, Any]:
 
 if __name__ == "__main__":
     import asyncio
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     
     async def test_connection():
         """Test MongoDB connection"""
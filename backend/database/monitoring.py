@@ -0,0 +1,131 @@
+"""
+MongoDB Driver Monitoring
+pymongo command and connection pool listeners that feed per-command latency
+histograms and pool checkout waits into the in-process metrics registry
+"""
+
+import threading
+import time
+from typing import Dict
+
+from pymongo import monitoring
+
+from database.metrics import Counter, Histogram, metrics
+
+# Pool checkout waits are usually sub-millisecond; long tails mean the pool is too small
+POOL_WAIT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0,
+)
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Record the server round-trip time of every command by command name"""
+
+    def __init__(self):
+        self._durations: Dict[str, Histogram] = {}
+        self._failures: Dict[str, Counter] = {}
+
+    def _histogram(self, command: str) -> Histogram:
+        histogram = self._durations.get(command)
+        if histogram is None:
+            histogram = self._durations[command] = metrics.histogram(
+                "mongodb_command_duration_seconds",
+                "MongoDB command round-trip time",
+                command=command
+            )
+        return histogram
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._histogram(event.command_name).observe(event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        self._histogram(event.command_name).observe(event.duration_micros / 1_000_000)
+        counter = self._failures.get(event.command_name)
+        if counter is None:
+            counter = self._failures[event.command_name] = metrics.counter(
+                "mongodb_command_failures_total",
+                "MongoDB commands that returned an error",
+                command=event.command_name
+            )
+        counter.inc()
+
+
+class PoolWaitListener(monitoring.ConnectionPoolListener):
+    """
+    Record how long operations wait to check a connection out of the pool
+
+    pymongo 4.6 events carry no checkout duration, so the start time is kept
+    per thread (checkout is synchronous on the calling executor thread).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self.wait = metrics.histogram(
+            "mongodb_pool_checkout_wait_seconds",
+            "Time spent waiting for a pooled connection",
+            buckets=POOL_WAIT_BUCKETS
+        )
+        self.open_connections = metrics.gauge("mongodb_pool_connections", "Open pooled connections")
+        self.in_use = metrics.gauge("mongodb_pool_connections_in_use", "Connections checked out of the pool")
+        self._failures: Dict[str, Counter] = {}
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            self.wait.observe(time.perf_counter() - started)
+            self._local.started = None
+        self.in_use.inc()
+
+    def connection_check_out_failed(self, event):
+        self._local.started = None
+        counter = self._failures.get(event.reason)
+        if counter is None:
+            counter = self._failures[event.reason] = metrics.counter(
+                "mongodb_pool_checkout_failures_total",
+                "Failed connection checkouts (timeout, pool closed, connection error)",
+                reason=event.reason
+            )
+        counter.inc()
+
+    def connection_checked_in(self, event):
+        self.in_use.dec()
+
+    def connection_created(self, event):
+        self.open_connections.inc()
+
+    def connection_closed(self, event):
+        self.open_connections.dec()
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+def driver_event_listeners():
+    """Listeners to pass to AsyncIOMotorClient(event_listeners=...)"""
+    return [CommandLatencyListener(), PoolWaitListener()]
+
+
+def driver_metrics_summary() -> Dict[str, Dict]:
+    """Compact view of command latency and pool waits (for /health)"""
+    return {
+        "commands": metrics.histogram_summary("mongodb_command_duration_seconds"),
+        "pool_checkout_wait": metrics.histogram_summary("mongodb_pool_checkout_wait_seconds"),
+    }
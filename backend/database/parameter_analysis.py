@@ -0,0 +1,301 @@
+"""
+Parameter Effectiveness Analysis
+Which brainwave generated_content parameters predict high effectiveness_score and
+user_rating, per brainwave_target, computed column-wise with NumPy
+
+Usage:
+    python database/parameter_analysis.py [--bins 5] [--brainwave-target alpha]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database.repository import repository
+
+# generated_content parameters analysed for brainwave sessions
+ANALYSIS_PARAMETERS = [
+    "binaural_beat_frequency",
+    "carrier_frequency",
+    "modulation_depth",
+    "pink_noise_level",
+]
+
+# Outcome -> value counted as a "high" outcome for the per-bin hit rate
+ANALYSIS_OUTCOMES = {
+    "effectiveness_score": 0.8,
+    "user_rating": 4,
+}
+
+BRAINWAVE_TARGETS = ["delta", "theta", "alpha", "beta", "gamma"]
+
+# How long (seconds) a computed analysis is served before it is recomputed
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "600"))
+
+# Documents per getMore while loading columns
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "5000"))
+
+# Bins with fewer sessions than this report no mean (too noisy to compare)
+MIN_BIN_SESSIONS = 5
+
+
+# Value types converted by NumPy in one call (None becomes NaN)
+PLAIN_NUMERIC_TYPES = {int, float, type(None)}
+
+
+def numeric_column(values: List[Any]) -> np.ndarray:
+    """float64 array of values; missing or non-numeric ones (strings, lists, booleans) become NaN"""
+    if set(map(type, values)) <= PLAIN_NUMERIC_TYPES:
+        return np.asarray(values, dtype=np.float64)
+
+    # Mixed batch: numeric strings and booleans must not be coerced
+    return np.fromiter(
+        (value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan for value in values),
+        dtype=np.float64,
+        count=len(values)
+    )
+
+
+async def load_columns(brainwave_target: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """
+    Load the analysed fields of every brainwave session as NumPy columns
+
+    Only the needed fields are projected. Each cursor batch is turned into
+    float64 arrays at once; missing and non-numeric values become NaN.
+    """
+    query: Dict[str, Any] = {"module_type": "brainwave"}
+    if brainwave_target:
+        query["brainwave_target"] = brainwave_target
+
+    projection = {"_id": 0, "brainwave_target": 1, **{outcome: 1 for outcome in ANALYSIS_OUTCOMES}}
+    projection.update({f"generated_content.{name}": 1 for name in ANALYSIS_PARAMETERS})
+
+    target_codes = {target: code for code, target in enumerate(BRAINWAVE_TARGETS)}
+    fields = ANALYSIS_PARAMETERS + list(ANALYSIS_OUTCOMES)
+    chunks: Dict[str, List[np.ndarray]] = {name: [] for name in fields + ["target"]}
+
+    batch: List[Dict[str, Any]] = []
+
+    def flush():
+        contents = [document.get("generated_content") or {} for document in batch]
+        for name in ANALYSIS_PARAMETERS:
+            chunks[name].append(numeric_column([content.get(name) for content in contents]))
+        for name in ANALYSIS_OUTCOMES:
+            chunks[name].append(numeric_column([document.get(name) for document in batch]))
+        chunks["target"].append(np.array(
+            [target_codes.get(document.get("brainwave_target"), -1) for document in batch], dtype=np.int8
+        ))
+        batch.clear()
+
+    async for document in repository.iter_sessions(query, ANALYSIS_BATCH_SIZE, projection):
+        batch.append(document)
+        if len(batch) >= ANALYSIS_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    return {
+        name: np.concatenate(parts) if parts else np.empty(0, dtype=np.int8 if name == "target" else np.float64)
+        for name, parts in chunks.items()
+    }
+
+
+def ranks(values: np.ndarray) -> np.ndarray:
+    """Average ranks (ties share their mean rank) for Spearman correlation"""
+    order = np.argsort(values, kind="mergesort")
+    sorted_values = values[order]
+    starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    average = starts + (counts - 1) / 2.0
+    result = np.empty(len(values), dtype=np.float64)
+    result[order] = np.repeat(average, counts)
+    return result
+
+
+def pearson(x: np.ndarray, y: np.ndarray) -> Optional[float]:
+    if len(x) < 3:
+        return None
+    x = x - x.mean()
+    y = y - y.mean()
+    denominator = np.sqrt((x * x).sum() * (y * y).sum())
+    return float((x * y).sum() / denominator) if denominator else None
+
+
+def _round(value: Optional[float], digits: int = 4) -> Optional[float]:
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def parameter_effect(x: np.ndarray, y: np.ndarray, high: float, bins: int) -> Dict[str, Any]:
+    """Correlations and quantile-binned outcome statistics for one parameter/outcome pair"""
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = x[valid], y[valid]
+    result: Dict[str, Any] = {"sessions": int(len(x)), "pearson": None, "spearman": None, "spread": None, "bins": []}
+    if len(x) < 3:
+        return result
+
+    result["pearson"] = _round(pearson(x, y))
+    result["spearman"] = _round(pearson(ranks(x), ranks(y)))
+
+    distinct = np.unique(x)
+    if len(distinct) <= bins:
+        # Few distinct settings (e.g. carrier presets): one bin per value
+        lows = highs = distinct
+        index = np.searchsorted(distinct, x)
+    else:
+        # Quantile bins [low, high); edges collapse where values repeat
+        edges = np.unique(np.quantile(x, np.linspace(0, 1, bins + 1)))
+        lows, highs = edges[:-1], edges[1:]
+        index = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, len(lows) - 1)
+    slots = len(lows)
+
+    counts = np.bincount(index, minlength=slots)
+    sums = np.bincount(index, weights=y, minlength=slots)
+    squares = np.bincount(index, weights=y * y, minlength=slots)
+    hits = np.bincount(index, weights=(y >= high).astype(np.float64), minlength=slots)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts >= MIN_BIN_SESSIONS, sums / counts, np.nan)
+        deviations = np.sqrt(np.maximum(squares / counts - (sums / counts) ** 2, 0))
+        hit_rates = hits / counts
+
+    result["bins"] = [
+        {
+            "low": _round(lows[slot]),
+            "high": _round(highs[slot]),
+            "sessions": int(counts[slot]),
+            "mean": _round(means[slot]),
+            "std": _round(deviations[slot]) if counts[slot] >= MIN_BIN_SESSIONS else None,
+            "high_rate": _round(hit_rates[slot]) if counts[slot] >= MIN_BIN_SESSIONS else None,
+        }
+        for slot in range(slots)
+    ]
+
+    comparable = means[np.isfinite(means)]
+    if len(comparable) >= 2:
+        result["spread"] = _round(comparable.max() - comparable.min())
+
+    return result
+
+
+def analyse_columns(columns: Dict[str, np.ndarray], bins: int) -> Dict[str, Any]:
+    """Effect statistics for every (target, parameter, outcome) combination"""
+    targets = {}
+    for code, target in enumerate(BRAINWAVE_TARGETS):
+        mask = columns["target"] == code
+        if not mask.any():
+            continue
+        targets[target] = {
+            "sessions": int(mask.sum()),
+            "parameters": {
+                name: {
+                    outcome: parameter_effect(columns[name][mask], columns[outcome][mask], high, bins)
+                    for outcome, high in ANALYSIS_OUTCOMES.items()
+                }
+                for name in ANALYSIS_PARAMETERS
+            },
+        }
+
+    return {
+        "generated_at": datetime.utcnow(),
+        "sessions_analyzed": int(len(columns["target"])),
+        "bins": bins,
+        "targets": targets,
+    }
+
+
+async def run_parameter_analysis(bins: int = 5, brainwave_target: Optional[str] = None) -> Dict[str, Any]:
+    """Load the columns and analyse them (the NumPy work runs off the event loop)"""
+    columns = await load_columns(brainwave_target)
+    return await asyncio.to_thread(analyse_columns, columns, bins)
+
+
+class ParameterAnalysisCache:
+    """
+    TTL cache of analysis results per (bins, brainwave_target)
+
+    Concurrent requests for an expired entry share a single recomputation;
+    requests for other entries are not held up by it.
+    """
+
+    def __init__(self, ttl: float = ANALYSIS_CACHE_TTL):
+        self.ttl = ttl
+        self._results: Dict[tuple, Dict[str, Any]] = {}
+        self._computed_at: Dict[tuple, float] = {}
+        self._computing: Dict[tuple, asyncio.Task] = {}
+
+    def age(self, bins: int, brainwave_target: Optional[str] = None) -> Optional[float]:
+        computed_at = self._computed_at.get((bins, brainwave_target))
+        return None if computed_at is None else time.monotonic() - computed_at
+
+    async def get(self, bins: int = 5, brainwave_target: Optional[str] = None) -> Dict[str, Any]:
+        key = (bins, brainwave_target)
+        age = self.age(*key)
+        if age is not None and age < self.ttl:
+            return self._results[key]
+
+        task = self._computing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute(key))
+            self._computing[key] = task
+            task.add_done_callback(lambda _: self._computing.pop(key, None))
+        # A disconnecting client must not cancel the recomputation others wait on
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: tuple) -> Dict[str, Any]:
+        self._results[key] = await run_parameter_analysis(*key)
+        self._computed_at[key] = time.monotonic()
+        return self._results[key]
+
+
+parameter_analysis_cache = ParameterAnalysisCache()
+
+
+async def main():
+    """Run the analysis and print the strongest parameter effects"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from beanie import init_beanie
+    from database.models import MONGODB_URL, DATABASE_NAME, SessionBucket, TrainingSession
+
+    parser = argparse.ArgumentParser(description="Parameter effectiveness analysis for brainwave sessions")
+    parser.add_argument("--bins", type=int, default=5, help="Quantile bins per parameter")
+    parser.add_argument("--brainwave-target", choices=BRAINWAVE_TARGETS, default=None)
+    args = parser.parse_args()
+
+    if repository.embedded:
+        await repository.connect()
+    else:
+        client = AsyncIOMotorClient(MONGODB_URL)
+        await init_beanie(database=client[DATABASE_NAME], document_models=[TrainingSession, SessionBucket])
+
+    started = time.perf_counter()
+    columns = await load_columns(args.brainwave_target)
+    loaded = time.perf_counter()
+    result = analyse_columns(columns, args.bins)
+    finished = time.perf_counter()
+
+    print(
+        f"✓ Analysed {result['sessions_analyzed']} brainwave sessions "
+        f"(load {loaded - started:.2f}s, compute {(finished - loaded) * 1000:.1f}ms)"
+    )
+    for target, summary in result["targets"].items():
+        print(f"\n{target} ({summary['sessions']} sessions)")
+        for name, outcomes in summary["parameters"].items():
+            cells = [
+                f"{outcome}: r={effect['pearson']} rho={effect['spearman']} spread={effect['spread']}"
+                for outcome, effect in outcomes.items()
+            ]
+            print(f"  {name:<24} " + "  |  ".join(cells))
+
+    return result["sessions_analyzed"] > 0
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)
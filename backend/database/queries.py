@@ -0,0 +1,103 @@
+"""
+Listing Queries
+Mongo filters and keyset cursors for session and knowledge listings, shared by
+the API routes and the offline tools (exports, query plan checks)
+
+Builders raise ValueError for invalid filters; routes turn that into a 400.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Map module types to relevant stimulus types
+MODULE_TO_STIMULUS = {
+    "movers": ["meditation", "breathwork"],
+    "pfc_gym": ["breathwork", "neurofeedback"],
+    "mental_rehearsal": ["mental_rehearsal", "visualization"],
+    "brainwave": ["binaural_beats", "gamma_entrainment", "neurofeedback"]
+}
+
+
+def build_session_query(
+    user_id: Optional[str] = None,
+    module_type: Optional[str] = None,
+    brainwave_target: Optional[str] = None,
+    days: Optional[int] = None
+) -> dict:
+    """Build the Mongo filter for session listings (sorted by -timestamp)"""
+    query = {}
+    
+    if user_id:
+        query["user_id"] = user_id
+    
+    if module_type:
+        if module_type not in ["movers", "pfc_gym", "mental_rehearsal", "brainwave"]:
+            raise ValueError("Invalid module_type")
+        query["module_type"] = module_type
+    
+    if brainwave_target:
+        if brainwave_target not in ["delta", "theta", "alpha", "beta", "gamma"]:
+            raise ValueError("Invalid brainwave_target")
+        query["brainwave_target"] = brainwave_target
+    
+    if days:
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        query["timestamp"] = {"$gte": cutoff_date}
+    
+    return query
+
+
+def encode_session_cursor(timestamp: datetime, session_id) -> str:
+    """Encode the (timestamp, _id) position of the last listed session"""
+    payload = json.dumps([timestamp.isoformat(), str(session_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_session_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Decode a cursor produced by encode_session_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, session_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), ObjectId(session_id)
+    except (ValueError, TypeError, InvalidId):
+        raise ValueError("Invalid cursor")
+
+
+def apply_session_cursor(query: dict, cursor: str) -> dict:
+    """Restrict a listing query to sessions after the cursor position"""
+    timestamp, session_id = decode_session_cursor(cursor)
+    
+    # The timestamp bound drives the index range; the $or only resolves ties
+    timestamp_filter = dict(query.get("timestamp", {}))
+    timestamp_filter["$lte"] = timestamp
+    
+    return {
+        **query,
+        "timestamp": timestamp_filter,
+        "$or": [{"timestamp": {"$lt": timestamp}}, {"_id": {"$lt": session_id}}],
+    }
+
+
+def build_knowledge_query(
+    stimulus_type: Optional[str] = None,
+    outcome: Optional[str] = None,
+    min_evidence: Optional[float] = None
+) -> dict:
+    """Build the Mongo filter for knowledge listings (sorted by -evidence_strength)"""
+    query = {}
+    
+    if stimulus_type:
+        query["stimulus_type"] = stimulus_type
+    
+    if outcome:
+        query["outcome"] = outcome
+    
+    if min_evidence is not None:
+        query["evidence_strength"] = {"$gte": min_evidence}
+    
+    return query
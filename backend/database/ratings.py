@@ -0,0 +1,121 @@
+"""
+Session Ratings
+Write-behind coalescer for bursty rating feeds (single ratings go straight to
+repository.set_session_rating)
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Optional
+
+from bson import ObjectId
+from database.repository import repository
+
+# How long (seconds) queued ratings wait before being flushed together
+RATING_FLUSH_INTERVAL = float(os.getenv("RATING_FLUSH_INTERVAL", "0.25"))
+
+# Flush immediately once this many sessions have pending ratings
+RATING_FLUSH_MAX_PENDING = int(os.getenv("RATING_FLUSH_MAX_PENDING", "1000"))
+
+
+class RatingCoalescer:
+    """
+    Write-behind buffer for session ratings
+
+    Ratings submitted within one flush interval are merged (last write per
+    session wins) and written with one repository.write_ratings call: a
+    conditional bulk_write on MongoDB, a single transaction on SQLite. A
+    failed write puts its ratings back in the queue (newer ratings for the
+    same session win) and is retried on the next interval.
+    """
+
+    def __init__(self, interval: float = RATING_FLUSH_INTERVAL, max_pending: int = RATING_FLUSH_MAX_PENDING):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.flushed_batches = 0
+        self.flushed_ratings = 0
+        self.failed_flushes = 0
+        self.last_error: Optional[str] = None  # Of the latest flush, None once one succeeds
+        self._pending: Dict[ObjectId, int] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def submit(self, session_id: ObjectId, rating: int):
+        """Queue a rating; it is written within one flush interval"""
+        self._pending[session_id] = rating
+
+        if len(self._pending) >= self.max_pending and (not self._flush_task or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+        # Also covers ratings left over if that flush fails or more arrive meanwhile
+        self._schedule()
+
+    def _schedule(self):
+        """Start the flush timer unless one is already waiting"""
+        if not self._timer or self._timer.done() or self._timer is asyncio.current_task():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        await self.flush()
+
+    async def flush(self, retry: bool = True) -> bool:
+        """
+        Write all pending ratings now
+
+        On failure they are requeued. Unless `retry` is False, the timer is
+        re-armed for anything still queued afterwards: failed ratings, and
+        ratings submitted while the write was in flight (their submit saw a
+        running timer and scheduled nothing).
+        """
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return True
+
+            try:
+                await self._write(pending)
+                written = True
+            except Exception as e:
+                self.failed_flushes += 1
+                self.last_error = str(e)
+                # Ratings queued meanwhile are newer and win
+                self._pending = {**pending, **self._pending}
+                print(f"❌ Failed to flush {len(pending)} ratings (requeued): {e}")
+                written = False
+            else:
+                self.flushed_batches += 1
+                self.flushed_ratings += len(pending)
+                self.last_error = None
+
+            if retry and self._pending:
+                self._schedule()
+            return written
+
+    async def _write(self, pending: Dict[ObjectId, int]):
+        await repository.write_ratings(pending)
+
+    async def status(self) -> Dict[str, Any]:
+        """Health probe: an error while the latest flush failed (its ratings are still queued)"""
+        result: Dict[str, Any] = {
+            "status": "ok" if self.last_error is None else "error",
+            "pending": len(self._pending),
+            "flushed_ratings": self.flushed_ratings,
+            "failed_flushes": self.failed_flushes,
+        }
+        if self.last_error is not None:
+            result["error"] = self.last_error
+        return result
+
+    async def close(self):
+        """Flush anything still queued (call at shutdown)"""
+        # The size-triggered flush can re-arm the timer, so wait for it first
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        if self._timer and not self._timer.done():
+            self._timer.cancel()
+        if not await self.flush(retry=False):
+            print(f"⚠️  {len(self._pending)} ratings were not written before shutdown")
+
+
+rating_coalescer = RatingCoalescer()
@@ -0,0 +1,219 @@
+"""
+Storage Repository
+The session and knowledge queries the API needs, behind one interface with a
+MongoDB backend (the default) and an embedded SQLite backend
+
+Routes only call `repository`; STORAGE_BACKEND picks the implementation:
+- mongodb: Motor/Beanie against MONGODB_URL (SESSION_STORAGE layouts,
+  user_session_stats and user_daily_stats rollups)
+- sqlite: database/embedded_store.py, a single file (or :memory:) with the
+  same indexes and rollups, for small single-node deployments and load tests
+  without a MongoDB server
+
+Maintenance tools (rollup rebuild/check, migrations, query plans) work on
+MongoDB only; the embedded backend keeps its rollups transactionally exact.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+
+from database.daily_stats import get_daily_stats
+from database.models import BrainKnowledge, UserSessionStats, close_db, get_db_status, init_db
+from database.session_store import session_store
+from database.session_stats import (
+    fold_stats_rows,
+    get_user_stats,
+    record_rating_changed,
+    record_ratings_changed,
+    record_sessions_created,
+    session_stats_pipeline,
+)
+from database.versions import bump_collection_version, get_collection_version
+
+STORAGE_BACKENDS = ("mongodb", "sqlite")
+
+# Active backend for the API and tools
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongodb")
+
+KNOWLEDGE_COLLECTION = "brain_knowledge"
+
+
+class MongoRepository:
+    """Repository over MongoDB (Motor/Beanie, either session layout)"""
+
+    backend = "mongodb"
+    embedded = False
+
+    async def connect(self):
+        await init_db()
+
+    async def close(self):
+        await close_db()
+
+    async def status(self) -> Dict[str, Any]:
+        return {**await get_db_status(), "backend": self.backend}
+
+    # Sessions
+
+    async def find_sessions(
+        self,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, int]] = None,
+        skip: int = 0,
+        limit: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Sessions matching a query, newest first"""
+        return await session_store.find(query, projection, skip, limit)
+
+    async def get_session(self, session_id: ObjectId) -> Optional[Dict[str, Any]]:
+        return await session_store.find_one(session_id)
+
+    async def count_sessions(self, query: Dict[str, Any]) -> int:
+        return await session_store.count(query)
+
+    async def iter_sessions(
+        self,
+        query: Dict[str, Any],
+        batch_size: int,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Matching sessions in natural (storage) order"""
+        async for document in session_store.cursor(query, batch_size, projection):
+            yield document
+
+    async def generated_content_keys(self, query: Dict[str, Any]) -> List[str]:
+        """Distinct generated_content keys of the matching sessions (computed server-side)"""
+        rows = await session_store.aggregate([
+            {"$match": query},
+            {"$project": {"pairs": {"$objectToArray": {"$ifNull": ["$generated_content", {}]}}}},
+            {"$unwind": "$pairs"},
+            {"$group": {"_id": "$pairs.k"}},
+        ]).to_list(length=None)
+        return sorted(row["_id"] for row in rows)
+
+    async def insert_sessions(self, documents: List[Dict[str, Any]]) -> Dict[int, str]:
+        """
+        Unordered insert of plain session documents, folded into the rollups
+
+        Returns {index: error message} for rows that failed.
+        """
+        failed = await session_store.insert_many(documents)
+        await record_sessions_created([document for index, document in enumerate(documents) if index not in failed])
+        return failed
+
+    async def set_session_rating(self, session_id: ObjectId, rating: int) -> Optional[str]:
+        """
+        Set a session's rating with one atomic $set
+
+        The pre-image returned by find_one_and_update gives the old rating for the
+        rollup delta, so concurrent updates can't double-count. Returns the
+        session's user_id, or None if the session doesn't exist.
+        """
+        previous = await session_store.set_rating(session_id, rating)
+
+        if not previous:
+            return None
+
+        await record_rating_changed(previous["user_id"], previous.get("user_rating"), rating, previous.get("timestamp"))
+        return previous["user_id"]
+
+    async def write_ratings(self, pending: Dict[ObjectId, int]):
+        """
+        Apply many ratings with one bulk_write
+
+        Each update is conditional on the rating read just before; sessions
+        that changed in between fall back to set_session_rating so rollups
+        stay exact. Unknown sessions are dropped.
+        """
+        current = await session_store.get_ratings(pending)
+        if not current:
+            return
+
+        session_ids = list(current)
+        result = await session_store.collection().bulk_write([
+            session_store.conditional_rating_update(
+                session_id, current[session_id].get("user_rating"), pending[session_id]
+            )
+            for session_id in session_ids
+        ], ordered=False)
+
+        if result.modified_count == len(session_ids):
+            applied = session_ids
+        else:
+            # Some ratings moved under us: find which updates landed
+            landed = {
+                session_id
+                for session_id, document in (await session_store.get_ratings(session_ids)).items()
+                if document.get("user_rating") == pending[session_id]
+            }
+            applied = [session_id for session_id in session_ids if session_id in landed]
+            for session_id in session_ids:
+                if session_id not in landed:
+                    await self.set_session_rating(session_id, pending[session_id])
+
+        await record_ratings_changed([
+            (
+                current[session_id]["user_id"],
+                current[session_id].get("user_rating"),
+                pending[session_id],
+                current[session_id].get("timestamp"),
+            )
+            for session_id in applied
+        ])
+
+    # Rollups
+
+    async def user_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """A user's all-time rollup (_id and version identify its state)"""
+        return await get_user_stats(user_id)
+
+    async def user_version_stamp(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Just the rollup _id and version for a user"""
+        return await UserSessionStats.get_motor_collection().find_one(
+            {"user_id": user_id}, {"version": 1}
+        )
+
+    async def window_stats(self, user_id: str, since: datetime) -> Optional[Dict[str, Any]]:
+        """Rollup values over a user's sessions since a time (aggregated on demand)"""
+        rows = await session_store.aggregate(
+            session_stats_pipeline({"user_id": user_id, "timestamp": {"$gte": since}})
+        ).to_list(length=None)
+        return fold_stats_rows(rows).get(user_id)
+
+    async def daily_stats(self, user_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """A user's daily rollups for days in [start, end], oldest first"""
+        return await get_daily_stats(user_id, start, end)
+
+    # Knowledge
+
+    async def knowledge_entries(self) -> List[Dict[str, Any]]:
+        """Every brain_knowledge document"""
+        return await BrainKnowledge.get_motor_collection().find().to_list(length=None)
+
+    async def insert_knowledge(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Insert knowledge entries and bump the collection version"""
+        documents = [BrainKnowledge(**entry) for entry in entries]
+        if documents:
+            await BrainKnowledge.insert_many(documents)
+            # Tell running API workers to reload their knowledge cache
+            await bump_collection_version(KNOWLEDGE_COLLECTION)
+        return len(documents)
+
+    async def collection_version(self, collection: str) -> int:
+        return await get_collection_version(collection)
+
+
+def create_repository(backend: str = STORAGE_BACKEND):
+    """Repository for a STORAGE_BACKEND value"""
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    if backend == "sqlite":
+        from database.embedded_store import SQLiteRepository
+        return SQLiteRepository()
+    return MongoRepository()
+
+
+repository = create_repository()
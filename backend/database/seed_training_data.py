@@ -6,31 +6,29 @@ Seeds realistic training session data based on research from:
 - Synchronized Brainwave Dataset (Kaggle)
 """
 
+import argparse
 import asyncio
 import random
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Awaitable, Callable, Iterable, Iterator, Optional, Set
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
+from bson import ObjectId
 import os
 from dotenv import load_dotenv
 
 # Import models
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from database.models import TrainingSession, BrainKnowledge, User
+from database.brainwave_bands import BRAINWAVE_STATES
+from database.models import TrainingSession, SessionBucket, BrainKnowledge, User, UserSessionStats, UserDailyStats, CollectionVersion
+from database.daily_stats import rebuild_daily_stats
+from database.session_store import session_store
+from database.session_stats import rebuild_session_stats
 
 load_dotenv()
 
-# Realistic brainwave frequency ranges based on research
-BRAINWAVE_STATES = {
-    "delta": {"range": (0.5, 4), "description": "Deep sleep, healing"},
-    "theta": {"range": (4, 8), "description": "Meditation, creativity"},
-    "alpha": {"range": (8, 13), "description": "Relaxed focus, calm"},
-    "beta": {"range": (13, 30), "description": "Active thinking, focus"},
-    "gamma": {"range": (30, 100), "description": "Peak performance, insight"}
-}
-
 # Realistic training module types
 MODULE_TYPES = ["movers", "pfc_gym", "mental_rehearsal", "brainwave"]
 
@@ -41,6 +39,27 @@ SAMPLE_USERS = [
     "demo_user_3@brainbuddy.com",
 ]
 
+# generated_content vocabularies per module
+HARMONIC_COMPLEXITY = ["simple", "moderate", "complex"]
+EXERCISE_TYPES = ["yoga", "stretching", "cardio", "strength"]
+READING_TOPICS = ["neuroplasticity", "habit_formation", "mindfulness"]
+JOURNAL_PROMPTS = [
+    "What am I grateful for today?",
+    "What is my main intention for today?",
+    "What did I learn yesterday?"
+]
+PFC_PROTOCOLS = ["procrastination_breaker", "habit_rewire", "emotional_regulation"]
+PFC_TRIGGERS = ["notification", "boredom", "stress", "fatigue"]
+PFC_INTERRUPTS = ["breathing", "movement", "cold_water", "state_shift"]
+REHEARSAL_SKILLS = ["public_speaking", "athletic_performance", "piano", "coding", "negotiation"]
+REHEARSAL_DETAIL_LEVELS = ["basic", "moderate", "high", "expert"]
+SENSORY_CHANNELS = ["visual", "auditory", "kinesthetic", "emotional"]
+
+# Streaming mode defaults (--stream)
+STREAM_BATCH_SIZE = 1000
+STREAM_CONCURRENCY = 4
+STREAM_PROGRESS_INTERVAL = 5.0  # Seconds between progress lines
+
 
 def generate_realistic_music_params(brainwave_target: str) -> Dict[str, Any]:
     """Generate realistic music parameters based on target brainwave state"""
@@ -53,7 +72,7 @@ def generate_realistic_music_params(brainwave_target: str) -> Dict[str, Any]:
         "isochronic_tone_frequency": round(base_freq * 2, 2),
         "volume": round(random.uniform(0.4, 0.7), 2),
         "tempo_bpm": int(60 + (base_freq * 2)),
-        "harmonic_complexity": random.choice(["simple", "moderate", "complex"]),
+        "harmonic_complexity": random.choice(HARMONIC_COMPLEXITY),
         "modulation_depth": round(random.uniform(0.1, 0.5), 2),
         "pink_noise_level": round(random.uniform(0.1, 0.3), 2),
     }
@@ -65,22 +84,18 @@ def generate_movers_session() -> Dict[str, Any]:
         "meditation_duration": random.randint(5, 15),
         "breathwork_cycles": random.randint(3, 10),
         "visualization_script": "success_visualization_v1",
-        "exercise_type": random.choice(["yoga", "stretching", "cardio", "strength"]),
-        "reading_topic": random.choice(["neuroplasticity", "habit_formation", "mindfulness"]),
-        "journal_prompt": random.choice([
-            "What am I grateful for today?",
-            "What is my main intention for today?",
-            "What did I learn yesterday?"
-        ])
+        "exercise_type": random.choice(EXERCISE_TYPES),
+        "reading_topic": random.choice(READING_TOPICS),
+        "journal_prompt": random.choice(JOURNAL_PROMPTS)
     }
 
 
 def generate_pfc_gym_session() -> Dict[str, Any]:
     """Generate a PFC (Prefrontal Cortex) Gym session"""
     return {
-        "protocol_type": random.choice(["procrastination_breaker", "habit_rewire", "emotional_regulation"]),
-        "trigger_identified": random.choice(["notification", "boredom", "stress", "fatigue"]),
-        "interrupt_technique": random.choice(["breathing", "movement", "cold_water", "state_shift"]),
+        "protocol_type": random.choice(PFC_PROTOCOLS),
+        "trigger_identified": random.choice(PFC_TRIGGERS),
+        "interrupt_technique": random.choice(PFC_INTERRUPTS),
         "duration_seconds": random.randint(120, 300),
         "focus_score": round(random.uniform(0.5, 1.0), 2)
     }
@@ -89,68 +104,146 @@ def generate_pfc_gym_session() -> Dict[str, Any]:
 def generate_mental_rehearsal_session() -> Dict[str, Any]:
     """Generate a mental rehearsal session"""
     return {
-        "skill_target": random.choice(["public_speaking", "athletic_performance", "piano", "coding", "negotiation"]),
-        "visualization_detail_level": random.choice(["basic", "moderate", "high", "expert"]),
-        "sensory_channels": random.sample(["visual", "auditory", "kinesthetic", "emotional"], k=random.randint(2, 4)),
+        "skill_target": random.choice(REHEARSAL_SKILLS),
+        "visualization_detail_level": random.choice(REHEARSAL_DETAIL_LEVELS),
+        "sensory_channels": random.sample(SENSORY_CHANNELS, k=random.randint(2, 4)),
         "repetitions": random.randint(3, 10),
         "vividness_score": round(random.uniform(0.6, 1.0), 2)
     }
 
 
-async def seed_training_sessions(num_sessions: int = 500):
-    """Seed realistic training sessions"""
-    print(f"Generating {num_sessions} training sessions...")
+def generate_session_document(start_date: datetime) -> Dict[str, Any]:
+    """One raw session document (TrainingSession fields plus an _id)"""
+    # Random timestamp within the range
+    random_days = random.randint(0, 180)
+    random_hours = random.randint(0, 23)
+    session_time = start_date + timedelta(days=random_days, hours=random_hours)
+    
+    # Select random user and module type
+    user_id = random.choice(SAMPLE_USERS)
+    module_type = random.choice(MODULE_TYPES)
+    
+    # Base session data
+    session_data = {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "module_type": module_type,
+        "brainwave_target": None,
+        "generated_content": {},
+        "user_rating": random.randint(1, 5) if random.random() > 0.2 else None,  # 80% rated
+        "effectiveness_score": round(random.uniform(0.5, 1.0), 2) if random.random() > 0.3 else None,
+        "timestamp": session_time,
+        "duration_seconds": random.randint(300, 3600),  # 5 min to 1 hour
+    }
     
-    sessions_to_insert = []
+    # Add module-specific content
+    if module_type == "brainwave":
+        brainwave_target = random.choice(list(BRAINWAVE_STATES.keys()))
+        session_data["brainwave_target"] = brainwave_target
+        session_data["generated_content"] = generate_realistic_music_params(brainwave_target)
+    elif module_type == "movers":
+        session_data["generated_content"] = generate_movers_session()
+    elif module_type == "pfc_gym":
+        session_data["generated_content"] = generate_pfc_gym_session()
+    elif module_type == "mental_rehearsal":
+        session_data["generated_content"] = generate_mental_rehearsal_session()
     
-    # Generate sessions over the past 6 months
+    return session_data
+
+
+def generate_session_documents(num_sessions: int) -> Iterator[Dict[str, Any]]:
+    """Lazily generate sessions spread over the past 6 months"""
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=180)
     
-    for i in range(num_sessions):
-        # Random timestamp within the range
-        random_days = random.randint(0, 180)
-        random_hours = random.randint(0, 23)
-        session_time = start_date + timedelta(days=random_days, hours=random_hours)
-        
-        # Select random user and module type
-        user_id = random.choice(SAMPLE_USERS)
-        module_type = random.choice(MODULE_TYPES)
-        
-        # Base session data
-        session_data = {
-            "user_id": user_id,
-            "module_type": module_type,
-            "timestamp": session_time,
-            "duration_seconds": random.randint(300, 3600),  # 5 min to 1 hour
-            "user_rating": random.randint(1, 5) if random.random() > 0.2 else None,  # 80% rated
-            "effectiveness_score": round(random.uniform(0.5, 1.0), 2) if random.random() > 0.3 else None,
-        }
-        
-        # Add module-specific content
-        if module_type == "brainwave":
-            brainwave_target = random.choice(list(BRAINWAVE_STATES.keys()))
-            session_data["brainwave_target"] = brainwave_target
-            session_data["generated_content"] = generate_realistic_music_params(brainwave_target)
-        elif module_type == "movers":
-            session_data["generated_content"] = generate_movers_session()
-        elif module_type == "pfc_gym":
-            session_data["generated_content"] = generate_pfc_gym_session()
-        elif module_type == "mental_rehearsal":
-            session_data["generated_content"] = generate_mental_rehearsal_session()
-        
-        sessions_to_insert.append(TrainingSession(**session_data))
+    for _ in range(num_sessions):
+        yield generate_session_document(start_date)
+
+
+async def seed_training_sessions(num_sessions: int = 500, documents: Optional[Iterable[Dict[str, Any]]] = None):
+    """Seed realistic training sessions (from `documents` if given)"""
+    print(f"Generating {num_sessions} training sessions...")
+    
+    # Validate every row through the model (use stream_training_sessions for bulk loads)
+    sessions_to_insert = [
+        {"_id": document["_id"], **TrainingSession(**document).model_dump(exclude={"id", "revision_id"})}
+        for document in documents or generate_session_documents(num_sessions)
+    ]
     
     # Insert in batches
     batch_size = 100
     for i in range(0, len(sessions_to_insert), batch_size):
         batch = sessions_to_insert[i:i + batch_size]
-        await TrainingSession.insert_many(batch)
+        # Through the session store so SESSION_STORAGE=buckets is seeded directly
+        await session_store.insert_many(batch)
         print(f"Inserted batch {i//batch_size + 1}/{(num_sessions-1)//batch_size + 1}")
     
     print(f"✓ Successfully seeded {num_sessions} training sessions")
 
 
+async def stream_training_sessions(
+    num_sessions: int,
+    batch_size: int = STREAM_BATCH_SIZE,
+    concurrency: int = STREAM_CONCURRENCY,
+    documents: Optional[Iterable[Dict[str, Any]]] = None,
+    insert_many: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Dict[int, str]]]] = None
+) -> int:
+    """
+    Seed sessions at load-test scale (millions of rows)
+    
+    Rows are generated lazily and inserted as raw dicts, skipping per-row
+    Beanie validation, with up to `concurrency` unordered insert_many batches
+    in flight. Memory stays at roughly concurrency x batch_size documents.
+    `documents` must be lazy too (e.g. SyntheticWorkload.generate).
+    `insert_many` defaults to session_store.insert_many (rollups rebuilt
+    afterwards); pass repository.insert_sessions to maintain them inline.
+    Returns the number of sessions inserted.
+    """
+    print(f"Streaming {num_sessions:,} training sessions (batch {batch_size}, {concurrency} in flight)...")
+    
+    in_flight: Set[asyncio.Task] = set()
+    inserted = 0
+    failed = 0
+    
+    async def insert(batch: List[Dict[str, Any]]):
+        nonlocal inserted, failed
+        errors = await (insert_many or session_store.insert_many)(batch)
+        failed += len(errors)
+        inserted += len(batch) - len(errors)
+    
+    started = last_report = time.perf_counter()
+    batch: List[Dict[str, Any]] = []
+    
+    for document in documents or generate_session_documents(num_sessions):
+        batch.append(document)
+        if len(batch) < batch_size:
+            continue
+        
+        if len(in_flight) >= concurrency:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()  # Re-raise connection errors instead of silently dropping batches
+        in_flight.add(asyncio.create_task(insert(batch)))
+        batch = []
+        
+        now = time.perf_counter()
+        if now - last_report >= STREAM_PROGRESS_INTERVAL:
+            last_report = now
+            print(f"  {inserted:,}/{num_sessions:,} inserted ({inserted / (now - started):,.0f}/s)")
+    
+    if batch:
+        in_flight.add(asyncio.create_task(insert(batch)))
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"✓ Inserted {inserted:,} training sessions in {elapsed:.1f}s ({inserted / elapsed:,.0f} inserts/s)")
+    if failed:
+        print(f"⚠️  {failed:,} sessions failed to insert")
+    
+    return inserted
+
+
 async def seed_brain_knowledge():
     """Seed scientific knowledge base with real research findings"""
     print("Seeding brain knowledge base...")
@@ -295,8 +388,9 @@ async def seed_brain_knowledge():
         },
     ]
     
-    knowledge_objects = [BrainKnowledge(**entry) for entry in knowledge_entries]
-    await BrainKnowledge.insert_many(knowledge_objects)
+    # Bumps the brain_knowledge version so running API workers reload their cache
+    from database.repository import repository
+    await repository.insert_knowledge(knowledge_entries)
     
     print(f"✓ Successfully seeded {len(knowledge_entries)} knowledge base entries")
 
@@ -329,12 +423,83 @@ async def create_demo_users():
         print("✓ Demo users already exist")
 
 
+def workload_documents(args) -> Optional[Iterable[Dict[str, Any]]]:
+    """Synthetic session documents for --generator numpy (None: the random generator)"""
+    if args.generator != "numpy":
+        return None
+    
+    from database.synthetic_workload import SyntheticWorkload
+    workload = SyntheticWorkload(args.users, args.seed, end=args.end_date)
+    print(f"✓ Synthetic workload: {args.users} users, seed {args.seed}, ending {workload.end.date()}")
+    return workload.generate(args.sessions)
+
+
+async def seed_embedded_store(args):
+    """Seed the embedded SQLite store (STORAGE_BACKEND=sqlite); rollups are maintained on insert"""
+    from database.repository import repository
+    
+    print(f"\nOpening SQLite database at {repository.path}...")
+    await repository.connect()
+    print("✓ Opened SQLite database")
+    
+    await seed_brain_knowledge()
+    await stream_training_sessions(
+        args.sessions, args.batch_size, args.concurrency, workload_documents(args), repository.insert_sessions
+    )
+    
+    print("\n" + "=" * 60)
+    print("Summary:")
+    print(f"  Total Training Sessions: {await repository.count_sessions({})}")
+    print(f"  Total Knowledge Entries: {len(await repository.knowledge_entries())}")
+    
+    print("\nSessions by Module Type:")
+    for module in MODULE_TYPES:
+        print(f"  {module}: {await repository.count_sessions({'module_type': module})}")
+    
+    await repository.close()
+    
+    print("\n" + "=" * 60)
+    print("✓ Data seeding completed successfully!")
+    print("=" * 60)
+
+
 async def main():
     """Main seeding function"""
+    parser = argparse.ArgumentParser(description="Seed Brain Buddy training data")
+    parser.add_argument("--sessions", type=int, default=500, help="Number of training sessions to generate")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Generate lazily and insert raw documents concurrently (for millions of sessions)"
+    )
+    parser.add_argument("--batch-size", type=int, default=STREAM_BATCH_SIZE, help="Sessions per insert_many (--stream)")
+    parser.add_argument("--concurrency", type=int, default=STREAM_CONCURRENCY, help="Batches in flight (--stream)")
+    parser.add_argument("--skip-rollups", action="store_true", help="Don't rebuild the stats rollups afterwards")
+    parser.add_argument(
+        "--generator",
+        choices=["random", "numpy"],
+        default="random",
+        help="random: demo users, uniform data; numpy: seeded synthetic workload with realistic skew"
+    )
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users (--generator numpy)")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed (--generator numpy)")
+    parser.add_argument(
+        "--end-date",
+        type=lambda value: datetime.strptime(value, "%Y-%m-%d"),
+        default=None,
+        help="Synthetic data ends at this UTC midnight, YYYY-MM-DD (default today; pin it to reproduce a dataset exactly)"
+    )
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Brain Buddy - Training Data Seeder")
     print("=" * 60)
     
+    from database.repository import STORAGE_BACKEND
+    if STORAGE_BACKEND == "sqlite":
+        await seed_embedded_store(args)
+        return
+    
     # Connect to MongoDB
     MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     DATABASE_NAME = "brain_buddy"
@@ -345,7 +510,7 @@ async def main():
     # Initialize Beanie
     await init_beanie(
         database=client[DATABASE_NAME],
-        document_models=[User, TrainingSession, BrainKnowledge]
+        document_models=[User, TrainingSession, SessionBucket, BrainKnowledge, UserSessionStats, UserDailyStats, CollectionVersion]
     )
     print("✓ Connected to MongoDB")
     
@@ -356,12 +521,26 @@ async def main():
     await seed_brain_knowledge()
     
     # Seed training sessions
-    await seed_training_sessions(num_sessions=500)
+    documents = workload_documents(args)
+    
+    if args.stream:
+        await stream_training_sessions(args.sessions, args.batch_size, args.concurrency, documents)
+    else:
+        await seed_training_sessions(args.sessions, documents)
+    
+    # Seeded sessions bypass the API, so backfill the stats rollups
+    if args.skip_rollups:
+        print("⚠️  Skipped rollups (run session_stats.py rebuild and daily_stats.py rebuild later)")
+    else:
+        rollups = await rebuild_session_stats()
+        print(f"✓ Rebuilt {rollups} user stats rollups")
+        daily = await rebuild_daily_stats()
+        print(f"✓ Rebuilt {daily} daily rollups")
     
     # Print summary
     print("\n" + "=" * 60)
     print("Summary:")
-    total_sessions = await TrainingSession.count()
+    total_sessions = await session_store.count({})
     total_knowledge = await BrainKnowledge.count()
     total_users = await User.count()
     
@@ -372,7 +551,7 @@ async def main():
     # Breakdown by module type
     print("\nSessions by Module Type:")
     for module in MODULE_TYPES:
-        count = await TrainingSession.find(TrainingSession.module_type == module).count()
+        count = await session_store.count({"module_type": module})
         print(f"  {module}: {count}")
     
     print("\n" + "=" * 60)
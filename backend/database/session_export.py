@@ -0,0 +1,187 @@
+"""
+Session Export
+Stream filtered training sessions as NDJSON or CSV straight from a storage cursor
+
+Usage:
+    python database/session_export.py --format csv --flatten --output sessions.csv
+    python database/session_export.py --user demo_user_1@brainbuddy.com --days 30 > sessions.ndjson
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import orjson
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database.models import SessionBucket, TrainingSession
+from database.repository import repository
+
+# Documents per getMore; large batches keep the cursor close to raw wire speed
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+EXPORT_FIELDS = [
+    "id",
+    "user_id",
+    "module_type",
+    "brainwave_target",
+    "user_rating",
+    "effectiveness_score",
+    "timestamp",
+    "duration_seconds",
+]
+
+CONTENT_PREFIX = "generated_content."
+
+
+def export_row(document: Dict[str, Any], flatten: bool) -> Dict[str, Any]:
+    """Map a raw sessions document to an export row"""
+    row = {"id": str(document["_id"])}
+    row.update((field, document.get(field)) for field in EXPORT_FIELDS[1:])
+    content = document.get("generated_content") or {}
+
+    if flatten:
+        for key, value in content.items():
+            row[CONTENT_PREFIX + key] = value
+    else:
+        row["generated_content"] = content
+
+    return row
+
+
+def csv_value(value: Any) -> Any:
+    """Render a cell: blanks for None, JSON for nested values"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return value
+
+
+async def generated_content_keys(query: Dict[str, Any]) -> List[str]:
+    """Distinct generated_content keys in the export set (computed server-side)"""
+    return await repository.generated_content_keys(query)
+
+
+async def iter_session_batches(
+    query: Dict[str, Any],
+    batch_size: int,
+    on_batch: Optional[Callable[[int], None]] = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield lists of raw documents, one per cursor batch (natural order)"""
+    batch = []
+    async for document in repository.iter_sessions(query, batch_size):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            if on_batch:
+                on_batch(len(batch))
+            yield batch
+            batch = []
+    if batch:
+        if on_batch:
+            on_batch(len(batch))
+        yield batch
+
+
+async def iter_session_export(
+    query: Dict[str, Any],
+    export_format: str = "ndjson",
+    flatten: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    on_batch: Optional[Callable[[int], None]] = None
+) -> AsyncIterator[bytes]:
+    """
+    Yield the export body in chunks of one cursor batch
+
+    Only one batch is held in memory at a time. CSV with `flatten` first runs
+    a small aggregation to find the generated_content columns for the header.
+    """
+    if export_format == "ndjson":
+        async for batch in iter_session_batches(query, batch_size, on_batch):
+            yield b"".join(
+                orjson.dumps(export_row(document, flatten), default=str) + b"\n"
+                for document in batch
+            )
+        return
+
+    columns = list(EXPORT_FIELDS)
+    if flatten:
+        columns += [CONTENT_PREFIX + key for key in await generated_content_keys(query)]
+    else:
+        columns.append("generated_content")
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+
+    async for batch in iter_session_batches(query, batch_size, on_batch):
+        buffer.seek(0)
+        buffer.truncate()
+        for document in batch:
+            row = export_row(document, flatten)
+            writer.writerow({column: csv_value(row.get(column)) for column in columns})
+        yield buffer.getvalue().encode()
+
+
+async def main():
+    """Export sessions to a file or stdout"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from beanie import init_beanie
+    from database.models import MONGODB_URL, DATABASE_NAME
+    from database.queries import build_session_query
+
+    parser = argparse.ArgumentParser(description="Stream training sessions as NDJSON or CSV")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--flatten", action="store_true", help="Expand generated_content keys into columns")
+    parser.add_argument("--user", default=None, help="Only export this user ID")
+    parser.add_argument("--module-type", choices=["movers", "pfc_gym", "mental_rehearsal", "brainwave"])
+    parser.add_argument("--brainwave-target", choices=["delta", "theta", "alpha", "beta", "gamma"])
+    parser.add_argument("--days", type=int, default=None, help="Only sessions from the last N days")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--output", default=None, help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    if repository.embedded:
+        await repository.connect()
+    else:
+        client = AsyncIOMotorClient(MONGODB_URL)
+        await init_beanie(database=client[DATABASE_NAME], document_models=[TrainingSession, SessionBucket])
+
+    query = build_session_query(args.user, args.module_type, args.brainwave_target, args.days)
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+
+    rows = [0]
+    written = 0
+    started = time.perf_counter()
+
+    def count_rows(count: int):
+        rows[0] += count
+
+    try:
+        async for chunk in iter_session_export(query, args.format, args.flatten, args.batch_size, count_rows):
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            output.close()
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(
+        f"✓ Exported {rows[0]} sessions ({written / 1_000_000:.1f} MB) in {elapsed:.1f}s "
+        f"- {rows[0] / elapsed:,.0f} rows/s",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
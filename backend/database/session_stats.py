@@ -0,0 +1,313 @@
+"""
+Session Statistics Rollups
+Incrementally maintained per-user stats in the user_session_stats collection
+
+Usage:
+    python database/session_stats.py rebuild [--user USER_ID]
+    python database/session_stats.py check [--user USER_ID]
+"""
+
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import sys
+from pymongo import UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database.models import TrainingSession, UserSessionStats
+from database.daily_stats import record_daily_ratings, record_daily_sessions
+from database.session_store import session_store
+
+# Rollup upserts per bulk_write during a rebuild
+REBUILD_BATCH_SIZE = 1000
+
+# Fields compared when checking a stored rollup against the sessions collection
+ROLLUP_FIELDS = [
+    "total_sessions",
+    "total_duration_seconds",
+    "rating_sum",
+    "rating_count",
+    "sessions_by_module",
+    "sessions_by_brainwave",
+]
+
+
+def empty_rollup() -> Dict[str, Any]:
+    """Rollup values for a user without any sessions"""
+    return {
+        "total_sessions": 0,
+        "total_duration_seconds": 0,
+        "rating_sum": 0,
+        "rating_count": 0,
+        "sessions_by_module": {},
+        "sessions_by_brainwave": {},
+    }
+
+
+def session_increments(session: Dict[str, Any]) -> Dict[str, int]:
+    """$inc deltas that one new session contributes to its user's rollup"""
+    increments = {
+        "version": 1,
+        "total_sessions": 1,
+        "total_duration_seconds": session.get("duration_seconds") or 0,
+        f"sessions_by_module.{session['module_type']}": 1,
+    }
+
+    if session.get("brainwave_target"):
+        increments[f"sessions_by_brainwave.{session['brainwave_target']}"] = 1
+
+    if session.get("user_rating") is not None:
+        increments["rating_sum"] = session["user_rating"]
+        increments["rating_count"] = 1
+
+    return increments
+
+
+async def record_session_created(session: TrainingSession):
+    """Fold a newly inserted session into its user's rollup and daily rollup"""
+    values = session.model_dump()
+    await asyncio.gather(
+        UserSessionStats.get_motor_collection().update_one(
+            {"user_id": session.user_id},
+            {"$inc": session_increments(values), "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True
+        ),
+        record_daily_sessions([values]),
+    )
+
+
+async def record_sessions_created(sessions: List[Dict[str, Any]]):
+    """Fold a batch of inserted sessions into rollups with one update per user (and day)"""
+    per_user: Dict[str, Dict[str, int]] = {}
+    for session in sessions:
+        totals = per_user.setdefault(session["user_id"], {})
+        for field, amount in session_increments(session).items():
+            totals[field] = totals.get(field, 0) + amount
+
+    if not per_user:
+        return
+
+    now = datetime.utcnow()
+    await asyncio.gather(
+        UserSessionStats.get_motor_collection().bulk_write([
+            UpdateOne({"user_id": user_id}, {"$inc": increments, "$set": {"updated_at": now}}, upsert=True)
+            for user_id, increments in per_user.items()
+        ], ordered=False),
+        record_daily_sessions(sessions),
+    )
+
+
+def rating_increments(old_rating: Optional[int], new_rating: int) -> Dict[str, int]:
+    """$inc deltas for a rating change (first rating or re-rating)"""
+    increments = {"version": 1, "rating_sum": new_rating - (old_rating or 0)}
+    if old_rating is None:
+        increments["rating_count"] = 1
+    return increments
+
+
+async def record_rating_changed(
+    user_id: str,
+    old_rating: Optional[int],
+    new_rating: int,
+    timestamp: Optional[datetime] = None
+):
+    """Apply a rating change to a user's rollup and to the rated session's day"""
+    if old_rating == new_rating:
+        return
+
+    await asyncio.gather(
+        UserSessionStats.get_motor_collection().update_one(
+            {"user_id": user_id},
+            {"$inc": rating_increments(old_rating, new_rating), "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True
+        ),
+        record_daily_ratings([(user_id, old_rating, new_rating, timestamp)]),
+    )
+
+
+async def record_ratings_changed(changes: List[Tuple[str, Optional[int], int, Optional[datetime]]]):
+    """Apply many (user_id, old_rating, new_rating, session timestamp) changes with one update per user"""
+    per_user: Dict[str, Dict[str, int]] = {}
+    for user_id, old_rating, new_rating, _ in changes:
+        if old_rating == new_rating:
+            continue
+        totals = per_user.setdefault(user_id, {})
+        for field, amount in rating_increments(old_rating, new_rating).items():
+            totals[field] = totals.get(field, 0) + amount
+
+    if not per_user:
+        return
+
+    now = datetime.utcnow()
+    await asyncio.gather(
+        UserSessionStats.get_motor_collection().bulk_write([
+            UpdateOne({"user_id": user_id}, {"$inc": increments, "$set": {"updated_at": now}}, upsert=True)
+            for user_id, increments in per_user.items()
+        ], ordered=False),
+        record_daily_ratings(changes),
+    )
+
+
+async def get_user_stats(user_id: str) -> Optional[Dict[str, Any]]:
+    """Point read of a user's raw rollup document"""
+    return await UserSessionStats.get_motor_collection().find_one({"user_id": user_id})
+
+
+def session_stats_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Aggregation computing rollup rows per (user, module, brainwave) from sessions"""
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "module_type": "$module_type",
+                "brainwave_target": "$brainwave_target",
+            },
+            "count": {"$sum": 1},
+            "duration": {"$sum": {"$ifNull": ["$duration_seconds", 0]}},
+            "rating_sum": {"$sum": {"$ifNull": ["$user_rating", 0]}},
+            "rating_count": {"$sum": {"$cond": [{"$isNumber": "$user_rating"}, 1, 0]}},
+        }},
+    ]
+
+
+def fold_stats_rows(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Combine aggregation rows into one rollup dict per user"""
+    rollups: Dict[str, Dict[str, Any]] = {}
+
+    for row in rows:
+        key = row["_id"]
+        rollup = rollups.setdefault(key["user_id"], empty_rollup())
+
+        rollup["total_sessions"] += row["count"]
+        rollup["total_duration_seconds"] += row["duration"]
+        rollup["rating_sum"] += row["rating_sum"]
+        rollup["rating_count"] += row["rating_count"]
+
+        module = key["module_type"]
+        rollup["sessions_by_module"][module] = rollup["sessions_by_module"].get(module, 0) + row["count"]
+
+        target = key.get("brainwave_target")
+        if target:
+            rollup["sessions_by_brainwave"][target] = rollup["sessions_by_brainwave"].get(target, 0) + row["count"]
+
+    return rollups
+
+
+async def compute_rollups(user_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Recompute rollups from the sessions collection"""
+    match = {"user_id": user_id} if user_id else {}
+    rows = await session_store.aggregate(session_stats_pipeline(match)).to_list(length=None)
+    return fold_stats_rows(rows)
+
+
+async def rebuild_session_stats(user_id: Optional[str] = None) -> int:
+    """
+    Backfill rollups from the sessions collection
+
+    Each user's rollup is overwritten in place by an upsert that also bumps
+    its version. Readers never see a missing rollup, and session ETags built
+    from the old (_id, version) stop matching. Only rollups of users without
+    sessions are deleted. Sessions written during the rebuild can still be
+    overwritten, so run it while writes are quiet (e.g. right after seeding
+    or a migration).
+
+    Returns the number of rollup documents written.
+    """
+    rollups = await compute_rollups(user_id)
+    collection = UserSessionStats.get_motor_collection()
+
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"user_id": uid},
+            {"$set": {**values, "updated_at": now}, "$inc": {"version": 1}},
+            upsert=True
+        )
+        for uid, values in rollups.items()
+    ]
+    for start in range(0, len(operations), REBUILD_BATCH_SIZE):
+        await collection.bulk_write(operations[start:start + REBUILD_BATCH_SIZE], ordered=False)
+
+    query = {"user_id": user_id} if user_id else {}
+    stale = [
+        document["user_id"]
+        async for document in collection.find(query, {"user_id": 1})
+        if document["user_id"] not in rollups
+    ]
+    for start in range(0, len(stale), REBUILD_BATCH_SIZE):
+        await collection.delete_many({"user_id": {"$in": stale[start:start + REBUILD_BATCH_SIZE]}})
+
+    return len(operations)
+
+
+async def check_session_stats_drift(user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Compare stored rollups with values recomputed from sessions
+
+    Returns one entry per drifted user listing expected and stored values.
+    """
+    expected = await compute_rollups(user_id)
+
+    query = {"user_id": user_id} if user_id else {}
+    stored = {
+        doc["user_id"]: doc
+        async for doc in UserSessionStats.get_motor_collection().find(query)
+    }
+
+    drift = []
+    for uid in sorted(set(expected) | set(stored)):
+        want = expected.get(uid, empty_rollup())
+        # $inc upserts only create the counters they touched
+        have = {**empty_rollup(), **stored.get(uid, {})}
+        mismatched = {
+            field: {"expected": want[field], "stored": have.get(field)}
+            for field in ROLLUP_FIELDS
+            if want[field] != have.get(field)
+        }
+        if mismatched:
+            drift.append({"user_id": uid, "fields": mismatched})
+
+    return drift
+
+
+async def main():
+    """Rebuild or check session stats rollups"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from beanie import init_beanie
+    from database.models import MONGODB_URL, DATABASE_NAME, SessionBucket
+
+    parser = argparse.ArgumentParser(description="Maintain user_session_stats rollups")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--user", default=None, help="Only process this user ID")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(MONGODB_URL)
+    await init_beanie(
+        database=client[DATABASE_NAME],
+        document_models=[TrainingSession, SessionBucket, UserSessionStats]
+    )
+
+    if args.command == "rebuild":
+        written = await rebuild_session_stats(args.user)
+        print(f"✓ Rebuilt {written} user stats rollups")
+        return True
+
+    drift = await check_session_stats_drift(args.user)
+    if not drift:
+        print("✓ Rollups match the sessions collection")
+        return True
+
+    print(f"⚠️  {len(drift)} rollups drifted:")
+    for entry in drift:
+        print(f"  - {entry['user_id']}")
+        for field, values in entry["fields"].items():
+            print(f"      {field}: stored={values['stored']} expected={values['expected']}")
+    return False
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)
@@ -0,0 +1,297 @@
+"""
+Session Storage
+One interface over the two storage layouts for training sessions: a document
+per session ("documents", the default) or per-user per-day buckets ("buckets")
+
+Every read returns sessions in the plain document shape (_id, user_id,
+module_type, ...), so routes never need to know which layout is active.
+Switch layouts with SESSION_STORAGE after running
+database/migrate_session_storage.py.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from database.models import SessionBucket, TrainingSession
+
+SESSION_LAYOUTS = ("documents", "buckets")
+
+# Active layout for the API and tools
+SESSION_STORAGE = os.getenv("SESSION_STORAGE", "documents")
+
+# Sessions per bucket before a user's day spills into another bucket
+SESSION_BUCKET_SIZE = int(os.getenv("SESSION_BUCKET_SIZE", "200"))
+
+# Listing order; _id breaks timestamp ties so keyset cursors are unambiguous
+SESSION_SORT = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+
+# Session field -> short key inside a bucket entry (user_id lives on the bucket)
+BUCKET_KEYS = {
+    "module_type": "m",
+    "brainwave_target": "b",
+    "generated_content": "c",
+    "user_rating": "r",
+    "effectiveness_score": "e",
+    "timestamp": "t",
+    "duration_seconds": "d",
+}
+
+# Fields read before a rating change (user rollup and day rollup keys, old rating)
+RATING_FIELDS = {"user_id": 1, "user_rating": 1, "timestamp": 1}
+
+# Expand bucket documents back into plain session documents
+UNWIND_STAGES = [
+    {"$unwind": "$sessions"},
+    {"$replaceRoot": {"newRoot": {
+        "_id": "$sessions._id",
+        "user_id": "$user_id",
+        **{field: f"$sessions.{key}" for field, key in BUCKET_KEYS.items()},
+    }}},
+]
+
+
+def bucket_day(timestamp: datetime) -> datetime:
+    """UTC midnight of the bucket holding this timestamp"""
+    return datetime(timestamp.year, timestamp.month, timestamp.day)
+
+
+def to_bucket_entry(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact bucket entry for a plain session document (None fields dropped)"""
+    entry = {"_id": document["_id"]}
+    for field, key in BUCKET_KEYS.items():
+        value = document.get(field)
+        if value is not None:
+            entry[key] = value
+    return entry
+
+
+def from_bucket_entry(user_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Plain session document for a bucket entry"""
+    document = {"_id": entry["_id"], "user_id": user_id}
+    for field, key in BUCKET_KEYS.items():
+        if key in entry:
+            document[field] = entry[key]
+    return document
+
+
+def bucket_filter(query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Bucket-level prefilter implied by a session-level query
+
+    It may match more buckets than strictly needed (it works on whole days);
+    the session-level query is applied again after unwinding.
+    """
+    bucket_query = {}
+
+    if isinstance(query.get("user_id"), str):
+        bucket_query["user_id"] = query["user_id"]
+
+    if "_id" in query:
+        bucket_query["sessions._id"] = query["_id"]
+
+    timestamp = query.get("timestamp")
+    if isinstance(timestamp, dict):
+        day = {}
+        for operator in ("$gte", "$gt"):
+            if operator in timestamp:
+                day["$gte"] = bucket_day(timestamp[operator])
+        for operator in ("$lte", "$lt"):
+            if operator in timestamp:
+                day["$lte"] = timestamp[operator]
+        if day:
+            bucket_query["day"] = day
+
+    return bucket_query
+
+
+class SessionStore:
+    """Session reads and writes against one storage layout"""
+
+    def __init__(self, layout: str = SESSION_STORAGE):
+        if layout not in SESSION_LAYOUTS:
+            raise ValueError(f"Unknown session storage layout: {layout}")
+        self.layout = layout
+
+    @property
+    def bucketed(self) -> bool:
+        return self.layout == "buckets"
+
+    def collection(self):
+        """Motor collection holding this layout"""
+        return (SessionBucket if self.bucketed else TrainingSession).get_motor_collection()
+
+    def pipeline(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Aggregation stages producing the plain sessions matching a query"""
+        if not self.bucketed:
+            return [{"$match": query}]
+        return [{"$match": bucket_filter(query)}, *UNWIND_STAGES, {"$match": query}]
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs):
+        """Run a sessions pipeline; a leading $match is pushed down to buckets"""
+        if not self.bucketed:
+            return self.collection().aggregate(pipeline, **kwargs)
+
+        if pipeline and "$match" in pipeline[0]:
+            stages = self.pipeline(pipeline[0]["$match"]) + pipeline[1:]
+        else:
+            stages = UNWIND_STAGES + pipeline
+        return self.collection().aggregate(stages, **kwargs)
+
+    async def find(
+        self,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, int]] = None,
+        skip: int = 0,
+        limit: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Sessions matching a query, newest first
+
+        In the bucket layout, buckets are read newest day first (user_day or
+        day index). Every session of a day sorts before those of older days,
+        so reading stops after the day that fills skip + limit. Only those
+        days are unwound and sorted, instead of every matching bucket.
+        """
+        if not self.bucketed:
+            cursor = self.collection().find(query, projection).sort(SESSION_SORT).skip(skip).limit(limit)
+            return await cursor.to_list(length=limit or None)
+
+        stages = [{"$match": bucket_filter(query)}, {"$sort": {"day": DESCENDING}}, *UNWIND_STAGES, {"$match": query}]
+        if projection:
+            stages.append({"$project": {**projection, "timestamp": 1}})
+
+        wanted = skip + limit if limit else None
+        documents: List[Dict[str, Any]] = []
+        cursor = self.collection().aggregate(stages, batchSize=min(wanted or SESSION_BUCKET_SIZE, SESSION_BUCKET_SIZE))
+        try:
+            async for document in cursor:
+                if (
+                    wanted and len(documents) >= wanted
+                    and bucket_day(document["timestamp"]) < bucket_day(documents[-1]["timestamp"])
+                ):
+                    break
+                documents.append(document)
+        finally:
+            await cursor.close()
+
+        documents.sort(key=lambda document: (document["timestamp"], document["_id"]), reverse=True)
+        documents = documents[skip:wanted]
+        if projection and not projection.get("timestamp"):
+            for document in documents:
+                del document["timestamp"]
+        return documents
+
+    async def find_one(self, session_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """Point read of one session"""
+        if not self.bucketed:
+            return await self.collection().find_one({"_id": session_id})
+
+        bucket = await self.collection().find_one(
+            {"sessions._id": session_id},
+            {"user_id": 1, "sessions": {"$elemMatch": {"_id": session_id}}}
+        )
+        if not bucket:
+            return None
+        return from_bucket_entry(bucket["user_id"], bucket["sessions"][0])
+
+    async def count(self, query: Dict[str, Any]) -> int:
+        """Number of sessions matching a query"""
+        if not self.bucketed:
+            return await self.collection().count_documents(query)
+
+        rows = await self.collection().aggregate(
+            self.pipeline(query) + [{"$count": "count"}]
+        ).to_list(length=None)
+        return rows[0]["count"] if rows else 0
+
+    def cursor(self, query: Dict[str, Any], batch_size: int, projection: Optional[Dict[str, Any]] = None):
+        """Async iterator over matching sessions in natural (storage) order"""
+        if not self.bucketed:
+            return self.collection().find(query, projection).batch_size(batch_size)
+
+        stages = self.pipeline(query)
+        if projection:
+            stages.append({"$project": projection})
+        return self.collection().aggregate(stages, batchSize=batch_size)
+
+    async def insert_many(self, documents: List[Dict[str, Any]]) -> Dict[int, str]:
+        """
+        Unordered insert of plain session documents (each with an _id)
+
+        Returns {index: error message} for rows that failed.
+        """
+        if not documents:
+            return {}
+
+        try:
+            if not self.bucketed:
+                await self.collection().insert_many(documents, ordered=False)
+            else:
+                await self.collection().bulk_write([
+                    UpdateOne(
+                        {
+                            "user_id": document["user_id"],
+                            "day": bucket_day(document["timestamp"]),
+                            "session_count": {"$lt": SESSION_BUCKET_SIZE},
+                        },
+                        {"$push": {"sessions": to_bucket_entry(document)}, "$inc": {"session_count": 1}},
+                        upsert=True
+                    )
+                    for document in documents
+                ], ordered=False)
+        except BulkWriteError as e:
+            return {error["index"]: error.get("errmsg", "Write failed") for error in e.details.get("writeErrors", [])}
+
+        return {}
+
+    async def set_rating(self, session_id: ObjectId, rating: int) -> Optional[Dict[str, Any]]:
+        """
+        Atomically set a session's rating
+
+        Returns the pre-image as {"user_id", "user_rating", "timestamp"}, or
+        None if the session doesn't exist.
+        """
+        if not self.bucketed:
+            return await self.collection().find_one_and_update(
+                {"_id": session_id},
+                {"$set": {"user_rating": rating}},
+                projection=RATING_FIELDS,
+                return_document=ReturnDocument.BEFORE
+            )
+
+        bucket = await self.collection().find_one_and_update(
+            {"sessions._id": session_id},
+            {"$set": {"sessions.$.r": rating}},
+            projection={"user_id": 1, "sessions": {"$elemMatch": {"_id": session_id}}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not bucket:
+            return None
+        entry = bucket["sessions"][0]
+        return {"user_id": bucket["user_id"], "user_rating": entry.get("r"), "timestamp": entry.get("t")}
+
+    async def get_ratings(self, session_ids: Iterable[ObjectId]) -> Dict[ObjectId, Dict[str, Any]]:
+        """{session_id: {"user_id", "user_rating", "timestamp"}} for the sessions that exist"""
+        query = {"_id": {"$in": list(session_ids)}}
+        if not self.bucketed:
+            cursor = self.collection().find(query, RATING_FIELDS)
+        else:
+            cursor = self.aggregate([{"$match": query}, {"$project": RATING_FIELDS}])
+        return {document["_id"]: document async for document in cursor}
+
+    def conditional_rating_update(self, session_id: ObjectId, expected: Optional[int], rating: int) -> UpdateOne:
+        """bulk_write op setting a rating only if it still equals `expected`"""
+        if not self.bucketed:
+            return UpdateOne({"_id": session_id, "user_rating": expected}, {"$set": {"user_rating": rating}})
+        return UpdateOne(
+            {"sessions": {"$elemMatch": {"_id": session_id, "r": expected}}},
+            {"$set": {"sessions.$.r": rating}}
+        )
+
+
+session_store = SessionStore()
@@ -0,0 +1,331 @@
+"""
+Synthetic Workload Generator
+Seeded, column-wise NumPy generator of production-like training sessions:
+Zipf-skewed user activity, chronotype-driven time of day and per-module
+generated_content
+
+The same seed, user count, end date and session count always produce the same
+documents (including their _ids), so benchmarks and query-plan checks can be
+repeated exactly.
+
+Usage:
+    python database/synthetic_workload.py --sessions 1000000 --users 5000 --seed 42
+    python database/seed_training_data.py --generator numpy --stream --sessions 10000000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from bson import ObjectId
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from database.brainwave_bands import BRAINWAVE_STATES
+from database.seed_training_data import (
+    EXERCISE_TYPES,
+    HARMONIC_COMPLEXITY,
+    JOURNAL_PROMPTS,
+    MODULE_TYPES,
+    PFC_INTERRUPTS,
+    PFC_PROTOCOLS,
+    PFC_TRIGGERS,
+    READING_TOPICS,
+    REHEARSAL_DETAIL_LEVELS,
+    REHEARSAL_SKILLS,
+    SENSORY_CHANNELS,
+)
+from database.session_store import bucket_day
+
+# Share of users per chronotype and their activity peaks as (hour, spread, weight)
+CHRONOTYPES = {
+    "lion": {"share": 0.15, "peaks": [(6.5, 1.5, 1.0), (12.5, 2.0, 0.3)]},
+    "bear": {"share": 0.55, "peaks": [(8.5, 1.5, 0.7), (13.0, 2.0, 0.4), (19.5, 2.0, 0.8)]},
+    "wolf": {"share": 0.15, "peaks": [(13.0, 2.5, 0.4), (21.5, 1.5, 1.0)]},
+    "dolphin": {"share": 0.15, "peaks": [(10.0, 4.0, 0.8), (23.0, 2.0, 0.5)]},
+}
+
+# Relative activity Monday..Sunday
+WEEKDAY_WEIGHTS = [1.0, 1.0, 0.95, 0.95, 0.85, 0.7, 0.75]
+
+# Population-wide module mix; each user's own mix is drawn around it
+MODULE_MIX = {"brainwave": 0.4, "movers": 0.25, "pfc_gym": 0.2, "mental_rehearsal": 0.15}
+
+# Lower = users stick more to one module
+MODULE_CONCENTRATION = 4.0
+
+BRAINWAVE_MIX = {"delta": 0.1, "theta": 0.25, "alpha": 0.35, "beta": 0.2, "gamma": 0.1}
+
+# Median session length (seconds) and log-normal spread per module
+MODULE_DURATIONS = {
+    "brainwave": (1200, 0.5),
+    "movers": (1500, 0.4),
+    "pfc_gym": (300, 0.4),
+    "mental_rehearsal": (600, 0.5),
+}
+
+RATED_SHARE = 0.8
+SCORED_SHARE = 0.7
+
+# Activity of the user ranked k is proportional to 1 / k ** ZIPF_EXPONENT
+ZIPF_EXPONENT = 1.1
+
+# Sessions generated per NumPy chunk (each chunk has its own derived RNG)
+GENERATOR_CHUNK_SIZE = 10_000
+
+
+def synthetic_user_ids(num_users: int) -> List[str]:
+    """User IDs of the synthetic population, heaviest user first"""
+    return [f"user_{index:06d}@loadtest.brainbuddy.com" for index in range(num_users)]
+
+
+def hourly_distribution(peaks: List[tuple]) -> np.ndarray:
+    """Probability of each hour of the day from wrapped Gaussian peaks"""
+    hours = np.arange(24) + 0.5
+    weights = np.full(24, 0.02)
+    for center, spread, weight in peaks:
+        distance = np.abs(hours - center)
+        distance = np.minimum(distance, 24 - distance)
+        weights += weight * np.exp(-0.5 * (distance / spread) ** 2)
+    return weights / weights.sum()
+
+
+def pick(cdf: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """Sample indices from a cumulative distribution (one row per sample if 2-D)"""
+    if cdf.ndim == 1:
+        return np.minimum(np.searchsorted(cdf, u, side="right"), len(cdf) - 1)
+    return np.minimum((u[:, None] >= cdf).sum(axis=1), cdf.shape[1] - 1)
+
+
+def object_ids(seconds: np.ndarray, rng: np.random.Generator) -> List[ObjectId]:
+    """ObjectIds embedding each session's timestamp, with seeded random tails"""
+    raw = np.empty((len(seconds), 12), dtype=np.uint8)
+    raw[:, :4] = seconds.astype(">u4").view(np.uint8).reshape(-1, 4)
+    raw[:, 4:] = rng.integers(0, 256, size=(len(seconds), 8), dtype=np.uint8)
+    return [ObjectId(row.tobytes()) for row in raw]
+
+
+class SyntheticWorkload:
+    """
+    A seeded user population that generates sessions a chunk at a time
+
+    Users get a Zipf activity weight (a few heavy users dominate), a
+    chronotype (time-of-day profile) and a personal module mix. Chunk k is
+    drawn from an RNG derived from (seed, k), so output depends only on the
+    parameters, never on insert batch sizes or concurrency.
+    """
+
+    def __init__(
+        self,
+        num_users: int = 1000,
+        seed: int = 42,
+        days: int = 180,
+        zipf_exponent: float = ZIPF_EXPONENT,
+        end: Optional[datetime] = None
+    ):
+        self.seed = seed
+        self.days = days
+        # Sessions end at the most recent UTC midnight unless pinned
+        self.end = bucket_day(end or datetime.utcnow())
+        self.start = self.end - timedelta(days=days)
+
+        rng = np.random.default_rng([seed, 0xB8A1])
+        self.user_ids = synthetic_user_ids(num_users)
+
+        activity = 1.0 / np.arange(1, num_users + 1) ** zipf_exponent
+        self.user_cdf = np.cumsum(activity / activity.sum())
+
+        self.chronotype_names = list(CHRONOTYPES)
+        shares = np.array([CHRONOTYPES[name]["share"] for name in self.chronotype_names])
+        self.user_chronotypes = rng.choice(len(shares), size=num_users, p=shares / shares.sum())
+        self.hour_pmf = np.array([hourly_distribution(CHRONOTYPES[name]["peaks"]) for name in self.chronotype_names])
+        self.hour_cdf = np.cumsum(self.hour_pmf, axis=1)
+
+        mix = np.array([MODULE_MIX[module] for module in MODULE_TYPES])
+        self.user_module_cdf = np.cumsum(rng.dirichlet(mix * MODULE_CONCENTRATION, size=num_users), axis=1)
+
+        # Day weights over the range: weekday pattern
+        day_of_week = (np.arange(days) + self.start.weekday()) % 7
+        day_weights = np.array(WEEKDAY_WEIGHTS)[day_of_week]
+        self.day_cdf = np.cumsum(day_weights / day_weights.sum())
+
+        self.targets = list(BRAINWAVE_MIX)
+        self.target_cdf = np.cumsum(list(BRAINWAVE_MIX.values()))
+        self.band_low = np.array([BRAINWAVE_STATES[target]["range"][0] for target in self.targets])
+        self.band_high = np.array([BRAINWAVE_STATES[target]["range"][1] for target in self.targets])
+
+    def columns(self, chunk: int, size: int) -> Dict[str, np.ndarray]:
+        """Every session field for one chunk, as NumPy columns"""
+        rng = np.random.default_rng([self.seed, chunk])
+
+        users = pick(self.user_cdf, rng.random(size))
+        modules = pick(self.user_module_cdf[users], rng.random(size))
+
+        # Day by weekday weight, hour by the user's chronotype, then minute/second
+        day = pick(self.day_cdf, rng.random(size))
+        chronotypes = self.user_chronotypes[users]
+        hour = pick(self.hour_cdf[chronotypes], rng.random(size))
+        start = int((self.start - datetime(1970, 1, 1)).total_seconds())
+        seconds = start + day * 86400 + hour * 3600 + rng.integers(0, 3600, size)
+
+        medians = np.array([MODULE_DURATIONS[module][0] for module in MODULE_TYPES])[modules]
+        spreads = np.array([MODULE_DURATIONS[module][1] for module in MODULE_TYPES])[modules]
+        durations = np.clip(medians * np.exp(spreads * rng.standard_normal(size)), 120, 3600).astype(np.int64)
+
+        # Brainwave parameters (drawn for every row, used where module is brainwave)
+        targets = pick(self.target_cdf, rng.random(size))
+        low, high = self.band_low[targets], self.band_high[targets]
+        beat = low + (high - low) * rng.random(size)
+        modulation = rng.uniform(0.1, 0.5, size)
+        pink_noise = rng.uniform(0.1, 0.3, size)
+
+        # Effectiveness: beats near the band centre, moderate modulation and
+        # sessions at the user's peak hours work better
+        centrality = 1 - np.abs(beat - (low + high) / 2) / ((high - low) / 2)
+        hour_fit = self.hour_pmf[chronotypes, hour] * 24  # 1 = an average hour for this user
+        is_brainwave = modules == MODULE_TYPES.index("brainwave")
+        quality = np.where(is_brainwave, 0.6 * centrality + 0.4 * (1 - np.abs(modulation - 0.3) / 0.2), 0.5)
+        effectiveness = np.clip(
+            0.35 + 0.3 * rng.beta(2, 2, size) + 0.2 * quality + 0.05 * np.minimum(hour_fit, 2)
+            + 0.05 * rng.standard_normal(size),
+            0, 1
+        )
+        ratings = np.clip(np.rint(1 + 4 * effectiveness + 0.6 * rng.standard_normal(size)), 1, 5).astype(np.int64)
+
+        return {
+            "_id": object_ids(seconds, rng),
+            "user": users,
+            "module": modules,
+            "seconds": seconds,
+            "duration": durations,
+            "scored": rng.random(size) < SCORED_SHARE,
+            "effectiveness": np.round(effectiveness, 2),
+            "rated": rng.random(size) < RATED_SHARE,
+            "rating": ratings,
+            "target": targets,
+            "beat": np.round(beat, 2),
+            "carrier": np.round(beat + rng.uniform(200, 400, size), 2),
+            "volume": np.round(rng.uniform(0.4, 0.7, size), 2),
+            "harmonics": rng.integers(0, len(HARMONIC_COMPLEXITY), size),
+            "modulation": np.round(modulation, 2),
+            "pink_noise": np.round(pink_noise, 2),
+            "choices": rng.integers(0, 1 << 30, size=(size, 4)),
+            "counts": rng.random((size, 3)),
+            "channels": np.argsort(rng.random((size, len(SENSORY_CHANNELS))), axis=1),
+        }
+
+    def documents(self, chunk: int, size: int) -> List[Dict[str, Any]]:
+        """Raw session documents (TrainingSession shape plus _id) for one chunk"""
+        columns = self.columns(chunk, size)
+        # Plain Python values once per column, not per element
+        lists = {name: values if isinstance(values, list) else values.tolist() for name, values in columns.items()}
+        timestamps = (
+            np.datetime64("1970-01-01T00:00:00", "s") + columns["seconds"].astype("timedelta64[s]")
+        ).astype(datetime).tolist()
+
+        documents = []
+        for row in range(size):
+            module = MODULE_TYPES[lists["module"][row]]
+            choices = lists["choices"][row]
+            counts = lists["counts"][row]
+            document = {
+                "_id": lists["_id"][row],
+                "user_id": self.user_ids[lists["user"][row]],
+                "module_type": module,
+                "brainwave_target": None,
+                "generated_content": {},
+                "user_rating": lists["rating"][row] if lists["rated"][row] else None,
+                "effectiveness_score": lists["effectiveness"][row] if lists["scored"][row] else None,
+                "timestamp": timestamps[row],
+                "duration_seconds": lists["duration"][row],
+            }
+
+            if module == "brainwave":
+                beat = lists["beat"][row]
+                document["brainwave_target"] = self.targets[lists["target"][row]]
+                document["generated_content"] = {
+                    "carrier_frequency": lists["carrier"][row],
+                    "binaural_beat_frequency": beat,
+                    "isochronic_tone_frequency": round(beat * 2, 2),
+                    "volume": lists["volume"][row],
+                    "tempo_bpm": int(60 + beat * 2),
+                    "harmonic_complexity": HARMONIC_COMPLEXITY[lists["harmonics"][row]],
+                    "modulation_depth": lists["modulation"][row],
+                    "pink_noise_level": lists["pink_noise"][row],
+                }
+            elif module == "movers":
+                document["generated_content"] = {
+                    "meditation_duration": 5 + int(counts[0] * 11),
+                    "breathwork_cycles": 3 + int(counts[1] * 8),
+                    "visualization_script": "success_visualization_v1",
+                    "exercise_type": EXERCISE_TYPES[choices[0] % len(EXERCISE_TYPES)],
+                    "reading_topic": READING_TOPICS[choices[1] % len(READING_TOPICS)],
+                    "journal_prompt": JOURNAL_PROMPTS[choices[2] % len(JOURNAL_PROMPTS)],
+                }
+            elif module == "pfc_gym":
+                document["generated_content"] = {
+                    "protocol_type": PFC_PROTOCOLS[choices[0] % len(PFC_PROTOCOLS)],
+                    "trigger_identified": PFC_TRIGGERS[choices[1] % len(PFC_TRIGGERS)],
+                    "interrupt_technique": PFC_INTERRUPTS[choices[2] % len(PFC_INTERRUPTS)],
+                    "duration_seconds": 120 + int(counts[0] * 181),
+                    "focus_score": round(0.5 + counts[1] * 0.5, 2),
+                }
+            else:
+                document["generated_content"] = {
+                    "skill_target": REHEARSAL_SKILLS[choices[0] % len(REHEARSAL_SKILLS)],
+                    "visualization_detail_level": REHEARSAL_DETAIL_LEVELS[choices[1] % len(REHEARSAL_DETAIL_LEVELS)],
+                    "sensory_channels": [
+                        SENSORY_CHANNELS[index] for index in lists["channels"][row][:2 + choices[3] % 3]
+                    ],
+                    "repetitions": 3 + int(counts[0] * 8),
+                    "vividness_score": round(0.6 + counts[2] * 0.4, 2),
+                }
+
+            documents.append(document)
+
+        return documents
+
+    def generate(self, num_sessions: int) -> Iterator[Dict[str, Any]]:
+        """Lazily yield num_sessions documents, one NumPy chunk at a time"""
+        for chunk, first in enumerate(range(0, num_sessions, GENERATOR_CHUNK_SIZE)):
+            yield from self.documents(chunk, min(GENERATOR_CHUNK_SIZE, num_sessions - first))
+
+
+def main():
+    """Generate sessions without a database and report rate and skew"""
+    parser = argparse.ArgumentParser(description="Preview the synthetic session workload")
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=180)
+    args = parser.parse_args()
+
+    workload = SyntheticWorkload(args.users, args.seed, args.days)
+
+    per_user: Dict[str, int] = {}
+    per_module: Dict[str, int] = {}
+    per_hour = [0] * 24
+
+    started = time.perf_counter()
+    for document in workload.generate(args.sessions):
+        per_user[document["user_id"]] = per_user.get(document["user_id"], 0) + 1
+        per_module[document["module_type"]] = per_module.get(document["module_type"], 0) + 1
+        per_hour[document["timestamp"].hour] += 1
+    elapsed = max(time.perf_counter() - started, 1e-9)
+
+    print(f"✓ Generated {args.sessions:,} sessions in {elapsed:.2f}s ({args.sessions / elapsed:,.0f}/s)")
+
+    counts = sorted(per_user.values(), reverse=True)
+    top = max(1, len(counts) // 100)
+    print(f"  Active users: {len(counts):,}; top 1% hold {sum(counts[:top]) / args.sessions:.0%} of sessions")
+    print("  Modules: " + ", ".join(f"{module} {count / args.sessions:.0%}" for module, count in per_module.items()))
+    peak = max(per_hour)
+    for hour, count in enumerate(per_hour):
+        print(f"  {hour:02d}:00 {'#' * round(40 * count / peak)}")
+
+
+if __name__ == "__main__":
+    main()
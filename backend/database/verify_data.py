@@ -1,20 +1,161 @@
 """
 Verification Script
 Test that data seeding and API endpoints work correctly
+
+Each collection is summarised by a single $facet aggregation and the checks
+run concurrently; session data quality is checked on a $sample, so the
+script stays fast on load-test sized datasets.
 """
 
 import asyncio
 import sys
+import time
+from typing import Any, Awaitable, Dict, List, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 import os
 from dotenv import load_dotenv
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from database.models import TrainingSession, BrainKnowledge, User
+from database.models import TrainingSession, SessionBucket, BrainKnowledge, User
+from database.brainwave_bands import BRAINWAVE_STATES
+from database.seed_training_data import MODULE_TYPES
+from database.session_store import session_store
 
 load_dotenv()
 
+# Sessions drawn by $sample for the data quality check
+QUALITY_SAMPLE_SIZE = 1000
+
+# Knowledge entries listed in the report
+KNOWLEDGE_LISTED = 20
+
+
+async def timed(check: Awaitable[Any]) -> Tuple[Any, float]:
+    """Await a check, returning (result, elapsed milliseconds)"""
+    started = time.perf_counter()
+    result = await check
+    return result, (time.perf_counter() - started) * 1000
+
+
+def facet_count(rows: List[Dict[str, Any]]) -> int:
+    """Value of a [{"$count": "count"}] facet (empty when nothing matched)"""
+    return rows[0]["count"] if rows else 0
+
+
+async def check_users() -> Dict[str, Any]:
+    """User count and a few example emails"""
+    rows = await User.get_motor_collection().aggregate([
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "examples": [{"$limit": 3}, {"$project": {"_id": 0, "email": 1}}],
+        }}
+    ]).to_list(length=None)
+    return {
+        "total": facet_count(rows[0]["total"]),
+        "examples": [user["email"] for user in rows[0]["examples"]],
+    }
+
+
+async def check_sessions() -> Dict[str, Any]:
+    """Session count with module and brainwave-target breakdowns, in one pass"""
+    rows = await session_store.aggregate([
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "by_module": [{"$group": {"_id": "$module_type", "count": {"$sum": 1}}}],
+            "by_brainwave": [
+                {"$match": {"module_type": "brainwave"}},
+                {"$group": {"_id": "$brainwave_target", "count": {"$sum": 1}}},
+            ],
+        }}
+    ]).to_list(length=None)
+    return {
+        "total": facet_count(rows[0]["total"]),
+        "by_module": {row["_id"]: row["count"] for row in rows[0]["by_module"]},
+        "by_brainwave": {row["_id"]: row["count"] for row in rows[0]["by_brainwave"]},
+    }
+
+
+async def check_knowledge() -> Dict[str, Any]:
+    """Knowledge count, entries with invalid evidence/citations, and a listing"""
+    rows = await BrainKnowledge.get_motor_collection().aggregate([
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "invalid": [
+                {"$match": {"$or": [
+                    {"evidence_strength": {"$not": {"$gte": 0, "$lte": 1}}},
+                    {"citations.0": {"$exists": False}},
+                ]}},
+                {"$count": "count"},
+            ],
+            "entries": [
+                {"$limit": KNOWLEDGE_LISTED},
+                {"$project": {"_id": 0, "stimulus_type": 1, "outcome": 1, "evidence_strength": 1}},
+            ],
+        }}
+    ]).to_list(length=None)
+    return {
+        "total": facet_count(rows[0]["total"]),
+        "invalid": facet_count(rows[0]["invalid"]),
+        "entries": rows[0]["entries"],
+    }
+
+
+def session_problems(session: Dict[str, Any]) -> List[str]:
+    """Data quality problems of one session document"""
+    problems = []
+
+    if not session.get("user_id"):
+        problems.append("missing user_id")
+    if session.get("module_type") not in MODULE_TYPES:
+        problems.append(f"unknown module_type {session.get('module_type')!r}")
+    if session.get("timestamp") is None:
+        problems.append("missing timestamp")
+
+    duration = session.get("duration_seconds")
+    if duration is not None and duration <= 0:
+        problems.append("non-positive duration")
+
+    rating = session.get("user_rating")
+    if rating is not None and not 1 <= rating <= 5:
+        problems.append("rating outside 1-5")
+
+    score = session.get("effectiveness_score")
+    if score is not None and not 0 <= score <= 1:
+        problems.append("effectiveness outside 0-1")
+
+    if session.get("module_type") == "brainwave":
+        target = session.get("brainwave_target")
+        if target not in BRAINWAVE_STATES:
+            problems.append(f"unknown brainwave_target {target!r}")
+        else:
+            beat = (session.get("generated_content") or {}).get("binaural_beat_frequency")
+            low, high = BRAINWAVE_STATES[target]["range"]
+            if beat is None or not low <= beat <= high:
+                problems.append("binaural beat outside target band")
+
+    return problems
+
+
+async def check_session_quality(sample_size: int = QUALITY_SAMPLE_SIZE) -> Dict[str, Any]:
+    """Validate a random sample of sessions instead of the whole collection"""
+    sample = await session_store.aggregate([{"$sample": {"size": sample_size}}]).to_list(length=None)
+
+    problems: Dict[str, int] = {}
+    invalid = 0
+    for session in sample:
+        found = session_problems(session)
+        invalid += bool(found)
+        for problem in found:
+            problems[problem] = problems.get(problem, 0) + 1
+
+    return {
+        "sampled": len(sample),
+        "invalid": invalid,
+        "problems": problems,
+        "example": next((session for session in sample if session.get("module_type") == "brainwave"), None),
+    }
+
 
 async def verify_data():
     """Verify that data was seeded correctly"""
@@ -31,81 +172,94 @@ async def verify_data():
         client = AsyncIOMotorClient(MONGODB_URL)
         await init_beanie(
             database=client[DATABASE_NAME],
-            document_models=[User, TrainingSession, BrainKnowledge]
+            document_models=[User, TrainingSession, SessionBucket, BrainKnowledge]
         )
         print("   ✅ Connected successfully")
     except Exception as e:
         print(f"   ❌ Connection failed: {e}")
         return False
     
+    # Independent checks run concurrently; each reports its own time
+    started = time.perf_counter()
+    (users, users_ms), (sessions, sessions_ms), (knowledge, knowledge_ms), (quality, quality_ms) = await asyncio.gather(
+        timed(check_users()),
+        timed(check_sessions()),
+        timed(check_knowledge()),
+        timed(check_session_quality()),
+    )
+    total_ms = (time.perf_counter() - started) * 1000
+    
     # Check users
-    print("\n2. Checking users...")
-    user_count = await User.count()
+    print(f"\n2. Checking users... ({users_ms:.0f} ms)")
+    user_count = users["total"]
     if user_count >= 3:
         print(f"   ✅ Found {user_count} users")
-        users = await User.find().limit(3).to_list()
-        for user in users:
-            print(f"      - {user.email}")
+        for email in users["examples"]:
+            print(f"      - {email}")
     else:
         print(f"   ⚠️  Only {user_count} users found (expected at least 3)")
     
     # Check sessions
-    print("\n3. Checking training sessions...")
-    session_count = await TrainingSession.count()
+    print(f"\n3. Checking training sessions... ({sessions_ms:.0f} ms, one $facet pass)")
+    session_count = sessions["total"]
     if session_count >= 100:
         print(f"   ✅ Found {session_count} sessions")
         
         # Check distribution
-        for module in ["movers", "pfc_gym", "mental_rehearsal", "brainwave"]:
-            count = await TrainingSession.find(TrainingSession.module_type == module).count()
-            print(f"      - {module}: {count}")
+        for module in MODULE_TYPES:
+            print(f"      - {module}: {sessions['by_module'].get(module, 0)}")
     else:
         print(f"   ⚠️  Only {session_count} sessions found (expected at least 100)")
     
-    # Check brainwave sessions
+    # Check brainwave sessions (same $facet pass)
     print("\n4. Checking brainwave sessions...")
-    brainwave_count = await TrainingSession.find(
-        TrainingSession.module_type == "brainwave"
-    ).count()
+    brainwave_count = sessions["by_module"].get("brainwave", 0)
     if brainwave_count > 0:
         print(f"   ✅ Found {brainwave_count} brainwave sessions")
-        for state in ["delta", "theta", "alpha", "beta", "gamma"]:
-            count = await TrainingSession.find(
-                TrainingSession.brainwave_target == state
-            ).count()
+        for state in BRAINWAVE_STATES:
+            count = sessions["by_brainwave"].get(state, 0)
             if count > 0:
                 print(f"      - {state}: {count}")
     else:
         print("   ⚠️  No brainwave sessions found")
     
     # Check knowledge base
-    print("\n5. Checking brain knowledge base...")
-    knowledge_count = await BrainKnowledge.count()
+    print(f"\n5. Checking brain knowledge base... ({knowledge_ms:.0f} ms)")
+    knowledge_count = knowledge["total"]
     if knowledge_count >= 5:
         print(f"   ✅ Found {knowledge_count} knowledge entries")
-        entries = await BrainKnowledge.find().to_list()
-        for entry in entries:
-            print(f"      - {entry.stimulus_type} → {entry.outcome}")
-            print(f"        Evidence: {entry.evidence_strength:.2f}")
+        for entry in knowledge["entries"]:
+            print(f"      - {entry['stimulus_type']} → {entry['outcome']}")
+            print(f"        Evidence: {entry['evidence_strength']:.2f}")
+        if knowledge_count > len(knowledge["entries"]):
+            print(f"      ... and {knowledge_count - len(knowledge['entries'])} more")
     else:
         print(f"   ⚠️  Only {knowledge_count} knowledge entries (expected at least 5)")
+    if knowledge["invalid"]:
+        print(f"   ⚠️  {knowledge['invalid']} entries have evidence outside 0-1 or no citations")
     
     # Check sample session data
-    print("\n6. Checking sample session data quality...")
-    sample_session = await TrainingSession.find_one(
-        TrainingSession.module_type == "brainwave"
-    )
+    print(f"\n6. Checking session data quality on a {quality['sampled']}-session sample... ({quality_ms:.0f} ms)")
+    if quality["invalid"]:
+        print(f"   ⚠️  {quality['invalid']} of {quality['sampled']} sampled sessions have problems:")
+        for problem, count in sorted(quality["problems"].items(), key=lambda item: -item[1]):
+            print(f"      - {problem}: {count}")
+    elif quality["sampled"]:
+        print("   ✅ All sampled sessions are valid")
+    
+    sample_session = quality["example"]
     if sample_session:
+        content = sample_session.get("generated_content") or {}
         print("   ✅ Sample brainwave session:")
-        print(f"      - User: {sample_session.user_id}")
-        print(f"      - Target: {sample_session.brainwave_target}")
-        print(f"      - Duration: {sample_session.duration_seconds}s")
-        if sample_session.generated_content:
-            print(f"      - Music params: {len(sample_session.generated_content)} fields")
-            if 'binaural_beat_frequency' in sample_session.generated_content:
-                print(f"        - Binaural beat: {sample_session.generated_content['binaural_beat_frequency']} Hz")
-        if sample_session.user_rating:
-            print(f"      - Rating: {sample_session.user_rating}/5")
+        print(f"      - User: {sample_session['user_id']}")
+        print(f"      - Target: {sample_session.get('brainwave_target')}")
+        print(f"      - Duration: {sample_session.get('duration_seconds')}s")
+        if content:
+            print(f"      - Music params: {len(content)} fields")
+            if 'binaural_beat_frequency' in content:
+                print(f"        - Binaural beat: {content['binaural_beat_frequency']} Hz")
+        if sample_session.get("user_rating"):
+            print(f"      - Rating: {sample_session['user_rating']}/5")
     else:
         print("   ⚠️  No sample session found")
     
@@ -115,8 +269,15 @@ async def verify_data():
     print(f"  Users: {user_count}")
     print(f"  Sessions: {session_count}")
     print(f"  Knowledge: {knowledge_count}")
+    print(
+        f"  Timing: users {users_ms:.0f} ms, sessions {sessions_ms:.0f} ms, knowledge {knowledge_ms:.0f} ms, "
+        f"quality {quality_ms:.0f} ms ({total_ms:.0f} ms total, concurrent)"
+    )
     
-    all_good = user_count >= 3 and session_count >= 100 and knowledge_count >= 5
+    all_good = (
+        user_count >= 3 and session_count >= 100 and knowledge_count >= 5
+        and not quality["invalid"] and not knowledge["invalid"]
+    )
     
     if all_good:
         print("\n✅ All checks passed! Data is ready to use.")
@@ -0,0 +1,27 @@
+"""
+Collection Version Stamps
+Monotonic change counters used to invalidate in-process caches and build ETags
+"""
+
+from pymongo import ReturnDocument
+
+from database.models import CollectionVersion
+
+
+async def get_collection_version(collection: str) -> int:
+    """Current version of a collection (0 if it was never bumped)"""
+    document = await CollectionVersion.get_motor_collection().find_one(
+        {"collection": collection}, {"version": 1}
+    )
+    return document["version"] if document else 0
+
+
+async def bump_collection_version(collection: str) -> int:
+    """Record a change to a collection and return its new version"""
+    document = await CollectionVersion.get_motor_collection().find_one_and_update(
+        {"collection": collection},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return document["version"]
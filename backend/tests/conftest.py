@@ -0,0 +1,42 @@
+"""
+Test Configuration
+The API on a throwaway in-memory SQLite store, with EEG and rendered audio
+files under a temporary directory (no MongoDB needed)
+
+Run from backend/:
+    python -m pytest -q
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Must be set before the repository and stores are first imported
+SCRATCH_DIR = tempfile.mkdtemp(prefix="brain_buddy_tests-")
+os.environ["STORAGE_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = ":memory:"
+os.environ["EEG_DATA_DIR"] = os.path.join(SCRATCH_DIR, "eeg")
+os.environ["AUDIO_CACHE_DIR"] = os.path.join(SCRATCH_DIR, "audio")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+
+
+@pytest.fixture
+def run_api():
+    """Run `scenario(client)` against the app with its lifespan (a fresh store per call)"""
+    from api.main import app
+
+    def run(scenario):
+        async def main():
+            async with app.router.lifespan_context(app):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await scenario(client)
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,136 @@
+"""
+Rendered audio: Range parsing, ranged responses and the bounded cache directory
+"""
+
+import os
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from api import audio
+from api.audio import RangeNotSatisfiable, parse_range, prune_cache, render_spec, write_wav
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=900-", (900, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=0-1,5-9", None),
+    ("bytes=10-5", None),
+    ("items=0-9", None),
+    ("bytes=abc", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=-0"])
+def test_parse_range_not_satisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, SIZE)
+
+
+def test_music_ranges(run_api):
+    async def scenario(client):
+        created = await client.post(
+            "/api/music/", json={"user_id": "audio-user", "target_state": "alpha", "duration": 1}
+        )
+        url = created.json()["url"]
+        full = await client.get(url)
+        etag = full.headers["etag"]
+        return created, full, {
+            "single": await client.get(url, headers={"Range": "bytes=0-43"}),
+            "suffix": await client.get(url, headers={"Range": "bytes=-100"}),
+            "past_end": await client.get(url, headers={"Range": f"bytes={len(full.content)}-"}),
+            "if_range": await client.get(url, headers={"Range": "bytes=0-43", "If-Range": etag}),
+            "stale_if_range": await client.get(url, headers={"Range": "bytes=0-43", "If-Range": '"other"'}),
+            "head": await client.head(url, headers={"Range": "bytes=0-43"}),
+            "missing": await client.get("/api/music/" + "0" * 24),
+        }
+
+    created, full, responses = run_api(scenario)
+    size = len(full.content)
+    assert created.status_code == 200 and created.json()["bytes"] == size
+    assert full.status_code == 200 and full.content[:4] == b"RIFF"
+
+    single = responses["single"]
+    assert single.status_code == 206
+    assert single.headers["content-range"] == f"bytes 0-43/{size}"
+    assert single.content == full.content[:44]
+
+    suffix = responses["suffix"]
+    assert suffix.status_code == 206 and suffix.content == full.content[-100:]
+
+    past_end = responses["past_end"]
+    assert past_end.status_code == 416
+    assert past_end.headers["content-range"] == f"bytes */{size}"
+
+    assert responses["if_range"].status_code == 206
+    assert responses["stale_if_range"].status_code == 200
+    assert len(responses["stale_if_range"].content) == size
+    assert responses["head"].status_code == 206 and responses["head"].content == b""
+    assert responses["missing"].status_code == 404
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio, "AUDIO_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def write_track(directory, index: int, size: int, age: float) -> str:
+    track_id = f"{index:024x}"
+    path = directory / f"{track_id}.wav"
+    path.write_bytes(b"\0" * size)
+    used_at = time.time() - age
+    os.utime(path, (used_at, used_at))
+    return track_id
+
+
+def test_prune_deletes_least_recently_used_over_budget(cache_dir):
+    oldest = write_track(cache_dir, 1, 400, age=300)
+    older = write_track(cache_dir, 2, 400, age=200)
+    newest = write_track(cache_dir, 3, 400, age=100)
+    (cache_dir / "notes.txt").write_bytes(b"\0" * 4000)
+
+    assert prune_cache(max_bytes=800, max_age=0) == [oldest]
+    assert prune_cache(newest, max_bytes=400, max_age=0) == [older]
+    assert {path.name for path in cache_dir.iterdir()} == {"notes.txt", f"{newest}.wav"}
+
+
+def test_prune_deletes_expired_tracks_but_keeps_the_new_one(cache_dir):
+    expired = write_track(cache_dir, 1, 10, age=3600)
+    kept = write_track(cache_dir, 2, 10, age=7200)
+    fresh = write_track(cache_dir, 3, 10, age=10)
+
+    assert prune_cache(kept, max_bytes=10 ** 9, max_age=600) == [expired]
+    assert {path.stem for path in cache_dir.iterdir()} == {kept, fresh}
+
+
+def test_open_marks_a_track_used(cache_dir):
+    track_id = write_track(cache_dir, 1, 10, age=3600)
+    store = audio.AudioStore()
+
+    assert store.open(track_id) is not None
+    assert time.time() - os.path.getmtime(cache_dir / f"{track_id}.wav") < 60
+    os.remove(cache_dir / f"{track_id}.wav")
+    store._maps[track_id] = (store._maps[track_id][0], 0.0)
+    assert store.open(track_id) is None
+
+
+def test_concurrent_renders_of_one_spec_do_not_share_a_temp_file(tmp_path):
+    spec = render_spec("theta", {}, 2)
+    path = str(tmp_path / "track.wav")
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: write_wav(path, spec), range(4)))
+
+    with wave.open(path, "rb") as rendered:
+        assert rendered.getnframes() == int(round(spec["duration"] * spec["sample_rate"]))
+    assert os.listdir(tmp_path) == ["track.wav"]
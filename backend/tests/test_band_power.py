@@ -0,0 +1,123 @@
+"""
+Band Power Tests
+Incremental Welch engine against one-shot estimates, and per-session engines
+over stored EEG
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from database import band_power
+from database.band_power import (
+    BAND_NAMES,
+    BandPowerEngine,
+    SessionBandPower,
+    synthetic_eeg,
+    welch_band_powers,
+)
+from database.eeg_store import EEGStore, encode_frame, parse_frames
+from database.brainwave_bands import BRAINWAVE_STATES
+
+SAMPLE_RATE = 128.0
+
+
+def reference_welch(samples: np.ndarray, sample_rate: float, segment: int, step: int) -> np.ndarray:
+    """Textbook Welch (constant detrend, periodic Hann, one-sided density) summed per band"""
+    window = np.hanning(segment + 1)[:-1]
+    frequencies = np.fft.rfftfreq(segment, 1 / sample_rate)
+    periodograms = []
+    for start in range(0, len(samples) - segment + 1, step):
+        chunk = samples[start:start + segment].astype(np.float64)
+        chunk = chunk - chunk.mean(axis=0)
+        density = np.abs(np.fft.rfft(chunk * window[:, None], axis=0)) ** 2 / (sample_rate * (window ** 2).sum())
+        density[1:-1] *= 2
+        periodograms.append(density)
+    psd = np.mean(periodograms, axis=0)
+    step_hz = frequencies[1] - frequencies[0]
+    return np.stack([
+        psd[(frequencies >= low) & (frequencies < high)].sum(axis=0) * step_hz
+        for low, high in (BRAINWAVE_STATES[name]["range"] for name in BAND_NAMES)
+    ], axis=1)
+
+
+def test_one_shot_matches_reference_welch():
+    data = synthetic_eeg(4, SAMPLE_RATE, 10)
+    engine = BandPowerEngine(4, SAMPLE_RATE, 10)
+
+    expected = reference_welch(data, SAMPLE_RATE, engine.segment, engine.step)
+    np.testing.assert_allclose(welch_band_powers(data, SAMPLE_RATE), expected, rtol=1e-9)
+
+
+def test_incremental_matches_one_shot_over_window():
+    data = synthetic_eeg(8, SAMPLE_RATE, 30, seed=7)
+    engine = BandPowerEngine(8, SAMPLE_RATE, window_seconds=6)
+    rng = np.random.default_rng(0)
+
+    position = 0
+    while position < len(data):
+        size = int(rng.integers(1, SAMPLE_RATE))
+        engine.update(data[position:position + size])
+        position += size
+
+    window = data[engine.window_end - engine.window_samples:engine.window_end]
+    np.testing.assert_allclose(engine.powers(), welch_band_powers(window, SAMPLE_RATE), rtol=1e-9)
+    assert engine.filled == engine.segments_per_window
+
+
+def test_large_backlog_matches_chunked_updates():
+    data = synthetic_eeg(2, SAMPLE_RATE, 60, seed=3)
+    chunked = BandPowerEngine(2, SAMPLE_RATE, window_seconds=4)
+    for start in range(0, len(data), 32):
+        chunked.update(data[start:start + 32])
+    backlog = BandPowerEngine(2, SAMPLE_RATE, window_seconds=4)
+    backlog.update(data)
+
+    np.testing.assert_allclose(backlog.powers(), chunked.powers(), rtol=1e-9)
+
+
+def test_alpha_rhythm_dominates():
+    engine = BandPowerEngine(4, SAMPLE_RATE)
+    engine.update(synthetic_eeg(4, SAMPLE_RATE, 8))
+    assert engine.summary()["dominant"] == "alpha"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = EEGStore(str(tmp_path))
+    monkeypatch.setattr(band_power, "eeg_store", store)
+    return store
+
+
+def test_session_feeds_each_sample_once(store):
+    data = synthetic_eeg(4, SAMPLE_RATE, 20)
+    sessions = SessionBandPower()
+
+    async def scenario():
+        store.append("s1", parse_frames(encode_frame(data[:1280], SAMPLE_RATE)))
+        first = await sessions.get("s1", 4)
+        store.append("s1", parse_frames(encode_frame(data[1280:], SAMPLE_RATE)))
+        results = await asyncio.gather(*(sessions.get("s1", 4) for _ in range(4)))
+        return first, results
+
+    first, results = asyncio.run(scenario())
+    started = 1280 - first["samples_processed"]
+    assert all(result["total_samples"] == len(data) for result in results)
+    assert all(result["samples_processed"] == len(data) - started for result in results)
+    assert not sessions._locks
+
+
+def test_stale_sample_count_does_not_rewind(store, monkeypatch):
+    data = synthetic_eeg(2, SAMPLE_RATE, 10)
+    store.append("s1", parse_frames(encode_frame(data, SAMPLE_RATE)))
+    sessions = SessionBandPower()
+    current = asyncio.run(sessions.get("s1", 4))
+
+    stale = {**store.info("s1"), "total_samples": 256}
+    monkeypatch.setattr(store, "info", lambda session_id: stale)
+    again = asyncio.run(sessions.get("s1", 4))
+
+    assert again["samples_processed"] == current["samples_processed"]
+    assert again["total_samples"] == len(data)
+    assert again["absolute"] == current["absolute"]
@@ -0,0 +1,80 @@
+"""
+NDJSON bulk ingestion: per-row results, chunked bodies and write failures
+"""
+
+import json
+
+from api import ndjson
+from database.repository import repository
+
+NDJSON_HEADERS = {"Content-Type": "application/x-ndjson"}
+
+
+def row(**fields) -> str:
+    return json.dumps({"user_id": "bulk-user", "module_type": "movers", **fields})
+
+
+def test_bad_rows_are_reported_without_blocking_the_rest(run_api):
+    lines = [
+        row(duration_seconds=300),
+        "",
+        "{not json",
+        row(module_type="juggling"),
+        row(module_type="brainwave"),
+        row(user_rating=9),
+        json.dumps({"module_type": "movers"}),
+        row(module_type="brainwave", brainwave_target="gamma", timestamp="2024-01-02T03:04:05+02:00"),
+    ]
+    body = "\n".join(lines).encode()
+
+    async def chunks():
+        # Split rows across chunks, and leave the last line without a newline
+        for start in range(0, len(body), 37):
+            yield body[start:start + 37]
+
+    async def scenario(client):
+        response = await client.post("/api/sessions/bulk", content=chunks(), headers=NDJSON_HEADERS)
+        stats = await client.get("/api/sessions/stats", params={"user_id": "bulk-user"})
+        listing = await client.get("/api/sessions/", params={"user_id": "bulk-user"})
+        return response.json(), stats.json(), listing.json()
+
+    result, stats, listing = run_api(scenario)
+    assert (result["received"], result["inserted"], result["failed"]) == (7, 2, 5)
+
+    by_line = {entry["line"]: entry for entry in result["results"]}
+    assert sorted(by_line) == [1, 3, 4, 5, 6, 7, 8]
+    assert "id" in by_line[1] and "id" in by_line[8]
+    assert "Invalid module_type" in by_line[4]["error"]
+    assert "brainwave_target required" in by_line[5]["error"]
+    assert by_line[6]["error"].startswith("user_rating:")
+    assert by_line[7]["error"].startswith("user_id:")
+
+    assert stats["total_sessions"] == 2
+    assert {session["timestamp"] for session in listing} >= {"2024-01-02T01:04:05"}
+
+
+def test_storage_failures_are_reported_per_row(run_api, monkeypatch):
+    insert_sessions = repository.insert_sessions
+
+    async def failing_second_row(documents):
+        await insert_sessions([document for index, document in enumerate(documents) if index != 1])
+        return {1: "E11000 duplicate key"}
+
+    monkeypatch.setattr(repository, "insert_sessions", failing_second_row)
+
+    async def scenario(client):
+        body = "\n".join(row(duration_seconds=seconds) for seconds in (60, 120, 180))
+        return (await client.post("/api/sessions/bulk", content=body, headers=NDJSON_HEADERS)).json()
+
+    result = run_api(scenario)
+    assert (result["inserted"], result["failed"]) == (2, 1)
+    assert result["results"][1] == {"line": 2, "error": "E11000 duplicate key"}
+
+
+def test_oversized_line_is_rejected(run_api):
+    async def scenario(client):
+        body = row(generated_content={"notes": "x" * ndjson.MAX_LINE_BYTES})
+        return await client.post("/api/sessions/bulk", content=body, headers=NDJSON_HEADERS)
+
+    response = run_api(scenario)
+    assert response.status_code == 413
@@ -0,0 +1,44 @@
+"""
+Conditional GET: If-None-Match returns 304 until the underlying data changes
+"""
+
+
+def test_session_reads_return_304_until_the_user_changes(run_api):
+    async def scenario(client):
+        params = {"user_id": "etag-user"}
+        created = await client.post("/api/sessions/", params={**params, "module_type": "movers"})
+        listing = await client.get("/api/sessions/", params=params)
+        stats = await client.get("/api/sessions/stats", params=params)
+
+        cached_listing = await client.get("/api/sessions/", params=params, headers={"If-None-Match": listing.headers["etag"]})
+        cached_stats = await client.get("/api/sessions/stats", params=params, headers={"If-None-Match": stats.headers["etag"]})
+        listed_among = await client.get(
+            "/api/sessions/", params=params, headers={"If-None-Match": f'"other", {listing.headers["etag"]}'}
+        )
+
+        await client.patch(f"/api/sessions/{created.json()['id']}/rating", params={"rating": 5})
+        after_rating = await client.get("/api/sessions/", params=params, headers={"If-None-Match": listing.headers["etag"]})
+        return listing, cached_listing, cached_stats, listed_among, after_rating
+
+    listing, cached_listing, cached_stats, listed_among, after_rating = run_api(scenario)
+    assert listing.status_code == 200 and listing.headers["etag"].startswith('"sessions-')
+    assert cached_listing.status_code == 304 and cached_listing.content == b""
+    assert cached_listing.headers["etag"] == listing.headers["etag"]
+    assert cached_stats.status_code == 304
+    assert listed_among.status_code == 304
+    assert after_rating.status_code == 200
+    assert after_rating.headers["etag"] != listing.headers["etag"]
+    assert after_rating.json()[0]["user_rating"] == 5
+
+
+def test_knowledge_reads_return_304_for_the_cache_version(run_api):
+    async def scenario(client):
+        listing = await client.get("/api/knowledge/")
+        cached = await client.get("/api/knowledge/", headers={"If-None-Match": listing.headers["etag"]})
+        stale = await client.get("/api/knowledge/", headers={"If-None-Match": '"knowledge-stale"'})
+        return listing, cached, stale
+
+    listing, cached, stale = run_api(scenario)
+    assert listing.status_code == 200
+    assert cached.status_code == 304
+    assert stale.status_code == 200
@@ -0,0 +1,69 @@
+"""
+MongoDB driver settings and monitoring: pool options from the environment,
+command latency and pool checkout waits in the metrics registry
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from database.metrics import MetricsRegistry, metrics
+from database.models import MONGODB_POOL_SETTINGS, mongo_client_options
+from database.monitoring import CommandLatencyListener, PoolWaitListener, driver_metrics_summary
+
+
+def test_client_options_come_from_set_variables_only(monkeypatch):
+    for env_var, _ in MONGODB_POOL_SETTINGS.values():
+        monkeypatch.delenv(env_var, raising=False)
+    monkeypatch.setenv("MONGODB_MAX_POOL_SIZE", "200")
+    monkeypatch.setenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "1500")
+    monkeypatch.setenv("MONGODB_COMPRESSORS", "zstd,zlib")
+    monkeypatch.setenv("MONGODB_MIN_POOL_SIZE", "")
+
+    assert mongo_client_options() == {"maxPoolSize": 200, "waitQueueTimeoutMS": 1500, "compressors": "zstd,zlib"}
+
+
+def test_command_latency_is_recorded_per_command_name():
+    listener = CommandLatencyListener()
+    listener.succeeded(SimpleNamespace(command_name="test_find", duration_micros=2_000))
+    listener.succeeded(SimpleNamespace(command_name="test_find", duration_micros=4_000))
+    listener.failed(SimpleNamespace(command_name="test_insert", duration_micros=30_000))
+
+    summary = driver_metrics_summary()["commands"]
+    assert summary["test_find"]["count"] == 2 and summary["test_find"]["mean_ms"] == 3.0
+    assert summary["test_find"]["p50_ms"] == 2.5
+    assert summary["test_insert"]["count"] == 1
+    assert metrics.counter("mongodb_command_failures_total", command="test_insert").value == 1
+
+
+def test_pool_checkout_waits_and_connection_gauges():
+    listener = PoolWaitListener()
+    waits_before = listener.wait.count
+    in_use_before = listener.in_use.value
+
+    listener.connection_check_out_started(None)
+    listener.connection_checked_out(None)
+    # A checked-out event without a started one (e.g. another thread's) records no wait
+    listener.connection_checked_out(None)
+    listener.connection_checked_in(None)
+    listener.connection_check_out_started(None)
+    listener.connection_check_out_failed(SimpleNamespace(reason="timeout"))
+
+    assert listener.wait.count == waits_before + 1
+    assert listener.in_use.value == in_use_before + 1
+    assert metrics.counter("mongodb_pool_checkout_failures_total", reason="timeout").value >= 1
+
+
+def test_registry_reuses_series_and_rejects_kind_changes():
+    registry = MetricsRegistry()
+    assert registry.counter("hits", route="/a") is registry.counter("hits", route="/a")
+    assert registry.counter("hits", route="/a") is not registry.counter("hits", route="/b")
+    with pytest.raises(ValueError):
+        registry.gauge("hits")
+
+    histogram = registry.histogram("latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [(0.1, 1), (1.0, 3), (float("inf"), 4)]
+    assert histogram.quantile(0.5) == 1.0
+    assert registry.histogram_summary("latency")["all"]["count"] == 4
@@ -0,0 +1,82 @@
+"""
+EEG ingestion: frame parsing, layout conflicts and upload limits
+"""
+
+import numpy as np
+import pytest
+
+from database import eeg_store as eeg_store_module
+from database.eeg_store import FRAME_HEADER, EEGStore, FormatConflict, FrameError, encode_frame, parse_frames
+
+
+def float_frame(samples: int = 4, channels: int = 2, sample_rate: float = 256.0) -> bytes:
+    return encode_frame(np.arange(samples * channels, dtype=np.float32).reshape(samples, channels), sample_rate)
+
+
+def test_parse_frames_are_views_of_the_upload():
+    body = float_frame() + encode_frame(np.ones((3, 2), dtype=np.int16), 256.0, 0.5)
+    frames = parse_frames(body)
+
+    assert [frame.sample_format for frame in frames] == ["float32", "int16"]
+    assert frames[0].samples.shape == (4, 2)
+    assert frames[0].samples[1].tolist() == [2.0, 3.0]
+    assert frames[1].scale == 0.5
+    assert np.shares_memory(frames[0].samples, np.frombuffer(body, dtype=np.uint8))
+
+
+@pytest.mark.parametrize("body, message", [
+    (float_frame()[:FRAME_HEADER.size - 1], "Truncated frame header"),
+    (float_frame()[:-1], "Truncated frame payload"),
+    (b"NOPE" + float_frame()[4:], "Bad frame magic"),
+    (float_frame()[:4] + b"\x07" + float_frame()[5:], "Unknown sample format"),
+    (encode_frame(np.zeros((1, 1), dtype=np.float32), 0.0), "Sample rate must be positive"),
+])
+def test_malformed_uploads_are_rejected(body, message):
+    with pytest.raises(FrameError, match=message):
+        parse_frames(body)
+
+
+def test_append_rejects_a_different_layout(tmp_path):
+    store = EEGStore(str(tmp_path))
+    result = store.append("s1", parse_frames(float_frame(samples=4)))
+    assert result["total_samples"] == 4
+
+    with pytest.raises(FormatConflict):
+        store.append("s1", parse_frames(float_frame(channels=3)))
+    assert store.info("s1")["total_samples"] == 4
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["s1.eeg", "s1.json"]
+
+
+def test_ingest_appends_and_reports_conflicts(run_api):
+    async def scenario(client):
+        first = await client.post("/api/eeg-data/", params={"session_id": "s-api"}, content=float_frame())
+        second = await client.post("/api/eeg-data/", params={"session_id": "s-api"}, content=float_frame(samples=6))
+        conflict = await client.post(
+            "/api/eeg-data/", params={"session_id": "s-api"}, content=float_frame(sample_rate=512.0)
+        )
+        malformed = await client.post("/api/eeg-data/", params={"session_id": "s-api"}, content=b"EEG1")
+        info = await client.get("/api/eeg-data/s-api")
+        return first, second, conflict, malformed, info
+
+    first, second, conflict, malformed, info = run_api(scenario)
+    assert first.status_code == 200 and first.json()["total_samples"] == 4
+    assert second.json()["appended_samples"] == 6
+    assert conflict.status_code == 409
+    assert malformed.status_code == 400
+    assert info.json()["total_samples"] == 10
+
+
+def test_ingest_limits_chunked_uploads(run_api, monkeypatch):
+    monkeypatch.setattr(eeg_store_module, "EEG_MAX_BODY_BYTES", 64)
+    body = float_frame(samples=16)
+
+    async def chunks():
+        for start in range(0, len(body), 16):
+            yield body[start:start + 16]
+
+    async def scenario(client):
+        return await client.post("/api/eeg-data/", params={"session_id": "s-big"}, content=chunks())
+
+    response = run_api(scenario)
+    assert "content-length" not in response.request.headers
+    assert response.status_code == 413
@@ -0,0 +1,124 @@
+"""
+Embedded SQLite backend: query translation, and listings/counts against the
+same queries on a Mongo collection (mongomock)
+"""
+
+import asyncio
+import itertools
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from database.embedded_store import SQLiteRepository, to_millis, where_clause
+from database.queries import apply_session_cursor, build_session_query, encode_session_cursor
+from database.session_store import SESSION_SORT
+
+
+def sample_sessions(count: int = 150):
+    rng = random.Random(11)
+    now = datetime.utcnow().replace(microsecond=0)
+    sessions = []
+    for index in range(count):
+        module_type = rng.choice(["brainwave", "movers", "pfc_gym"])
+        sessions.append({
+            "_id": ObjectId(),
+            "user_id": f"user-{rng.randrange(3)}",
+            "module_type": module_type,
+            "brainwave_target": rng.choice(["alpha", "theta"]) if module_type == "brainwave" else None,
+            "generated_content": {"index": index},
+            "user_rating": rng.choice([None, 3, 5]),
+            "effectiveness_score": None,
+            # Several sessions share a timestamp, so _id has to break ties
+            "timestamp": now - timedelta(hours=rng.randrange(24 * 60)),
+            "duration_seconds": 600,
+        })
+    return sessions
+
+
+def test_where_clause_translation():
+    since = datetime(2024, 1, 1)
+    session_id = ObjectId()
+    sql, params = where_clause({
+        "user_id": "u1",
+        "brainwave_target": None,
+        "timestamp": {"$gte": since, "$lt": since + timedelta(days=1)},
+        "_id": {"$in": [session_id]},
+    })
+    assert sql == (
+        "sessions.user_id = ? AND sessions.brainwave_target IS NULL"
+        " AND sessions.timestamp >= ? AND sessions.timestamp < ? AND sessions.id IN (?)"
+    )
+    assert params == ["u1", to_millis(since), to_millis(since) + 86_400_000, str(session_id)]
+
+    sql, params = where_clause({"$or": [{"user_id": "a"}, {"_id": {"$lt": session_id}}]})
+    assert sql == "((sessions.user_id = ?) OR (sessions.id < ?))"
+    assert params == ["a", str(session_id)]
+
+    assert where_clause({}) == ("1", [])
+    assert where_clause({"_id": {"$in": []}}) == ("0", [])
+    with pytest.raises(ValueError):
+        where_clause({"notes": "x"})
+    with pytest.raises(ValueError):
+        where_clause({"user_id": {"$regex": "^u"}})
+
+
+def test_listings_match_mongo_for_every_filter_and_cursor():
+    sessions = sample_sessions()
+    filters = {"user_id": "user-1", "module_type": "brainwave", "brainwave_target": "alpha", "days": 30}
+
+    async def scenario():
+        collection = AsyncMongoMockClient()["embedded_test"]["sessions"]
+        await collection.insert_many([dict(session) for session in sessions])
+        store = SQLiteRepository(":memory:")
+        await store.connect()
+        try:
+            assert await store.insert_sessions([dict(session) for session in sessions]) == {}
+
+            mismatches = []
+            for size in range(len(filters) + 1):
+                for combo in itertools.combinations(filters, size):
+                    query = build_session_query(**{key: filters[key] for key in combo})
+                    expected = await collection.find(query).sort(SESSION_SORT).to_list(None)
+                    listed = await store.find_sessions(query, limit=10)
+                    if [doc["_id"] for doc in listed] != [doc["_id"] for doc in expected[:10]]:
+                        mismatches.append((combo, "first page"))
+                    if await store.count_sessions(query) != len(expected):
+                        mismatches.append((combo, "count"))
+
+                    if len(expected) > 10:
+                        last = expected[9]
+                        after = apply_session_cursor(query, encode_session_cursor(last["timestamp"], last["_id"]))
+                        page = await store.find_sessions(after, limit=10)
+                        if [doc["_id"] for doc in page] != [doc["_id"] for doc in expected[10:20]]:
+                            mismatches.append((combo, "cursor page"))
+            return mismatches
+        finally:
+            await store.close()
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_stored_documents_round_trip_with_projection():
+    session = sample_sessions(1)[0]
+
+    async def scenario():
+        store = SQLiteRepository(":memory:")
+        await store.connect()
+        try:
+            await store.insert_sessions([dict(session)])
+            duplicate = await store.insert_sessions([dict(session)])
+            stored = await store.get_session(session["_id"])
+            projected = await store.find_sessions({}, projection={"user_id": 1, "generated_content.index": 1})
+            batches = [doc async for doc in store.iter_sessions({"user_id": session["user_id"]}, batch_size=1)]
+            return duplicate, stored, projected, batches
+        finally:
+            await store.close()
+
+    duplicate, stored, projected, batches = asyncio.run(scenario())
+    assert list(duplicate) == [0]
+    assert stored == session
+    assert projected == [{"_id": session["_id"], "user_id": session["user_id"], "generated_content": {"index": 0}}]
+    assert batches == [session]
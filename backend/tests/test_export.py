@@ -0,0 +1,91 @@
+"""
+Session export: streamed NDJSON/CSV bodies, filters, flattening and batching
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from database.queries import build_session_query
+from database.repository import repository
+from database.session_export import iter_session_export
+
+
+def export_sessions():
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": "export-user" if index % 4 else "other-user",
+            "module_type": "brainwave" if index % 2 else "movers",
+            "brainwave_target": "alpha" if index % 2 else None,
+            "generated_content": {"binaural_beat_frequency": 10, "notes": [index]} if index % 2 else {"reps": index},
+            "user_rating": index % 5 + 1 if index % 3 else None,
+            "effectiveness_score": None,
+            "timestamp": now - timedelta(hours=index),
+            "duration_seconds": 60 * index,
+        }
+        for index in range(12)
+    ]
+
+
+def test_ndjson_export_streams_every_matching_session(run_api):
+    sessions = export_sessions()
+
+    async def scenario(client):
+        await repository.insert_sessions([dict(session) for session in sessions])
+        everything = await client.get("/api/sessions/export")
+        filtered = await client.get("/api/sessions/export", params={"user_id": "export-user", "module_type": "brainwave"})
+        invalid = await client.get("/api/sessions/export", params={"format": "xml"})
+        return everything, filtered, invalid
+
+    everything, filtered, invalid = run_api(scenario)
+    assert everything.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in everything.text.splitlines()]
+    assert sorted(row["id"] for row in rows) == sorted(str(session["_id"]) for session in sessions)
+    assert rows[0]["generated_content"] and "_id" not in rows[0]
+
+    expected = {str(s["_id"]) for s in sessions if s["user_id"] == "export-user" and s["module_type"] == "brainwave"}
+    assert {json.loads(line)["id"] for line in filtered.text.splitlines()} == expected
+    assert invalid.status_code == 400
+
+
+def test_flattened_csv_has_one_column_per_content_key(run_api):
+    sessions = export_sessions()
+
+    async def scenario(client):
+        await repository.insert_sessions([dict(session) for session in sessions])
+        return await client.get("/api/sessions/export", params={"format": "csv", "flatten": True})
+
+    response = run_api(scenario)
+    assert response.headers["content-disposition"] == 'attachment; filename="sessions.csv"'
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == len(sessions)
+    assert {"generated_content.binaural_beat_frequency", "generated_content.notes", "generated_content.reps"} <= set(rows[0])
+    assert "generated_content" not in rows[0]
+
+    by_id = {row["id"]: row for row in rows}
+    movers, brainwave = (by_id[str(sessions[index]["_id"])] for index in (2, 3))
+    assert movers["generated_content.reps"] == "2" and movers["brainwave_target"] == ""
+    assert brainwave["generated_content.notes"] == "[3]" and movers["user_rating"] == "3"
+
+
+def test_export_yields_one_chunk_per_cursor_batch(run_api):
+    async def scenario(client):
+        await repository.insert_sessions(export_sessions())
+        batches = []
+        chunks = [
+            chunk async for chunk in iter_session_export(
+                build_session_query(user_id="export-user"), "csv", batch_size=4, on_batch=batches.append
+            )
+        ]
+        return batches, chunks
+
+    batches, chunks = run_api(scenario)
+    assert batches == [4, 4, 1]
+    # Header, then one chunk per batch
+    assert len(chunks) == 4 and chunks[0].startswith(b"id,user_id,")
+    assert sum(chunk.count(b"\n") for chunk in chunks[1:]) == 9
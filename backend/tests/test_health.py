@@ -0,0 +1,38 @@
+"""
+Health snapshot: every registered dependency probe is reported
+"""
+
+from api.health import health_monitor
+
+
+def test_health_reports_dependency_probes(run_api):
+    async def scenario(client):
+        await client.post("/api/music/", json={"user_id": "health-user", "target_state": "theta", "duration": 1})
+        await health_monitor.probe()
+        return await client.get("/health")
+
+    health = run_api(scenario).json()
+    assert health["status"] == "healthy"
+    assert health["database"]["status"] == "connected"
+    assert health["ratings"]["status"] == "ok" and health["ratings"]["pending"] == 0
+    renderer = health["audio_renderer"]
+    assert renderer["status"] == "ok"
+    assert renderer["renders_in_flight"] == 0
+    assert renderer["tracks"] >= 1 and renderer["bytes"] > 0
+
+
+def test_startup_and_driver_metrics_only_in_verbose_health(run_api):
+    async def scenario(client):
+        return await client.get("/health"), await client.get("/health", params={"verbose": 1})
+
+    brief, verbose = run_api(scenario)
+    assert "startup" not in brief.json() and "database_driver" not in brief.json()
+    assert "startup" in verbose.json() and "database_driver" in verbose.json()
+
+
+def test_metrics_middleware_is_outermost():
+    from api.main import app
+    from api.metrics import MetricsMiddleware
+
+    # Starlette runs user_middleware[0] first
+    assert app.user_middleware[0].cls is MetricsMiddleware
@@ -0,0 +1,91 @@
+"""
+Knowledge cache: in-memory filters match a full scan, and a version bump
+reloads the index and changes the ETag
+"""
+
+import itertools
+
+import pytest
+
+from database.knowledge_cache import KnowledgeCache, knowledge_cache
+from database.repository import repository
+
+STIMULI = ["binaural_beats", "meditation", "breathwork", "neurofeedback"]
+OUTCOMES = ["reduced_anxiety", "increased_focus", "improved_sleep"]
+
+
+def knowledge_entries():
+    return [
+        {"stimulus_type": stimulus, "outcome": outcome, "evidence_strength": round(0.3 + (index * 7 % 13) / 20, 2)}
+        for index, (stimulus, outcome) in enumerate(itertools.product(STIMULI, OUTCOMES))
+    ]
+
+
+@pytest.mark.parametrize("stimulus_type, outcome, min_evidence, limit", [
+    (None, None, None, None),
+    ("meditation", None, None, None),
+    (None, "increased_focus", 0.6, None),
+    ("breathwork", "reduced_anxiety", None, None),
+    (None, None, 0.5, 3),
+    ("unknown", None, None, None),
+])
+def test_query_matches_a_full_scan(run_api, stimulus_type, outcome, min_evidence, limit):
+    async def scenario(client):
+        await repository.insert_knowledge(knowledge_entries())
+        cache = KnowledgeCache()
+        await cache.refresh()
+        return cache
+
+    cache = run_api(scenario)
+    expected = sorted(
+        (
+            entry for entry in cache._entries
+            if stimulus_type in (None, entry["stimulus_type"])
+            and outcome in (None, entry["outcome"])
+            and (min_evidence is None or entry["evidence_strength"] >= min_evidence)
+        ),
+        key=lambda entry: (-entry["evidence_strength"], str(entry["_id"]))
+    )[:limit]
+    assert cache.query(stimulus_type, outcome, min_evidence, limit) == expected
+    assert len(cache._entries) == len(knowledge_entries())
+
+
+def test_version_bump_reloads_after_the_check_interval(run_api):
+    async def scenario(client):
+        cache = KnowledgeCache(check_interval=3600)
+        await cache.refresh()
+        empty = (cache.version, cache.etag, len(cache.query()))
+
+        await repository.insert_knowledge(knowledge_entries()[:2])
+        await cache.refresh()
+        within_interval = (cache.version, len(cache.query()))
+
+        cache.invalidate()
+        await cache.refresh()
+        return empty, within_interval, (cache.version, cache.etag, len(cache.query()))
+
+    empty, within_interval, reloaded = run_api(scenario)
+    assert within_interval == empty[::2]
+    assert reloaded[0] != empty[0] and reloaded[1] != empty[1]
+    assert reloaded[2] == 2
+
+
+def test_routes_serve_the_new_version(run_api):
+    async def scenario(client):
+        before = await client.get("/api/knowledge/")
+        await repository.insert_knowledge(knowledge_entries())
+        knowledge_cache.invalidate()
+        after = await client.get("/api/knowledge/", headers={"If-None-Match": before.headers["etag"]})
+        recommendations = await client.get("/api/knowledge/recommendations/movers")
+        entry = await client.get(f"/api/knowledge/{after.json()[0]['id']}")
+        return before, after, recommendations, entry
+
+    before, after, recommendations, entry = run_api(scenario)
+    assert after.status_code == 200 and after.headers["etag"] != before.headers["etag"]
+    strengths = [row["evidence_strength"] for row in after.json()]
+    assert strengths == sorted(strengths, reverse=True)
+
+    rows = recommendations.json()["recommendations"]
+    assert {row["stimulus_type"] for row in rows} == {"meditation", "breathwork"}
+    assert [row["evidence_strength"] for row in rows] == sorted((row["evidence_strength"] for row in rows), reverse=True)
+    assert entry.json()["id"] == after.json()[0]["id"]
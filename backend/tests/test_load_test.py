@@ -0,0 +1,50 @@
+"""
+Load test harness: the in-process client drives every route of the mix without
+errors, and the stats/mix helpers
+"""
+
+import argparse
+
+import pytest
+
+from api.load_test import (
+    DEFAULT_MIX,
+    ASGIClient,
+    latency_stats,
+    load_test_users,
+    parse_mix,
+    percent_change,
+    run_level,
+    seed_stand_in,
+)
+
+
+def test_every_route_of_the_mix_succeeds_in_process(run_api):
+    from api.main import app
+
+    async def scenario(client):
+        await seed_stand_in(sessions=300, users=10, seed=1)
+        return await run_level(ASGIClient(app), 4, 0.3, DEFAULT_MIX, load_test_users(10), seed=1)
+
+    results = run_api(scenario)
+    assert set(results) == set(DEFAULT_MIX) | {"all"}
+    assert results["all"]["errors"] == 0
+    assert results["all"]["requests"] == sum(results[route]["requests"] for route in DEFAULT_MIX)
+    for route in DEFAULT_MIX:
+        assert results[route]["requests"] > 0, route
+    assert results["all"]["p50_ms"] <= results["all"]["p95_ms"] <= results["all"]["p99_ms"]
+
+
+def test_latency_stats():
+    stats = latency_stats([index / 1000 for index in range(1, 101)], errors=2, elapsed=2.0)
+    assert stats == {"requests": 100, "errors": 2, "rps": 50.0, "p50_ms": 50.5, "p95_ms": 95.05, "p99_ms": 99.01}
+    assert latency_stats([0.01], errors=0, elapsed=1.0)["p50_ms"] is None
+
+
+def test_parse_mix_and_comparison_helpers():
+    assert parse_mix("sessions.list=5, sessions.create") == {"sessions.list": 5, "sessions.create": 1}
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("sessions.delete=1")
+    assert percent_change(200, 150) == "-25%"
+    assert percent_change(None, 150) == "n/a"
+    assert load_test_users(0)[0].startswith("demo_user_")
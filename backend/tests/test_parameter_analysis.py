@@ -0,0 +1,83 @@
+"""
+Parameter effectiveness analysis over sessions with missing and non-numeric values
+"""
+
+import asyncio
+from datetime import datetime
+
+import numpy as np
+from bson import ObjectId
+
+from database import parameter_analysis
+from database.parameter_analysis import ParameterAnalysisCache, load_columns, numeric_column
+from database.repository import repository
+
+
+def brainwave_session(index: int, beat) -> dict:
+    return {
+        "_id": ObjectId(),
+        "user_id": f"analysis-user-{index % 3}",
+        "module_type": "brainwave",
+        "brainwave_target": "alpha",
+        "generated_content": {"binaural_beat_frequency": beat, "carrier_frequency": 200},
+        "user_rating": index % 5 + 1,
+        "effectiveness_score": round(index / 20, 2),
+        "timestamp": datetime.utcnow(),
+        "duration_seconds": 600,
+    }
+
+
+def test_numeric_column_maps_non_numeric_values_to_nan():
+    column = numeric_column([1, 2.5, None, "fast", True, {"hz": 10}, [1, 2]])
+    assert column.dtype == np.float64
+    assert column[:2].tolist() == [1.0, 2.5]
+    assert np.isnan(column[2:]).all()
+
+
+def test_numeric_column_keeps_plain_batches_and_rejects_numeric_strings():
+    assert numeric_column([3, None, 0.5]).tolist()[::2] == [3.0, 0.5]
+    assert np.isnan(numeric_column([3, None, 0.5])[1])
+    assert np.isnan(numeric_column(["10", 4.0])[0])
+    assert numeric_column([]).shape == (0,)
+
+
+def test_cache_recomputes_each_key_independently(monkeypatch):
+    calls = []
+
+    async def run_parameter_analysis(bins, brainwave_target):
+        calls.append(brainwave_target)
+        if brainwave_target == "alpha":
+            await asyncio.sleep(0.2)
+        return {"target": brainwave_target}
+
+    monkeypatch.setattr(parameter_analysis, "run_parameter_analysis", run_parameter_analysis)
+
+    async def scenario():
+        cache = ParameterAnalysisCache(ttl=60)
+        slow = [asyncio.create_task(cache.get(5, "alpha")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        # Not queued behind the slow alpha recomputation
+        fast = await asyncio.wait_for(cache.get(5, "beta"), timeout=0.1)
+        return fast, await asyncio.gather(*slow), cache
+
+    fast, slow, cache = asyncio.run(scenario())
+    assert fast == {"target": "beta"}
+    assert slow == [{"target": "alpha"}] * 3
+    assert sorted(calls) == ["alpha", "beta"]
+    assert not cache._computing
+
+
+def test_analysis_skips_non_numeric_parameters(run_api):
+    beats = [8 + index % 5 for index in range(16)] + ["10 Hz", None, {"hz": 10}, True]
+
+    async def scenario(client):
+        await repository.insert_sessions([brainwave_session(index, beat) for index, beat in enumerate(beats)])
+        columns = await load_columns("alpha")
+        response = await client.get("/api/sessions/parameter-effectiveness", params={"bins": 4})
+        return columns, response
+
+    columns, response = run_api(scenario)
+    assert np.isfinite(columns["binaural_beat_frequency"]).sum() == 16
+    assert response.status_code == 200
+    effect = response.json()["targets"]["alpha"]["parameters"]["binaural_beat_frequency"]["effectiveness_score"]
+    assert effect["sessions"] == 16
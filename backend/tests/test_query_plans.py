@@ -0,0 +1,49 @@
+"""
+Query plans: every route query shape is served by an index without an
+in-memory sort (needs a reachable mongod, skipped otherwise)
+"""
+
+import asyncio
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+from database.check_query_plans import (
+    STATS_AGGREGATION,
+    all_query_shapes,
+    drop_scratch_database,
+    explain_query_plans,
+    open_scratch_database,
+    plan_problems,
+)
+
+
+@pytest.fixture(scope="module")
+def plans():
+    """Winning plan stages per query shape, explained once against a scratch database"""
+    async def explain():
+        try:
+            client, database = await open_scratch_database(timeout_ms=1000)
+        except ServerSelectionTimeoutError:
+            return None
+        try:
+            return await explain_query_plans(database)
+        finally:
+            await drop_scratch_database(client)
+
+    plans = asyncio.run(explain())
+    if plans is None:
+        pytest.skip("no mongod reachable for the query plan check")
+    return plans
+
+
+@pytest.mark.parametrize("name", [shape[0] for shape in all_query_shapes()] + [STATS_AGGREGATION])
+def test_query_uses_an_index_without_an_in_memory_sort(plans, name):
+    assert plan_problems(name, plans[name]) == set()
+
+
+def test_plan_problems_flag_scans_and_sorts():
+    assert plan_problems("q", {"FETCH", "IXSCAN"}) == set()
+    assert plan_problems("q", {"SORT", "IXSCAN"}) == {"SORT"}
+    assert plan_problems("q", {"COLLSCAN"}) == {"COLLSCAN", "no IXSCAN"}
+    assert plan_problems(STATS_AGGREGATION, {"SORT", "IXSCAN"}) == set()
@@ -0,0 +1,136 @@
+"""
+Rating coalescer: batching, and failed writes being requeued and retried
+"""
+
+import asyncio
+
+from bson import ObjectId
+
+from database.ratings import RatingCoalescer
+
+
+class FlakyCoalescer(RatingCoalescer):
+    """Fails the first `failures` writes, then records batches"""
+
+    def __init__(self, failures: int):
+        super().__init__(interval=0.01, max_pending=1000)
+        self.failures = failures
+        self.written = []
+
+    async def _write(self, pending):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        self.written.append(dict(pending))
+
+
+def test_ratings_in_one_interval_are_merged():
+    async def scenario():
+        coalescer = FlakyCoalescer(failures=0)
+        session = ObjectId()
+        coalescer.submit(session, 2)
+        coalescer.submit(session, 5)
+        await asyncio.sleep(0.05)
+        return coalescer
+
+    coalescer = asyncio.run(scenario())
+    assert len(coalescer.written) == 1
+    assert list(coalescer.written[0].values()) == [5]
+
+
+def test_failed_flush_is_requeued_and_retried():
+    first, second = ObjectId(), ObjectId()
+
+    async def scenario():
+        coalescer = FlakyCoalescer(failures=1)
+        coalescer.submit(first, 3)
+        coalescer.submit(second, 4)
+        assert await coalescer.flush() is False
+        failed = await coalescer.status()
+        assert failed["status"] == "error" and failed["pending"] == 2
+        # A newer rating arriving before the retry wins over the requeued one
+        coalescer.submit(first, 1)
+        await asyncio.sleep(0.05)
+        return coalescer
+
+    coalescer = asyncio.run(scenario())
+    assert asyncio.run(coalescer.status())["status"] == "ok"
+    assert coalescer.failed_flushes == 1
+    assert coalescer.written == [{first: 1, second: 4}]
+    assert coalescer.flushed_ratings == 2
+
+
+class SlowCoalescer(FlakyCoalescer):
+    """Holds each write open until `release` is set"""
+
+    def __init__(self):
+        super().__init__(failures=0)
+        self.writing = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def _write(self, pending):
+        self.writing.set()
+        await self.release.wait()
+        await super()._write(pending)
+
+
+def test_rating_submitted_during_a_flush_is_written_by_a_new_timer():
+    first, second = ObjectId(), ObjectId()
+
+    async def scenario():
+        coalescer = SlowCoalescer()
+        coalescer.submit(first, 3)
+        await coalescer.writing.wait()
+        # The timer task is still inside flush(), so this submit schedules nothing itself
+        coalescer.submit(second, 4)
+        coalescer.release.set()
+        await asyncio.sleep(0.05)
+        return coalescer
+
+    coalescer = asyncio.run(scenario())
+    assert coalescer.written == [{first: 3}, {second: 4}]
+    assert not coalescer._pending
+
+
+def test_size_triggered_flush_leaves_no_rating_behind():
+    async def scenario():
+        coalescer = SlowCoalescer()
+        coalescer.max_pending = 1
+        coalescer.submit(ObjectId(), 1)
+        await coalescer.writing.wait()
+        # Over the limit again, but the size-triggered flush is still running
+        coalescer.submit(ObjectId(), 2)
+        coalescer.release.set()
+        await asyncio.sleep(0.05)
+        return coalescer
+
+    coalescer = asyncio.run(scenario())
+    assert [len(batch) for batch in coalescer.written] == [1, 1]
+    assert not coalescer._pending
+
+
+def test_close_waits_for_max_pending_flush():
+    async def scenario():
+        coalescer = FlakyCoalescer(failures=0)
+        coalescer.max_pending = 2
+        coalescer.submit(ObjectId(), 1)
+        coalescer.submit(ObjectId(), 2)
+        assert coalescer._flush_task is not None
+        await coalescer.close()
+        return coalescer
+
+    coalescer = asyncio.run(scenario())
+    assert coalescer.flushed_ratings == 2 and not coalescer._pending
+
+
+def test_close_reports_unwritten_ratings_without_rescheduling():
+    async def scenario():
+        coalescer = FlakyCoalescer(failures=5)
+        coalescer.submit(ObjectId(), 1)
+        await coalescer.close()
+        await asyncio.sleep(0.03)
+        return coalescer
+
+    coalescer = asyncio.run(scenario())
+    assert len(coalescer._pending) == 1
+    assert coalescer.written == []
@@ -0,0 +1,74 @@
+"""
+Request metrics: templated route labels, status codes, in-flight gauge and the
+Prometheus text rendering
+"""
+
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from api.metrics import UNMATCHED_ROUTE, MetricsMiddleware, render_prometheus
+from database.metrics import MetricsRegistry, metrics
+
+
+def test_routes_are_labelled_by_their_path_template(run_api):
+    def requests(route: str, status: str) -> float:
+        return metrics.counter("http_requests_total", method="GET", route=route, status=status).value
+
+    route = "/api/sessions/{session_id}"
+    before = (requests(route, "404"), requests(UNMATCHED_ROUTE, "404"))
+
+    async def scenario(client):
+        for _ in range(3):
+            await client.get(f"/api/sessions/{ObjectId()}")
+        await client.get("/no/such/path")
+        return await client.get("/metrics")
+
+    exposition = run_api(scenario)
+    assert requests(route, "404") == before[0] + 3
+    assert requests(UNMATCHED_ROUTE, "404") == before[1] + 1
+    assert exposition.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/sessions/{session_id}"}' in exposition.text
+    assert "# TYPE http_requests_in_flight gauge" in exposition.text
+
+
+def test_failed_requests_count_as_500_and_leave_no_request_in_flight():
+    registry = MetricsRegistry()
+
+    async def failing_app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    middleware = MetricsMiddleware(failing_app, registry)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await middleware({"type": "http", "method": "POST"}, None, None)
+
+    asyncio.run(scenario())
+    assert registry.counter("http_requests_total", method="POST", route=UNMATCHED_ROUTE, status="500").value == 1
+    assert middleware.in_flight.value == 0
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs done", kind='say "hi"').inc(2)
+    registry.gauge("queue_depth", "Queued jobs").set(1.5)
+    histogram = registry.histogram("job_seconds", "Job time", buckets=(0.5,))
+    histogram.observe(0.25)
+    histogram.observe(2)
+
+    assert render_prometheus(registry).splitlines() == [
+        "# HELP job_seconds Job time",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{le="0.5"} 1',
+        'job_seconds_bucket{le="+Inf"} 2',
+        "job_seconds_sum 2.25",
+        "job_seconds_count 2",
+        "# HELP jobs_total Jobs done",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="say \\"hi\\""} 2',
+        "# HELP queue_depth Queued jobs",
+        "# TYPE queue_depth gauge",
+        "queue_depth 1.5",
+    ]
@@ -0,0 +1,73 @@
+"""
+Fast JSON responses: raw documents serialize exactly like the response models,
+and the OpenAPI schema still names those models
+"""
+
+from datetime import datetime
+
+from bson import ObjectId
+
+from api.responses import FastJSONResponse
+from api.routes.knowledge import BrainKnowledgeResponse, knowledge_document_to_response
+from api.routes.sessions import TrainingSessionResponse, session_document_to_response
+from database.repository import repository
+
+
+def test_fast_json_encodes_bson_values():
+    object_id = ObjectId()
+    body = FastJSONResponse({"id": object_id, "at": datetime(2024, 1, 2, 3, 4, 5), 3: "int key"}).body
+    assert body == b'{"id":"%s","at":"2024-01-02T03:04:05","3":"int key"}' % str(object_id).encode()
+
+
+def test_session_fast_path_matches_the_response_model(run_api):
+    document = {
+        "_id": ObjectId(),
+        "user_id": "fast-user",
+        "module_type": "brainwave",
+        "brainwave_target": "alpha",
+        "generated_content": {"binaural_beat_frequency": 10},
+        "user_rating": 4,
+        "effectiveness_score": 1,  # Stored as an int, declared as a float
+        "timestamp": datetime(2024, 2, 3, 4, 5, 6, 789000),
+        "duration_seconds": 600,
+    }
+
+    async def scenario(client):
+        await repository.insert_sessions([dict(document)])
+        return (
+            await client.get(f"/api/sessions/{document['_id']}"),
+            await client.get("/api/sessions/", params={"user_id": "fast-user"}),
+            await client.get("/api/sessions/not-an-id"),
+        )
+
+    single, listing, missing = run_api(scenario)
+    expected = TrainingSessionResponse.model_validate(session_document_to_response(document)).model_dump(mode="json")
+    assert single.json() == expected
+    assert listing.json() == [expected]
+    assert missing.status_code == 404
+
+
+def test_knowledge_fast_path_matches_the_response_model():
+    document = {
+        "_id": ObjectId(),
+        "stimulus_type": "binaural_beats",
+        "outcome": "increased_focus",
+        "evidence_strength": 1,
+        "citations": [{"title": "T", "authors": "A", "year": "2020", "journal": "J", "doi": "ignored"}],
+    }
+    row = knowledge_document_to_response(document)
+    assert row == BrainKnowledgeResponse.model_validate(row).model_dump()
+    assert row["stimulus_parameters"] == {} and row["evidence_strength"] == 1.0
+
+
+def test_openapi_schema_keeps_the_response_models():
+    from api.main import app
+
+    paths = app.openapi()["paths"]
+
+    def schema(path, method="get"):
+        return paths[path][method]["responses"]["200"]["content"]["application/json"]["schema"]
+
+    assert schema("/api/sessions/")["items"]["$ref"].endswith("/TrainingSessionResponse")
+    assert schema("/api/sessions/{session_id}")["$ref"].endswith("/TrainingSessionResponse")
+    assert schema("/api/knowledge/")["items"]["$ref"].endswith("/BrainKnowledgeResponse")
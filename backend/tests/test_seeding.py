@@ -0,0 +1,84 @@
+"""
+Streaming seeder: lazy generation, bounded in-flight batches and reported
+failures, over the SQLite repository and a recording stand-in
+"""
+
+import asyncio
+
+import pytest
+
+from database.repository import repository
+from database.seed_training_data import generate_session_documents, stream_training_sessions
+
+
+class RecordingInserts:
+    """insert_many stand-in tracking batches, generated rows and concurrency"""
+
+    def __init__(self, fail_every: int = 0):
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_every = fail_every
+        self.generated = 0
+        self.max_ahead = 0
+
+    def documents(self, count: int):
+        for document in generate_session_documents(count):
+            self.generated += 1
+            inserted = sum(len(batch) for batch in self.batches)
+            self.max_ahead = max(self.max_ahead, self.generated - inserted)
+            yield document
+
+    async def __call__(self, batch):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        self.batches.append(batch)
+        return {index: "duplicate" for index in range(len(batch)) if self.fail_every and index % self.fail_every == 0}
+
+
+def test_batches_are_bounded_and_generated_lazily():
+    inserts = RecordingInserts()
+    inserted = asyncio.run(stream_training_sessions(
+        1000, batch_size=50, concurrency=3, documents=inserts.documents(1000), insert_many=inserts
+    ))
+
+    assert inserted == 1000
+    assert sorted(len(batch) for batch in inserts.batches) == [50] * 20
+    assert len({document["_id"] for batch in inserts.batches for document in batch}) == 1000
+    assert inserts.max_in_flight == 3
+    # At most `concurrency` batches in flight plus the one being filled
+    assert inserts.max_ahead <= 4 * 50
+
+
+def test_partial_batch_and_failed_rows():
+    inserts = RecordingInserts(fail_every=10)
+    inserted = asyncio.run(stream_training_sessions(
+        45, batch_size=20, concurrency=2, documents=inserts.documents(45), insert_many=inserts
+    ))
+
+    assert sorted(len(batch) for batch in inserts.batches) == [5, 20, 20]
+    assert inserted == 45 - (2 + 2 + 1)
+
+
+def test_insert_errors_are_raised():
+    async def broken(batch):
+        raise ConnectionError("server went away")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(stream_training_sessions(100, batch_size=10, concurrency=2, insert_many=broken))
+
+
+def test_streamed_sessions_land_in_storage_with_rollups(run_api):
+    async def scenario(client):
+        inserted = await stream_training_sessions(
+            120, batch_size=25, concurrency=4, insert_many=repository.insert_sessions
+        )
+        user = (await repository.find_sessions({}, limit=1))[0]["user_id"]
+        stats = await client.get("/api/sessions/stats", params={"user_id": user})
+        return inserted, await repository.count_sessions({}), await repository.count_sessions({"user_id": user}), stats
+
+    inserted, stored, user_sessions, stats = run_api(scenario)
+    assert inserted == stored == 120
+    assert stats.json()["total_sessions"] == user_sessions
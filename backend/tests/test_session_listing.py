@@ -0,0 +1,88 @@
+"""
+Session listings: projected rows and keyset cursor paging
+"""
+
+from datetime import datetime
+
+from bson import ObjectId
+
+from database.repository import repository
+
+
+def test_projection_tolerates_documents_missing_fields(run_api, monkeypatch):
+    stored = [
+        {"_id": ObjectId(), "timestamp": datetime(2024, 5, 2), "module_type": "movers", "user_rating": 4},
+        # Legacy row without module_type, and an int where a float is declared
+        {"_id": ObjectId(), "timestamp": datetime(2024, 5, 1), "effectiveness_score": 1},
+    ]
+
+    async def find_sessions(query, projection=None, skip=0, limit=0):
+        return [{key: value for key, value in document.items() if key == "_id" or key in projection} for document in stored]
+
+    monkeypatch.setattr(repository, "find_sessions", find_sessions)
+
+    async def scenario(client):
+        summary = await client.get("/api/sessions/", params={"view": "summary", "limit": 2})
+        fields = await client.get("/api/sessions/", params={"fields": "module_type,effectiveness_score", "limit": 5})
+        return summary, fields
+
+    summary, fields = run_api(scenario)
+    assert summary.status_code == 200
+    rows = summary.json()
+    assert rows[0]["module_type"] == "movers" and rows[0]["user_rating"] == 4
+    assert rows[1]["module_type"] is None and rows[1]["effectiveness_score"] == 1.0
+    assert "x-next-cursor" in summary.headers
+
+    assert fields.status_code == 200
+    assert [sorted(row) for row in fields.json()] == [["effectiveness_score", "id", "module_type", "timestamp"]] * 2
+    assert "x-next-cursor" not in fields.headers
+
+
+def paging_sessions(user_id: str, count: int = 25):
+    # Pairs of sessions share a timestamp, so pages must break ties on _id
+    start = datetime(2024, 6, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "module_type": "brainwave",
+            "brainwave_target": "alpha",
+            "generated_content": {"index": index},
+            "user_rating": None,
+            "effectiveness_score": None,
+            "timestamp": start.replace(hour=index // 2),
+            "duration_seconds": 300,
+        }
+        for index in range(count)
+    ]
+
+
+def test_cursor_pages_cover_every_session_once(run_api):
+    async def scenario(client):
+        await repository.insert_sessions(paging_sessions("pager"))
+        everything = await client.get("/api/sessions/", params={"user_id": "pager", "limit": 500})
+
+        pages = {"full": [], "summary": []}
+        for view in pages:
+            params = {"user_id": "pager", "limit": 7, "view": view}
+            while True:
+                response = await client.get("/api/sessions/", params=params)
+                assert response.status_code == 200
+                pages[view].append([row["id"] for row in response.json()])
+                if "x-next-cursor" not in response.headers:
+                    break
+                params["cursor"] = response.headers["x-next-cursor"]
+
+        bad_cursor = await client.get("/api/sessions/", params={"user_id": "pager", "cursor": "not-a-cursor"})
+        both = await client.get("/api/sessions/", params={"user_id": "pager", "cursor": params["cursor"], "skip": 5})
+        return everything.json(), pages, bad_cursor, both
+
+    everything, pages, bad_cursor, both = run_api(scenario)
+    expected = [row["id"] for row in everything]
+    timestamps = [row["timestamp"] for row in everything]
+    assert len(expected) == 25 and timestamps == sorted(timestamps, reverse=True)
+    for view, view_pages in pages.items():
+        assert [len(page) for page in view_pages] == [7, 7, 7, 4]
+        assert sum(view_pages, []) == expected
+    assert bad_cursor.status_code == 400 and bad_cursor.json()["detail"] == "Invalid cursor"
+    assert both.status_code == 400
@@ -0,0 +1,108 @@
+"""
+Session stats rollups: no drift after creates and ratings, and in-place rebuilds
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from beanie import init_beanie
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from database.models import SessionBucket, TrainingSession, UserDailyStats, UserSessionStats
+from database.session_stats import (
+    check_session_stats_drift,
+    rebuild_session_stats,
+    record_rating_changed,
+    record_sessions_created,
+)
+from database.session_store import session_store
+
+
+def session(user_id: str, hours_ago: int, rating=None) -> dict:
+    return {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "module_type": "brainwave" if hours_ago % 2 else "movers",
+        "brainwave_target": "theta" if hours_ago % 2 else None,
+        "generated_content": {},
+        "user_rating": rating,
+        "effectiveness_score": None,
+        "timestamp": datetime.utcnow() - timedelta(hours=hours_ago),
+        "duration_seconds": 300 + hours_ago,
+    }
+
+
+def test_rollup_matches_sessions_after_create_and_rate(run_api):
+    async def scenario(client):
+        user = "rollup-user"
+        created = []
+        for index in range(3):
+            response = await client.post("/api/sessions/", params={
+                "user_id": user, "module_type": "brainwave", "brainwave_target": "alpha", "duration_seconds": 600,
+            })
+            created.append(response.json()["id"])
+        lines = [
+            '{"user_id": "%s", "module_type": "movers", "duration_seconds": 120, "user_rating": 2}' % user,
+            '{"user_id": "%s", "module_type": "brainwave", "brainwave_target": "beta", "duration_seconds": 60}' % user,
+        ]
+        await client.post(
+            "/api/sessions/bulk", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"}
+        )
+        await client.patch(f"/api/sessions/{created[0]}/rating", params={"rating": 5})
+        await client.patch(f"/api/sessions/{created[0]}/rating", params={"rating": 3})
+        await client.patch(f"/api/sessions/{created[1]}/rating", params={"rating": 4})
+
+        rollup = await client.get("/api/sessions/stats", params={"user_id": user})
+        # A days window is aggregated from the sessions themselves
+        recomputed = await client.get("/api/sessions/stats", params={"user_id": user, "days": 3650})
+        return rollup.json(), recomputed.json()
+
+    rollup, recomputed = run_api(scenario)
+    assert rollup == recomputed
+    assert rollup["total_sessions"] == 5
+    assert rollup["average_rating"] == 3.0
+    assert rollup["sessions_by_module"] == {"brainwave": 4, "movers": 1}
+
+
+def mongo_scenario(scenario):
+    async def main():
+        database = AsyncMongoMockClient()["stats_test"]
+        await init_beanie(
+            database=database, document_models=[TrainingSession, SessionBucket, UserSessionStats, UserDailyStats]
+        )
+        return await scenario(UserSessionStats.get_motor_collection())
+
+    return asyncio.run(main())
+
+
+def test_incremental_rollups_have_no_drift():
+    async def scenario(stats):
+        sessions = [session("a", hours) for hours in range(5)] + [session("b", 1, rating=4)]
+        await session_store.insert_many(sessions)
+        await record_sessions_created(sessions)
+        await session_store.set_rating(sessions[0]["_id"], 5)
+        await record_rating_changed("a", None, 5, sessions[0]["timestamp"])
+        return await check_session_stats_drift()
+
+    assert mongo_scenario(scenario) == []
+
+
+def test_rebuild_overwrites_in_place_and_deletes_stale_users():
+    async def scenario(stats):
+        sessions = [session("a", hours, rating=3) for hours in range(4)]
+        await session_store.insert_many(sessions)
+        await stats.insert_one({"user_id": "a", "total_sessions": 99, "version": 7})
+        await stats.insert_one({"user_id": "gone", "total_sessions": 2, "version": 1})
+        before = await stats.find_one({"user_id": "a"})
+
+        written = await rebuild_session_stats()
+        after = await stats.find_one({"user_id": "a"})
+        return written, before, after, await stats.count_documents({}), await check_session_stats_drift()
+
+    written, before, after, remaining, drift = mongo_scenario(scenario)
+    assert written == 1 and remaining == 1
+    assert after["_id"] == before["_id"]
+    assert after["version"] == 8
+    assert after["total_sessions"] == 4 and after["rating_sum"] == 12
+    assert drift == []
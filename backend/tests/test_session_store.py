@@ -0,0 +1,66 @@
+"""
+Bucket layout listings against the document layout (on mongomock)
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from database.session_store import SessionStore
+
+
+def sample_sessions(count: int = 120):
+    rng = random.Random(7)
+    start = datetime(2024, 3, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": f"user-{rng.randrange(3)}",
+            "module_type": rng.choice(["brainwave", "movers"]),
+            "brainwave_target": "alpha",
+            "generated_content": {"index": index},
+            "user_rating": None,
+            "effectiveness_score": None,
+            # Several sessions share a timestamp, so _id has to break ties
+            "timestamp": start - timedelta(hours=rng.randrange(24 * 10)),
+            "duration_seconds": 600,
+        }
+        for index in range(count)
+    ]
+
+
+def stores():
+    database = AsyncMongoMockClient()["sessions_test"]
+    documents, buckets = SessionStore("documents"), SessionStore("buckets")
+    documents.collection = lambda: database["training_sessions"]
+    buckets.collection = lambda: database["session_buckets"]
+    return documents, buckets
+
+
+@pytest.mark.parametrize("query, projection, skip, limit", [
+    ({}, None, 0, 10),
+    ({}, None, 25, 10),
+    ({"user_id": "user-1"}, None, 0, 7),
+    ({"user_id": "user-2", "module_type": "movers"}, {"timestamp": 1, "module_type": 1}, 3, 5),
+    ({"timestamp": {"$lte": datetime(2024, 2, 25)}}, {"module_type": 1}, 0, 20),
+    ({"user_id": "user-0"}, None, 0, 0),
+])
+def test_bucket_find_matches_document_find(query, projection, skip, limit):
+    async def scenario():
+        documents, buckets = stores()
+        sessions = sample_sessions()
+        await documents.insert_many([dict(session) for session in sessions])
+        await buckets.insert_many([dict(session) for session in sessions])
+        return (
+            await documents.find(query, projection, skip, limit),
+            await buckets.find(query, projection, skip, limit),
+        )
+
+    expected, found = asyncio.run(scenario())
+    # Bucket entries leave out unset fields instead of storing None
+    assert found == [{key: value for key, value in row.items() if value is not None} for row in expected]
+    assert len(found) == (limit or len(found))
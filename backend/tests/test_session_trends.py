@@ -0,0 +1,152 @@
+"""
+Session trends: zero-filled days, rolling effectiveness windows and in-place
+daily rollup rebuilds
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from api.routes.sessions import build_trend_days
+from database import daily_stats
+from database.daily_stats import rebuild_daily_stats
+from database.models import SessionBucket, TrainingSession, UserDailyStats
+from database.session_store import bucket_day
+
+START = datetime(2024, 5, 10)
+
+
+def rollup(day_offset: int, sessions=1, effectiveness=None, rating=None, module="movers") -> dict:
+    return {
+        "day": START + timedelta(days=day_offset),
+        "sessions": sessions,
+        "duration_seconds": 600 * sessions,
+        "duration_by_module": {module: 600 * sessions},
+        "effectiveness_sum": effectiveness or 0.0,
+        "effectiveness_count": 1 if effectiveness is not None else 0,
+        "rating_sum": rating or 0,
+        "rating_count": 1 if rating is not None else 0,
+    }
+
+
+def test_days_without_rollups_are_zero_filled():
+    daily = build_trend_days([rollup(1, sessions=2, rating=4)], START, days=3, window=1)
+
+    assert [day["date"] for day in daily] == ["2024-05-10", "2024-05-11", "2024-05-12"]
+    assert [day["sessions"] for day in daily] == [0, 2, 0]
+    assert daily[0] == {
+        "date": "2024-05-10",
+        "sessions": 0,
+        "minutes": 0.0,
+        "minutes_by_module": {},
+        "average_effectiveness": None,
+        "average_rating": None,
+        "rolling_effectiveness": None,
+    }
+    assert daily[1]["minutes"] == 20.0 and daily[1]["average_rating"] == 4.0
+
+
+def test_rolling_window_covers_days_before_start_and_drops_old_days():
+    rows = [
+        rollup(-2, effectiveness=0.2),  # Inside the first day's 3-day window
+        rollup(-3, effectiveness=0.9),  # One day too old for any returned day
+        rollup(0, effectiveness=0.4),
+        rollup(2, effectiveness=0.8),
+    ]
+    daily = build_trend_days(rows, START, days=4, window=3)
+
+    assert len(daily) == 4
+    assert daily[0]["rolling_effectiveness"] == pytest.approx(0.3)
+    assert daily[1]["rolling_effectiveness"] == pytest.approx(0.4)  # 0.2 left the window
+    assert daily[2]["rolling_effectiveness"] == pytest.approx(0.6)
+    assert daily[3]["rolling_effectiveness"] == pytest.approx(0.8)  # Only day 2 remains
+    assert daily[0]["average_effectiveness"] == 0.4 and daily[1]["average_effectiveness"] is None
+
+
+def test_only_the_requested_days_are_returned():
+    rows = [rollup(-1, sessions=5), rollup(0), rollup(1), rollup(2, sessions=7)]
+    daily = build_trend_days(rows, START, days=2, window=1)
+
+    assert [day["date"] for day in daily] == ["2024-05-10", "2024-05-11"]
+    assert sum(day["sessions"] for day in daily) == 2
+
+
+def test_trends_route(run_api):
+    today = bucket_day(datetime.utcnow())
+    lines = [
+        {"module_type": "movers", "duration_seconds": 600, "effectiveness_score": 0.5, "days_ago": 0},
+        {"module_type": "brainwave", "brainwave_target": "alpha", "duration_seconds": 300, "days_ago": 0},
+        {"module_type": "movers", "duration_seconds": 1200, "effectiveness_score": 0.9, "days_ago": 2},
+        {"module_type": "movers", "duration_seconds": 60, "days_ago": 40},
+    ]
+    body = "\n".join(
+        json.dumps({
+            "user_id": "trend-user",
+            **{key: value for key, value in line.items() if key != "days_ago"},
+            "timestamp": (today - timedelta(days=line["days_ago"]) + timedelta(hours=1)).isoformat(),
+        })
+        for line in lines
+    )
+
+    async def scenario(client):
+        await client.post("/api/sessions/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+        trends = await client.get("/api/sessions/trends", params={"user_id": "trend-user", "days": 3, "window": 3})
+        cached = await client.get(
+            "/api/sessions/trends",
+            params={"user_id": "trend-user", "days": 3, "window": 3},
+            headers={"If-None-Match": trends.headers["etag"]},
+        )
+        too_long = await client.get("/api/sessions/trends", params={"user_id": "trend-user", "days": 366})
+        return trends, cached, too_long
+
+    trends, cached, too_long = run_api(scenario)
+    assert trends.status_code == 200
+    result = trends.json()
+    assert [day["sessions"] for day in result["daily"]] == [1, 0, 2]
+    assert result["daily"][-1]["date"] == today.date().isoformat()
+    assert result["total_sessions"] == 3 and result["total_minutes"] == 35.0
+    assert result["minutes_by_module"] == {"movers": 30.0, "brainwave": 5.0}
+    assert result["daily"][-1]["rolling_effectiveness"] == pytest.approx(0.7)
+    assert cached.status_code == 304
+    assert too_long.status_code == 422
+
+
+def test_rebuild_overwrites_days_in_place_and_deletes_stale_days(monkeypatch):
+    day, other_day, gone_day = datetime(2024, 5, 1), datetime(2024, 5, 2), datetime(2024, 4, 1)
+    recomputed = {
+        ("a", day): {**daily_stats.empty_daily_rollup(), "sessions": 2, "sessions_by_module": {"movers": 2}},
+        ("b", other_day): {**daily_stats.empty_daily_rollup(), "sessions": 1},
+    }
+
+    async def compute_daily_rollups(user_id=None):
+        return {key: value for key, value in recomputed.items() if user_id in (None, key[0])}
+
+    # mongomock has no $dateTrunc, so the aggregation itself is not exercised here
+    monkeypatch.setattr(daily_stats, "compute_daily_rollups", compute_daily_rollups)
+
+    async def scenario():
+        database = AsyncMongoMockClient()["daily_test"]
+        await init_beanie(database=database, document_models=[TrainingSession, SessionBucket, UserDailyStats])
+        collection = UserDailyStats.get_motor_collection()
+        await collection.insert_many([
+            {"user_id": "a", "day": day, "sessions": 9, "sessions_by_module": {"movers": 5, "brainwave": 4}},
+            {"user_id": "a", "day": gone_day, "sessions": 1},
+            {"user_id": "b", "day": gone_day, "sessions": 1},
+        ])
+        before = await collection.find_one({"user_id": "a", "day": day})
+
+        written = await rebuild_daily_stats("a")
+        rows = await collection.find({}, {"_id": 1, "user_id": 1, "day": 1, "sessions": 1, "sessions_by_module": 1}).to_list(None)
+        return written, before, {(row["user_id"], row["day"]): row for row in rows}
+
+    written, before, rows = asyncio.run(scenario())
+    assert written == 1
+    # b's other days are outside a single-user rebuild
+    assert set(rows) == {("a", day), ("b", gone_day)}
+    assert rows[("a", day)]["_id"] == before["_id"]
+    assert rows[("a", day)]["sessions"] == 2
+    assert rows[("a", day)]["sessions_by_module"] == {"movers": 2}
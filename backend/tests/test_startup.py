@@ -0,0 +1,20 @@
+"""
+Worker startup: heavy optional modules stay out of the app import
+"""
+
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported by the handlers that need them, never by api.main
+LAZY_MODULES = ["numpy", "api.audio", "database.eeg_store", "database.band_power", "database.parameter_analysis"]
+
+
+def test_app_import_leaves_heavy_modules_unloaded():
+    script = f"import sys, api.main; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
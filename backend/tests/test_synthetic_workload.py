@@ -0,0 +1,70 @@
+"""
+Synthetic workload: reproducible output, Zipf-skewed users, chronotype hours
+and valid per-module documents
+"""
+
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+
+from api.routes.sessions import TrainingSessionCreate
+from database.brainwave_bands import BRAINWAVE_STATES
+from database.synthetic_workload import SyntheticWorkload
+
+END = datetime(2024, 6, 1)
+
+
+def workload(**options) -> SyntheticWorkload:
+    return SyntheticWorkload(**{"num_users": 200, "seed": 7, "days": 60, "end": END, **options})
+
+
+def test_same_parameters_give_identical_documents():
+    first = list(workload().generate(3000))
+    assert first == list(workload().generate(3000))
+    assert [document["_id"] for document in first] != [document["_id"] for document in workload(seed=8).generate(3000)]
+
+
+def test_user_activity_is_zipf_skewed():
+    generator = workload()
+    counts = Counter(document["user_id"] for document in generator.generate(20000))
+    ranked = [counts[user_id] for user_id in generator.user_ids]
+
+    # Rank 1 vs rank 10 follows 10 ** ZIPF_EXPONENT (about 12.6) within sampling noise
+    assert 8 < ranked[0] / ranked[9] < 20
+    assert sum(ranked[:20]) > 0.5 * sum(ranked)
+
+
+def test_timestamps_ids_and_parameters_are_consistent():
+    generator = workload()
+    documents = list(generator.generate(5000))
+
+    for document in documents:
+        assert generator.start <= document["timestamp"] < END
+        assert document["_id"].generation_time == document["timestamp"].replace(tzinfo=timezone.utc)
+        if document["module_type"] == "brainwave":
+            low, high = BRAINWAVE_STATES[document["brainwave_target"]]["range"]
+            assert low <= document["generated_content"]["binaural_beat_frequency"] <= high
+        else:
+            assert document["brainwave_target"] is None and document["generated_content"]
+
+    # Every row would pass the API's own validation
+    for document in documents:
+        TrainingSessionCreate(**{key: value for key, value in document.items() if key != "_id"})
+    assert {document["module_type"] for document in documents} == {"brainwave", "movers", "pfc_gym", "mental_rehearsal"}
+
+
+def test_chronotypes_shift_the_time_of_day():
+    generator = workload(num_users=400)
+    chronotype_of = {
+        user_id: generator.chronotype_names[chronotype]
+        for user_id, chronotype in zip(generator.user_ids, generator.user_chronotypes)
+    }
+    hours = {"lion": [], "wolf": []}
+    for document in generator.generate(20000):
+        chronotype = chronotype_of[document["user_id"]]
+        if chronotype in hours:
+            hours[chronotype].append(document["timestamp"].hour)
+
+    # Lions peak in the morning, wolves in the evening
+    assert np.mean(hours["lion"]) + 3 < np.mean(hours["wolf"])
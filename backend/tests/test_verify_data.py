@@ -0,0 +1,78 @@
+"""
+Data verification: $facet summaries match plain counts (on mongomock), and the
+per-session quality rules
+"""
+
+import asyncio
+import itertools
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from database.models import BrainKnowledge, SessionBucket, TrainingSession, User
+from database.session_store import session_store
+from database.synthetic_workload import SyntheticWorkload
+from database.verify_data import check_knowledge, check_session_quality, check_sessions, check_users, session_problems
+
+
+def valid_session(**fields) -> dict:
+    return {
+        "user_id": "u",
+        "module_type": "brainwave",
+        "brainwave_target": "alpha",
+        "generated_content": {"binaural_beat_frequency": 10},
+        "user_rating": 4,
+        "effectiveness_score": 0.5,
+        "timestamp": "2024-01-01",
+        "duration_seconds": 600,
+        **fields,
+    }
+
+
+def test_session_problems():
+    assert session_problems(valid_session()) == []
+    assert session_problems(valid_session(module_type="movers", brainwave_target=None, generated_content={})) == []
+    assert session_problems(valid_session(
+        user_id="", user_rating=6, effectiveness_score=1.5, duration_seconds=0, timestamp=None
+    )) == [
+        "missing user_id", "missing timestamp", "non-positive duration", "rating outside 1-5", "effectiveness outside 0-1"
+    ]
+    assert session_problems(valid_session(generated_content={"binaural_beat_frequency": 30})) == [
+        "binaural beat outside target band"
+    ]
+    assert session_problems(valid_session(brainwave_target="kappa")) == ["unknown brainwave_target 'kappa'"]
+    assert session_problems(valid_session(module_type="yoga")) == ["unknown module_type 'yoga'"]
+
+
+def test_facet_checks_match_plain_counts():
+    sessions = list(SyntheticWorkload(num_users=20, seed=3).generate(400))
+
+    async def scenario():
+        database = AsyncMongoMockClient()["verify_test"]
+        await init_beanie(database=database, document_models=[User, TrainingSession, SessionBucket, BrainKnowledge])
+        await session_store.insert_many([dict(session) for session in sessions])
+        await User.get_motor_collection().insert_many([{"email": f"user{index}@example.com"} for index in range(5)])
+        await BrainKnowledge.get_motor_collection().insert_many([
+            {"stimulus_type": stimulus, "outcome": "focus", "evidence_strength": strength, "citations": citations}
+            for stimulus, (strength, citations) in zip(
+                ["a", "b", "c", "d"], [(0.8, [{"title": "t"}]), (1.4, [{"title": "t"}]), (0.5, []), (0.9, [{}])]
+            )
+        ])
+        return await asyncio.gather(
+            check_users(), check_sessions(), check_knowledge(), check_session_quality(sample_size=50)
+        )
+
+    users, summary, knowledge, quality = asyncio.run(scenario())
+    assert users["total"] == 5 and len(users["examples"]) == 3
+
+    assert summary["total"] == len(sessions)
+    by_module = {
+        module: len(list(rows))
+        for module, rows in itertools.groupby(sorted(session["module_type"] for session in sessions))
+    }
+    assert summary["by_module"] == by_module
+    assert sum(summary["by_brainwave"].values()) == by_module["brainwave"]
+
+    assert knowledge["total"] == 4 and knowledge["invalid"] == 2 and len(knowledge["entries"]) == 4
+    assert quality["sampled"] == 50 and quality["invalid"] == 0 and quality["problems"] == {}
+    assert quality["example"]["module_type"] == "brainwave"